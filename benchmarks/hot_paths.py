@@ -0,0 +1,281 @@
+"""
+几何、渲染与写入世界的热点路径基准。
+
+覆盖 generate_line、generate_bezier、enforce_4connectivity、轨道加宽（dilate_blocks）、
+generate_circle_segments、静态图与 Plotly 交互图渲染，以及 fill_from_file / fill_region
+在本地合成世界（world_fixture.py 生成，按参数缓存，--terrain 选择地形）上的写入。
+按轨道长度（10 ~ 100000 个方块）和宽度组合参数，每组参数重复运行，至少累计 MIN_TIME 秒（单次很慢的只运行一次），记录最短与中位耗时。
+
+结果写入 JSON（默认 benchmarks/results/hot_paths.json，该目录不纳入版本控制）；
+给出 --baseline 时与之前的结果比较，中位耗时超过基线 × tolerance 的参数组视为性能回归，以退出码 1 结束。
+
+用法：
+    python benchmarks/hot_paths.py                                # 全部用例、完整参数
+    python benchmarks/hot_paths.py --quick                        # 小参数快速检查
+    python benchmarks/hot_paths.py --case bezier --lengths 1000 100000 --widths 1 5
+    python benchmarks/hot_paths.py --output new.json --baseline old.json --tolerance 1.5
+"""
+import argparse
+import io
+import json
+import math
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "project"))
+sys.path.insert(1, os.path.join(ROOT, "project_web"))  # render_worker；共享模块与 project 中的相同
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")  # 默认结果目录
+
+import numpy as np
+from matplotlib.figure import Figure
+
+from angle_straight import (compute_track, dilate_blocks, enforce_4connectivity, generate_bezier,
+                            generate_line, plot_full_track, remove_duplicates)
+from circle_vision_simple import draw_quarter_circle_image, generate_circle_segments, write_coords_file
+from file_fill import fill_from_file
+from region_input import fill_region
+from render_worker import track_plotly_figure
+from world_fixture import TERRAINS, copy_world
+
+LENGTHS = [10, 100, 1000, 10000, 100000]
+WIDTHS = [1, 3, 7]
+QUICK_LENGTHS = [10, 100]
+QUICK_WIDTHS = [1, 3]
+
+MIN_TIME = 0.2  # 每组参数至少累计运行的秒数
+MAX_REPEATS = 20  # 每组参数最多重复次数
+NOISE_SECONDS = 0.005  # 与基线比较时忽略小于该值的差异
+WORLD_CHUNKS = 32  # 合成世界的边长（区块）
+WORLD_SIZE = WORLD_CHUNKS * 16
+GROUND_Y = 64
+
+def endpoints(length):
+    """起点与终点：沿 3:4:5 方向，长度约 length 个方块（避免退化成水平线）"""
+    return (0, 0), (round(length * 0.8), round(length * 0.6))
+
+def raw_line_pixels(length):
+    """每单位长度一个采样点、四舍五入得到的像素序列，含对角台阶，供 enforce_4connectivity 使用"""
+    a, b = endpoints(length)
+    t = np.linspace(0.0, 1.0, length + 1)[:, None]
+    pts = np.trunc(np.array(a) + t * (np.array(b) - np.array(a)) + 0.5).astype(int)
+    return remove_duplicates(list(map(tuple, pts.tolist())))
+
+def track(length, width):
+    """长度约 length、宽度 width 的曲线轨道：(中心线, 加宽后的方块)"""
+    a, b = endpoints(length)
+    centerline, _, blocks = compute_track(a, b, 0.0, 1.0, width, 3.0)
+    return centerline, blocks
+
+def folded_blocks(length, width):
+    """把轨道方块折叠进合成世界的范围内（x、z 对世界边长取模），方块数量基本不变"""
+    _, blocks = track(length, width)
+    xz = np.unique(blocks % WORLD_SIZE, axis=0)
+    return np.column_stack((xz[:, 0], np.full(len(xz), GROUND_Y), xz[:, 1]))
+
+# === 用例 ===
+# 每个用例：setup(length, width) 返回状态（不计时），run(state) 为计时部分。
+# uses_width 为 False 的用例只按长度测量；max_length 限制过慢用例的参数范围。
+
+def _line_setup(length, width):
+    return endpoints(length)
+
+def _line_run(state):
+    generate_line(*state)
+
+def _bezier_run(state):
+    a, b = state
+    generate_bezier(a, b, 0.0, 1.0, 3.0)
+
+def _connectivity_setup(length, width):
+    return raw_line_pixels(length)
+
+def _connectivity_run(state):
+    enforce_4connectivity(state)
+
+def _dilate_setup(length, width):
+    return track(length, 1)[0], width
+
+def _dilate_run(state):
+    dilate_blocks(*state)
+
+def _segments_setup(length, width):
+    # 整圆周长约为 length
+    return max(1, round(length / (2 * math.pi)))
+
+def _segments_run(state):
+    generate_circle_segments(state)
+
+def _static_setup(length, width):
+    return endpoints(length) + (width,)
+
+def _static_run(state):
+    a, b, width = state
+    fig = Figure(figsize=(10, 8))
+    plot_full_track(a, b, 0.0, 1.0, width, 3.0, order="chunk", output_file=None, fig=fig)
+    fig.savefig(io.BytesIO(), format="png", bbox_inches="tight", dpi=100)
+    fig.clear()
+
+def _plotly_setup(length, width):
+    _, blocks = track(length, width)
+    return np.column_stack((blocks[:, 0], np.full(len(blocks), float(GROUND_Y)), blocks[:, 1]))
+
+def _plotly_run(state):
+    track_plotly_figure(state).to_json()
+
+def _circle_image_run(state):
+    draw_quarter_circle_image(state)
+
+class WorldCopies:
+    """写入类用例共用按参数缓存的合成世界（见 world_fixture），每组参数复制一份再写入"""
+    def __init__(self):
+        self.dir = None
+        self.terrain = "empty"
+
+    def copy(self):
+        if self.dir is None:
+            self.dir = tempfile.mkdtemp(prefix="smct_bench_")
+        path = os.path.join(tempfile.mkdtemp(dir=self.dir), "world")
+        return copy_world(path, chunks=WORLD_CHUNKS, terrain=self.terrain)
+
+    def cleanup(self):
+        if self.dir:
+            shutil.rmtree(self.dir, ignore_errors=True)
+
+worlds = WorldCopies()
+
+def _file_fill_setup(length, width):
+    world = worlds.copy()
+    coords = os.path.join(os.path.dirname(world), "coords.txt")
+    write_coords_file(coords, folded_blocks(length, width))
+    return world, coords
+
+def _file_fill_run(state):
+    result = fill_from_file(state[0], state[1], "stone")
+    if not result.startswith("✅"):
+        raise RuntimeError(result)
+
+def _region_setup(length, width):
+    # 长 length × 宽 width 的方块，超出世界边长的部分向上叠层
+    xlen = min(length, WORLD_SIZE)
+    layers = -(-length // WORLD_SIZE)
+    return worlds.copy(), (0, GROUND_Y, 0), (xlen - 1, GROUND_Y + layers - 1, width - 1)
+
+def _region_run(state):
+    result = fill_region(state[0], state[1], state[2], "stone")
+    if not result.startswith("✅"):
+        raise RuntimeError(result)
+
+CASES = {
+    # 名称: (setup, run, uses_width, max_length)
+    "generate_line": (_line_setup, _line_run, False, None),
+    "generate_bezier": (_line_setup, _bezier_run, False, None),
+    "enforce_4connectivity": (_connectivity_setup, _connectivity_run, False, None),
+    "dilate_blocks": (_dilate_setup, _dilate_run, True, None),
+    "generate_circle_segments": (_segments_setup, _segments_run, False, None),
+    "render_static": (_static_setup, _static_run, True, 1000),
+    "render_plotly": (_plotly_setup, _plotly_run, True, 10000),
+    "render_circle_image": (_segments_setup, _circle_image_run, False, None),
+    "fill_from_file": (_file_fill_setup, _file_fill_run, True, None),
+    "fill_region": (_region_setup, _region_run, True, None),
+}
+
+def time_case(run, state):
+    """重复运行直到累计 MIN_TIME 秒或 MAX_REPEATS 次，返回每次的耗时列表"""
+    times = []
+    while not times or (sum(times) < MIN_TIME and len(times) < MAX_REPEATS):
+        start = time.perf_counter()
+        run(state)
+        times.append(time.perf_counter() - start)
+    return times
+
+def run_suite(names, lengths, widths):
+    results = {}
+    for name in names:
+        setup, run, uses_width, max_length = CASES[name]
+        for length in lengths:
+            if max_length is not None and length > max_length:
+                continue
+            for width in (widths if uses_width else [None]):
+                key = f"{name}[L={length}]" if width is None else f"{name}[L={length},w={width}]"
+                state = setup(length, width or 1)
+                times = time_case(run, state)
+                results[key] = {
+                    "case": name,
+                    "length": length,
+                    "width": width,
+                    "repeats": len(times),
+                    "min_s": round(min(times), 6),
+                    "median_s": round(statistics.median(times), 6),
+                }
+                print(f"{results[key]['median_s'] * 1000:12.2f} ms  {key}  (×{len(times)})")
+    return results
+
+def compare(results, baseline, tolerance):
+    """返回相对基线变慢超过 tolerance 倍的参数组说明"""
+    failures = []
+    for key, result in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        now, before = result["median_s"], base["median_s"]
+        if now > before * tolerance and now - before > NOISE_SECONDS:
+            failures.append(f"{key}: {before * 1000:.2f} ms → {now * 1000:.2f} ms（×{now / before:.2f}）")
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser(description="几何、渲染与写入世界的热点路径基准")
+    parser.add_argument("--case", action="append",
+                        help="只运行名称包含该字符串的用例，可重复；可选：" + "、".join(CASES))
+    parser.add_argument("--lengths", type=int, nargs="+", help=f"轨道长度，默认 {LENGTHS}")
+    parser.add_argument("--widths", type=int, nargs="+", help=f"轨道宽度，默认 {WIDTHS}")
+    parser.add_argument("--quick", action="store_true",
+                        help=f"快速模式：长度 {QUICK_LENGTHS}，宽度 {QUICK_WIDTHS}")
+    parser.add_argument("--terrain", choices=TERRAINS, default="empty", help="写入类用例使用的合成世界地形")
+    parser.add_argument("--output", default=os.path.join(RESULTS_DIR, "hot_paths.json"),
+                        help="结果 JSON 路径，默认写入 benchmarks/results/")
+    parser.add_argument("--baseline", help="用于比较的基线结果 JSON")
+    parser.add_argument("--tolerance", type=float, default=1.5, help="允许的变慢倍数")
+    args = parser.parse_args()
+
+    names = [n for n in CASES if not args.case or any(c in n for c in args.case)]
+    lengths = args.lengths or (QUICK_LENGTHS if args.quick else LENGTHS)
+    widths = args.widths or (QUICK_WIDTHS if args.quick else WIDTHS)
+
+    worlds.terrain = args.terrain
+    try:
+        results = run_suite(names, lengths, widths)
+    finally:
+        worlds.cleanup()
+
+    failures = []
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            failures = compare(results, json.load(f)["results"], args.tolerance)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({
+            "time": datetime.now().isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "results": results,
+            "failures": failures,
+        }, f, ensure_ascii=False, indent=2)
+    print(f"\n结果已写入 {args.output}")
+
+    if failures:
+        print("\n❌ 性能回归：")
+        for line in failures:
+            print("  " + line)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""
+启动导入耗时基准与回归检查。
+
+对桌面版（project/combined_demo）和网页版（project_web/combined_web_demo）分别测量：
+  - 冷启动导入耗时：使用全新的空字节码缓存目录（-X pycache_prefix），所有模块都要重新编译；
+  - 热启动导入耗时：字节码缓存已就绪，重复多次取中位数；
+  - 各顶层包的导入耗时：解析 -X importtime 输出，取每个包首次导入时的累计耗时；
+  - 首个页面可访问的时间：启动服务器进程，到首页返回 200 为止。
+结果写入 JSON（默认 benchmarks/results/import_time.json，该目录不纳入版本控制）；
+超过 import_budgets.json 中的预算，或在导入阶段加载了预算中禁止的模块
+（例如桌面版启动时的 amulet、matplotlib、plotly）时，以退出码 1 结束。
+
+用法：
+    python benchmarks/import_time.py                      # 测量全部目标
+    python benchmarks/import_time.py --target desktop --runs 3 --output result.json
+    python benchmarks/import_time.py --no-page            # 不测首个页面
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUDGET_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "import_budgets.json")
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")  # 默认结果目录（不纳入版本控制）
+
+# 目标名 -> (工作目录, 导入的模块, 启动服务器的代码；{port} 处填入端口)
+TARGETS = {
+    "desktop": ("project", "combined_demo",
+                "from combined_demo import demo\n"
+                "demo.launch(server_name='127.0.0.1', server_port={port})"),
+    "web": ("project_web", "combined_web_demo",
+            "import os, runpy\n"
+            "os.environ['SMCT_WEB_PORT'] = '{port}'\n"
+            "runpy.run_path('combined_web_demo.py', run_name='__main__')"),
+}
+
+PAGE_TIMEOUT_SECONDS = 180  # 等待首页的最长时间
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)")
+
+def parse_importtime(stderr):
+    """
+    解析 -X importtime 的输出，返回 [(模块名, 嵌套深度, 自身耗时 us, 累计耗时 us)]。
+    每个模块只在第一次导入时出现一次。
+    """
+    rows = []
+    for line in stderr.splitlines():
+        m = IMPORTTIME_LINE.match(line)
+        if m:
+            rows.append((m.group(4), len(m.group(3)) // 2, int(m.group(1)), int(m.group(2))))
+    return rows
+
+def package_times(rows):
+    """各顶层包的导入耗时（毫秒）：取包本身那一行的累计耗时，包含它首次导入的依赖"""
+    return {name: cumulative / 1000 for name, _, _, cumulative in rows if "." not in name}
+
+def run_import(target, pycache_prefix=None):
+    """在子进程中导入目标模块一次，返回 (墙钟耗时秒, importtime 记录)"""
+    workdir, module, _ = TARGETS[target]
+    cmd = [sys.executable, "-X", "importtime"]
+    if pycache_prefix:
+        cmd += ["-X", f"pycache_prefix={pycache_prefix}"]
+    cmd += ["-c", f"import {module}"]
+    env = dict(os.environ, PYTHONWARNINGS="ignore", MPLBACKEND="Agg")
+    start = time.perf_counter()
+    proc = subprocess.run(cmd, cwd=os.path.join(ROOT, workdir), env=env,
+                          capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(f"导入 {module} 失败：\n{proc.stderr[-2000:]}")
+    return elapsed, parse_importtime(proc.stderr)
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def time_to_first_page(target):
+    """启动服务器进程，返回首页首次返回 200 所用的秒数"""
+    workdir, _, launch = TARGETS[target]
+    port = free_port()
+    env = dict(os.environ, PYTHONWARNINGS="ignore", MPLBACKEND="Agg")
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-c", launch.format(port=port)],
+                            cwd=os.path.join(ROOT, workdir), env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - start < PAGE_TIMEOUT_SECONDS:
+            if proc.poll() is not None:
+                raise RuntimeError(f"{target} 服务器进程提前退出（退出码 {proc.returncode}）")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=1) as resp:
+                    if resp.status == 200:
+                        return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.1)
+        raise RuntimeError(f"{target} 首页在 {PAGE_TIMEOUT_SECONDS} 秒内没有响应")
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+def measure(target, runs, page=True):
+    """测量一个目标，返回结果字典（时间单位：毫秒 / 秒）"""
+    with tempfile.TemporaryDirectory() as cache:
+        cold_seconds, cold_rows = run_import(target, pycache_prefix=cache)
+
+    run_import(target)  # 确保字节码缓存已写好
+    warm = [run_import(target) for _ in range(runs)]
+    warm_seconds = [seconds for seconds, _ in warm]
+    warm_packages = [package_times(rows) for _, rows in warm]
+    names = set().union(*warm_packages)
+    packages = {name: statistics.median(p.get(name, 0.0) for p in warm_packages) for name in names}
+    modules = sorted({name for name, _, _, _ in warm[-1][1]})
+
+    return {
+        "cold_import_ms": round(cold_seconds * 1000, 1),
+        "warm_import_ms": round(statistics.median(warm_seconds) * 1000, 1),
+        "warm_import_runs_ms": [round(s * 1000, 1) for s in warm_seconds],
+        "cold_packages_ms": {k: round(v, 1) for k, v in
+                             sorted(package_times(cold_rows).items(), key=lambda kv: -kv[1])},
+        "warm_packages_ms": {k: round(v, 1) for k, v in
+                             sorted(packages.items(), key=lambda kv: -kv[1])},
+        "first_page_s": round(time_to_first_page(target), 2) if page else None,
+        "modules": modules,
+    }
+
+def check_budget(target, result, budget):
+    """返回超出预算的说明列表，空列表表示通过"""
+    failures = []
+    for key in ("cold_import_ms", "warm_import_ms", "first_page_s"):
+        limit = budget.get(key)
+        if limit is not None and result.get(key) is not None and result[key] > limit:
+            failures.append(f"{target}: {key} = {result[key]}，超过预算 {limit}")
+    loaded = set(result["modules"])
+    for name in budget.get("forbidden_modules", []):
+        if name in loaded:
+            failures.append(f"{target}: 导入阶段加载了应延迟导入的模块 {name}")
+    return failures
+
+def print_result(target, result, top=15):
+    print(f"\n=== {target} ===")
+    print(f"冷启动导入 {result['cold_import_ms']:.0f} ms，热启动导入 {result['warm_import_ms']:.0f} ms"
+          + (f"，首个页面 {result['first_page_s']:.2f} s" if result["first_page_s"] is not None else ""))
+    print("--- 各顶层包导入耗时（热启动，含依赖）---")
+    for name, ms in list(result["warm_packages_ms"].items())[:top]:
+        print(f"{ms:10.1f} ms  {name}")
+
+def main():
+    parser = argparse.ArgumentParser(description="启动导入耗时基准与回归检查")
+    parser.add_argument("--target", choices=sorted(TARGETS), action="append",
+                        help="要测量的目标，可重复；默认全部")
+    parser.add_argument("--runs", type=int, default=5, help="热启动重复次数（取中位数）")
+    parser.add_argument("--no-page", action="store_true", help="不测首个页面的时间")
+    parser.add_argument("--output", default=os.path.join(RESULTS_DIR, "import_time.json"),
+                        help="结果 JSON 路径，默认写入 benchmarks/results/")
+    parser.add_argument("--budget", default=BUDGET_FILE, help="预算 JSON 路径")
+    parser.add_argument("--no-check", action="store_true", help="只记录结果，不检查预算")
+    args = parser.parse_args()
+
+    results = {
+        "time": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "targets": {},
+    }
+    for target in args.target or sorted(TARGETS):
+        results["targets"][target] = measure(target, args.runs, page=not args.no_page)
+        print_result(target, results["targets"][target])
+
+    failures = []
+    if not args.no_check:
+        with open(args.budget, encoding="utf-8") as f:
+            budgets = json.load(f)
+        for target, result in results["targets"].items():
+            failures += check_budget(target, result, budgets.get(target, {}))
+    results["failures"] = failures
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"\n结果已写入 {args.output}")
+
+    if failures:
+        print("\n❌ 超出预算：")
+        for line in failures:
+            print("  " + line)
+        sys.exit(1)
+    print("✅ 全部在预算内")
+
+if __name__ == "__main__":
+    main()
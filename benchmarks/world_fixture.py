@@ -0,0 +1,165 @@
+"""
+基准测试用的本地 Bedrock 世界：不需要游戏本体或网络，直接用 amulet 创建 LevelDB 存档。
+
+地形可选：
+  - empty：只有空区块（全是空气）；
+  - flat：y = base_y 处一层草方块，其下到 floor_y 为石头；
+  - noise：按 seed 生成的平滑高度噪声，地表高度在 base_y ± amplitude 之间。
+相同参数生成的世界完全相同，按参数缓存在磁盘上（默认 ~/.cache/smct/worlds，
+可用环境变量 SMCT_WORLD_CACHE 或 --cache-dir 指定），之后直接复用。
+写入类基准会修改世界，应使用 copy_world 复制一份再写。
+
+用法：
+    python benchmarks/world_fixture.py                             # 32×32 区块的空世界，打印路径
+    python benchmarks/world_fixture.py --terrain noise --chunks 16 --seed 7
+    python benchmarks/world_fixture.py --terrain flat --copy /tmp/my_world
+    python benchmarks/world_fixture.py --clear                     # 删除全部缓存
+"""
+import argparse
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+DIMENSION = "minecraft:overworld"
+WORLD_VERSION = (1, 21, 81)
+FIXTURE_VERSION = 1  # 生成方式改变时加 1，使旧缓存失效
+TERRAINS = ("empty", "flat", "noise")
+NOISE_CELL = 32  # 噪声网格间距（方块）
+CACHE_DIR = os.environ.get("SMCT_WORLD_CACHE") or os.path.join(
+    os.path.expanduser("~"), ".cache", "smct", "worlds")
+
+def fixture_name(chunks=32, terrain="empty", seed=0, base_y=64, amplitude=8, floor_y=0):
+    """由参数得到缓存目录名；只有影响生成结果的参数才写入"""
+    if terrain not in TERRAINS:
+        raise ValueError(f"未知地形：{terrain}，可选 {TERRAINS}")
+    version = ".".join(map(str, WORLD_VERSION))
+    name = f"{terrain}_c{chunks}"
+    if terrain != "empty":
+        name += f"_y{base_y}_f{floor_y}"
+    if terrain == "noise":
+        name += f"_a{amplitude}_s{seed}"
+    return f"{name}_v{version}_r{FIXTURE_VERSION}"
+
+def surface_heights(size, terrain, seed, base_y, amplitude) -> np.ndarray:
+    """
+    (size, size) 整数地表高度，下标为 [x, z]。
+    noise：两层平滑的值噪声（网格间距 NOISE_CELL 与其四分之一，后者振幅减半）。
+    """
+    if terrain != "noise":
+        return np.full((size, size), base_y, dtype=np.int64)
+    rng = np.random.default_rng(seed)
+    total = np.zeros((size, size))
+    for cell, weight in ((NOISE_CELL, 1.0), (NOISE_CELL // 4, 0.5)):
+        grid = rng.uniform(-1.0, 1.0, (size // cell + 2, size // cell + 2))
+        i, t = np.divmod(np.arange(size), cell)
+        t = t / cell
+        t = t * t * (3 - 2 * t)  # smoothstep，格点处平滑过渡
+        tx, tz = t[:, None], t[None, :]
+        g00, g10 = grid[np.ix_(i, i)], grid[np.ix_(i + 1, i)]
+        g01, g11 = grid[np.ix_(i, i + 1)], grid[np.ix_(i + 1, i + 1)]
+        total += weight * ((g00 * (1 - tx) + g10 * tx) * (1 - tz) + (g01 * (1 - tx) + g11 * tx) * tz)
+    total /= 1.5
+    return np.trunc(base_y + amplitude * total + 0.5).astype(np.int64)
+
+def _block_id(level, name):
+    """方块在世界调色板中的下标"""
+    from amulet.api.block import Block
+
+    version_obj = level.translation_manager.get_version("bedrock", WORLD_VERSION)
+    universal_block, _, _ = version_obj.block.to_universal(Block("minecraft", name))
+    return level.block_palette.get_add_block(universal_block)
+
+def create_world(path, chunks=32, terrain="empty", seed=0, base_y=64, amplitude=8, floor_y=0):
+    """
+    在 path 创建 Bedrock 世界，包含区块 (0, 0) 到 (chunks - 1, chunks - 1)，
+    即方块坐标 x、z 均在 [0, chunks * 16) 内。path 不能已存在。返回 path。
+    """
+    from amulet.api.chunk import Chunk
+    from amulet.level.formats.leveldb_world import LevelDBFormat
+    import amulet
+
+    fixture_name(chunks, terrain, seed, base_y, amplitude, floor_y)  # 检查参数
+    wrapper = LevelDBFormat(path)
+    wrapper.create_and_open("bedrock", WORLD_VERSION)
+    wrapper.save()
+    wrapper.close()
+
+    level = amulet.load_level(path)
+    try:
+        if terrain != "empty":
+            heights = surface_heights(chunks * 16, terrain, seed, base_y, amplitude)
+            air, stone, grass = (_block_id(level, name) for name in ("air", "stone", "grass_block"))
+            ly = np.arange(16)[None, :, None]
+        for cx in range(chunks):
+            for cz in range(chunks):
+                chunk = Chunk(cx, cz)
+                if terrain != "empty":
+                    h = heights[cx * 16:(cx + 1) * 16, cz * 16:(cz + 1) * 16][:, None, :]
+                    for sy in range(floor_y // 16, int(h.max()) // 16 + 1):
+                        y = sy * 16 + ly
+                        section = np.where(y < h, stone, np.where(y == h, grass, air))
+                        section = np.where(y < floor_y, air, section)
+                        chunk.blocks.add_sub_chunk(sy, section.astype(np.uint32))
+                level.put_chunk(chunk, DIMENSION)
+        level.save()
+    finally:
+        level.close()
+    return path
+
+def cached_world(cache_dir=None, **params):
+    """
+    返回按参数缓存的世界路径，没有缓存时先生成。
+    先在临时目录中生成再整体改名，中途失败或并发生成都不会留下不完整的缓存。
+    不要直接写入返回的世界，需要修改时用 copy_world。
+    """
+    cache_dir = cache_dir or CACHE_DIR
+    path = os.path.join(cache_dir, fixture_name(**params))
+    if os.path.isdir(path):
+        return path
+    os.makedirs(cache_dir, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=".building_", dir=cache_dir)
+    try:
+        create_world(os.path.join(staging, "world"), **params)
+        try:
+            os.rename(os.path.join(staging, "world"), path)
+        except OSError:
+            if not os.path.isdir(path):  # 不是并发生成的同一个世界
+                raise
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+    return path
+
+def copy_world(dst, cache_dir=None, **params):
+    """把按参数缓存的世界复制到 dst（dst 不能已存在），返回 dst"""
+    shutil.copytree(cached_world(cache_dir, **params), dst)
+    return dst
+
+def main():
+    parser = argparse.ArgumentParser(description="生成或复用基准测试用的本地 Bedrock 世界")
+    parser.add_argument("--chunks", type=int, default=32, help="世界边长（区块）")
+    parser.add_argument("--terrain", choices=TERRAINS, default="empty", help="地形")
+    parser.add_argument("--seed", type=int, default=0, help="noise 地形的随机种子")
+    parser.add_argument("--base-y", type=int, default=64, help="地表平均高度")
+    parser.add_argument("--amplitude", type=int, default=8, help="noise 地形的起伏幅度")
+    parser.add_argument("--floor-y", type=int, default=0, help="石头层的最低高度")
+    parser.add_argument("--cache-dir", default=None, help=f"缓存目录，默认 {CACHE_DIR}")
+    parser.add_argument("--copy", metavar="DST", help="复制一份到 DST（可直接写入）")
+    parser.add_argument("--clear", action="store_true", help="删除缓存目录中的全部世界")
+    args = parser.parse_args()
+
+    if args.clear:
+        shutil.rmtree(args.cache_dir or CACHE_DIR, ignore_errors=True)
+        print(f"已清空 {args.cache_dir or CACHE_DIR}")
+        return
+
+    params = dict(chunks=args.chunks, terrain=args.terrain, seed=args.seed,
+                  base_y=args.base_y, amplitude=args.amplitude, floor_y=args.floor_y)
+    path = cached_world(args.cache_dir, **params)
+    if args.copy:
+        path = copy_world(args.copy, args.cache_dir, **params)
+    print(path)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+import math
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+from angle_straight import compute_track
+from chunk_order import block_order
+
+# 每条轨道的参数字段，数组输入时按此顺序取列（至少前 4 列）
+TRACK_FIELDS = ("x0", "y0", "x1", "y1", "k1", "k2", "track_width", "curvature",
+                "xm", "ym", "k_mid", "use_line")
+
+TRACK_DEFAULTS = {
+    "k1": 0.0, "k2": 0.0, "track_width": 1, "curvature": 3.0,
+    "xm": None, "ym": None, "k_mid": None, "use_line": False,
+}
+
+def _missing(v):
+    return v is None or (isinstance(v, float) and math.isnan(v))
+
+def _slope(v):
+    if isinstance(v, str):
+        return float('inf') if v.strip().lower() == "inf" else float(v)
+    return float(v)
+
+TRUE_STRINGS = ("true", "1", "yes", "y", "t")
+FALSE_STRINGS = ("false", "0", "no", "n", "f", "")
+
+def _flag(v, field, i):
+    """
+    布尔字段：接受 bool、0/1，以及表格中常见的字符串（不区分大小写）
+    "true"/"1"/"yes" 与 "false"/"0"/"no"/""；其他值抛出 ValueError。
+    """
+    if isinstance(v, (bool, np.bool_)):
+        return bool(v)
+    if isinstance(v, str):
+        text = v.strip().lower()
+        if text in TRUE_STRINGS:
+            return True
+        if text in FALSE_STRINGS:
+            return False
+    elif isinstance(v, (int, float, np.integer, np.floating)) and v in (0, 1):
+        return bool(v)
+    raise ValueError(f"第 {i} 条轨道的字段 {field} 无法识别为布尔值：{v!r}")
+
+def normalize_specs(specs):
+    """
+    把轨道参数表统一转换为字典列表。
+    specs 可以是 pandas.DataFrame（列名取自 TRACK_FIELDS）、字典列表，
+    或每行按 TRACK_FIELDS 顺序排列的二维数组。缺失值使用 TRACK_DEFAULTS。
+    use_line 可以是布尔值、0/1 或 "true"/"false"、"yes"/"no" 等字符串（见 _flag）。
+    """
+    if hasattr(specs, "to_dict"):
+        rows = specs.to_dict("records")
+    else:
+        rows = []
+        for row in specs:
+            if isinstance(row, dict):
+                rows.append(row)
+            else:
+                rows.append(dict(zip(TRACK_FIELDS, list(row))))
+
+    normalized = []
+    for i, row in enumerate(rows):
+        spec = dict(TRACK_DEFAULTS)
+        spec.update({k: v for k, v in row.items() if k in TRACK_FIELDS and not _missing(v)})
+        for key in ("x0", "y0", "x1", "y1"):
+            if key not in spec:
+                raise ValueError(f"第 {i} 条轨道缺少字段 {key}")
+        spec["use_line"] = _flag(spec["use_line"], "use_line", i)
+        spec["k1"] = _slope(spec["k1"])
+        spec["k2"] = _slope(spec["k2"])
+        if spec["k_mid"] is not None:
+            spec["k_mid"] = _slope(spec["k_mid"])
+        normalized.append(spec)
+    return normalized
+
+def track_blocks(spec, sampling="uniform"):
+    """计算单条（已归一化的）轨道的方块数组 (n, 2)"""
+    via = None
+    if spec["xm"] is not None and spec["ym"] is not None:
+        via = (float(spec["xm"]), float(spec["ym"]))
+    _, _, blocks = compute_track(
+        (float(spec["x0"]), float(spec["y0"])),
+        (float(spec["x1"]), float(spec["y1"])),
+        spec["k1"], spec["k2"],
+        spec["track_width"],
+        3.0 if spec["use_line"] else float(spec["curvature"]),
+        via=via,
+        k_via=spec["k_mid"] if via else None,
+        use_line=spec["use_line"],
+        sampling=sampling,
+    )
+    return blocks
+
+def _track_blocks_chunk(specs, sampling):
+    return [track_blocks(spec, sampling) for spec in specs]
+
+def batch_track_blocks(specs, workers=None, sampling="uniform", order="chunk", output_file=None, ground_height=0):
+    """
+    一次计算多条轨道，不绘图。
+    返回 (blocks, track_ids)：blocks 为合并去重后的 (n, 2) 方块数组，
+    track_ids 为每个方块所属轨道的序号（多条轨道重叠时取序号最小者）。
+    workers 大于 1 时使用进程池并行计算；order 为输出排序方式（见 sort_blocks）。
+    给出 output_file 时按 "x y z" 格式写出坐标文件。
+    """
+    specs = normalize_specs(specs)
+    if not specs:
+        return np.zeros((0, 2), dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+    if workers and workers > 1 and len(specs) > 1:
+        # 按进程数分组提交，减少进程间传输次数
+        size = math.ceil(len(specs) / workers)
+        groups = [specs[i:i + size] for i in range(0, len(specs), size)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = [blocks
+                       for chunk in pool.map(_track_blocks_chunk, groups, [sampling] * len(groups))
+                       for blocks in chunk]
+    else:
+        results = _track_blocks_chunk(specs, sampling)
+
+    all_blocks = np.concatenate(results)
+    all_ids = np.repeat(np.arange(len(results)), [len(b) for b in results])
+
+    # np.unique 返回每个方块第一次出现的位置，即序号最小的轨道
+    blocks, first = np.unique(all_blocks, axis=0, return_index=True)
+    track_ids = all_ids[first]
+
+    idx = block_order(blocks, order)
+    blocks, track_ids = blocks[idx], track_ids[idx]
+
+    if output_file:
+        with open(output_file, "w") as f:
+            for (x, z) in blocks.tolist():
+                f.write(f"{x} {ground_height} {z}\n")
+
+    return blocks, track_ids
@@ -0,0 +1,152 @@
+import numpy as np
+
+def _as_spans(spans) -> np.ndarray:
+    """转为 (n, 4) int64 数组，并去掉 x_start > x_end 的空区间"""
+    arr = np.asarray(spans, dtype=np.int64).reshape(-1, 4)
+    return arr[arr[:, 2] <= arr[:, 3]]
+
+def normalize_spans(spans) -> np.ndarray:
+    """
+    规范化行区间：按 (y, z, x_start) 排序，同一行内重叠或相邻的区间合并为一段。
+    合并用累积最大值一次完成：某区间的起点超过此前同行区间终点的最大值 + 1 时开始新的一段。
+    """
+    arr = _as_spans(spans)
+    if len(arr) == 0:
+        return arr
+    arr = arr[np.lexsort((arr[:, 2], arr[:, 1], arr[:, 0]))]
+    new_row = np.ones(len(arr), dtype=bool)
+    new_row[1:] = np.any(arr[1:, :2] != arr[:-1, :2], axis=1)
+
+    # 每行的累积最大终点：行首处重置
+    row_id = np.cumsum(new_row) - 1
+    reach = arr[:, 3].copy()
+    # 行号作为高位，使累积最大值不会跨行传播（坐标范围远小于 2³¹）
+    shifted = (row_id << 32) + (reach + (1 << 31))
+    reach = (np.maximum.accumulate(shifted) & ((1 << 32) - 1)) - (1 << 31)
+
+    start = new_row.copy()
+    start[1:] |= arr[1:, 2] > reach[:-1] + 1
+    first = np.flatnonzero(start)
+    out = arr[first].copy()
+    out[:, 3] = np.maximum.reduceat(arr[:, 3], first)
+    return out
+
+def _combine(a, b, keep):
+    """
+    两组规范化行区间的逐行布尔运算。把每个区间拆成 +1 / -1 两个事件，
+    按 (y, z, x) 排序后累加得到每段的覆盖状态，keep(in_a, in_b) 为真的段保留。
+    每行的事件总和为 0，因此可以对全部事件做一次全局累加。
+    """
+    events = []
+    for spans, col in ((a, 0), (b, 1)):
+        n = len(spans)
+        ev = np.zeros((2 * n, 5), dtype=np.int64)
+        ev[:n, :2] = spans[:, :2]
+        ev[:n, 2] = spans[:, 2]
+        ev[n:, :2] = spans[:, :2]
+        ev[n:, 2] = spans[:, 3] + 1
+        ev[:n, 3 + col] = 1
+        ev[n:, 3 + col] = -1
+        events.append(ev)
+    ev = np.concatenate(events)
+    if len(ev) == 0:
+        return np.zeros((0, 4), dtype=np.int64)
+    ev = ev[np.lexsort((ev[:, 2], ev[:, 1], ev[:, 0]))]
+    state = np.cumsum(ev[:, 3:], axis=0)
+
+    # 同一位置的多个事件只取最后的状态
+    last = np.ones(len(ev), dtype=bool)
+    last[:-1] = np.any(ev[1:, :3] != ev[:-1, :3], axis=1)
+    ev, state = ev[last], state[last]
+
+    # 区间 [x_i, x_{i+1}) 的状态即事件 i 之后的状态；行末之后状态必为 0，不会跨行
+    ok = keep(state[:-1, 0] > 0, state[:-1, 1] > 0)
+    out = np.column_stack((ev[:-1, 0], ev[:-1, 1], ev[:-1, 2], ev[1:, 2] - 1))[ok]
+    return normalize_spans(out)
+
+def _spans_of(other) -> np.ndarray:
+    """SpanSet 直接取其数组，其他行区间数组先规范化"""
+    return other.spans if isinstance(other, SpanSet) else normalize_spans(other)
+
+class SpanSet:
+    """
+    以行区间（y, z, x_start, x_end）表示的方块集合，底层为 (n, 4) int64 数组。
+    同一行内连续的方块只占一条记录，实心图形与宽轨道比逐点列表小几个数量级；
+    写入世界时由 region_input.fill_spans 按区块整块赋值。
+    """
+    def __init__(self, spans=None):
+        self.spans = normalize_spans(np.zeros((0, 4)) if spans is None else spans)
+
+    def __array__(self, dtype=None, copy=None):
+        return self.spans if dtype is None else self.spans.astype(dtype)
+
+    def __len__(self):
+        """区间条数"""
+        return len(self.spans)
+
+    def __repr__(self):
+        return f"SpanSet({len(self.spans)} 个区间, {self.block_count()} 个方块)"
+
+    def __eq__(self, other):
+        return isinstance(other, SpanSet) and np.array_equal(self.spans, other.spans)
+
+    @classmethod
+    def from_points(cls, xyz):
+        """由 (n, 3) 整数 xyz 坐标构造，重复坐标只计一次"""
+        xyz = np.asarray(xyz, dtype=np.int64).reshape(-1, 3)
+        return cls(np.column_stack((xyz[:, 1], xyz[:, 2], xyz[:, 0], xyz[:, 0])))
+
+    @classmethod
+    def from_pixels(cls, xz, height=0):
+        """由 (n, 2) 平面像素 (x, z) 构造，全部放在 height 高度"""
+        xz = np.asarray(xz, dtype=np.int64).reshape(-1, 2)
+        y = np.full(len(xz), int(height), dtype=np.int64)
+        return cls(np.column_stack((y, xz[:, 1], xz[:, 0], xz[:, 0])))
+
+    def block_count(self) -> int:
+        """覆盖的方块数"""
+        return int((self.spans[:, 3] - self.spans[:, 2] + 1).sum())
+
+    def to_points(self) -> np.ndarray:
+        """展开为 (n, 3) 整数 xyz 数组，按 (y, z, x) 排列"""
+        y, z, x0, x1 = self.spans.T
+        lengths = x1 - x0 + 1
+        starts = np.cumsum(lengths) - lengths
+        x = np.arange(lengths.sum()) - np.repeat(starts - x0, lengths)
+        return np.column_stack((x, np.repeat(y, lengths), np.repeat(z, lengths)))
+
+    def bounds(self):
+        """包围盒 ((xmin, ymin, zmin), (xmax, ymax, zmax))，空集合时为 None"""
+        if len(self.spans) == 0:
+            return None
+        s = self.spans
+        return ((int(s[:, 2].min()), int(s[:, 0].min()), int(s[:, 1].min())),
+                (int(s[:, 3].max()), int(s[:, 0].max()), int(s[:, 1].max())))
+
+    def translate(self, dx=0, dy=0, dz=0):
+        """平移后的新集合"""
+        out = SpanSet()
+        out.spans = self.spans + np.array([dy, dz, dx, dx], dtype=np.int64)
+        return out
+
+    def union(self, other):
+        """并集"""
+        out = SpanSet()
+        out.spans = normalize_spans(np.concatenate((self.spans, _spans_of(other))))
+        return out
+
+    def difference(self, other):
+        """差集：属于本集合但不属于 other 的方块"""
+        out = SpanSet()
+        out.spans = _combine(self.spans, _spans_of(other), lambda a, b: a & ~b)
+        return out
+
+    def intersection(self, other):
+        """交集"""
+        out = SpanSet()
+        out.spans = _combine(self.spans, _spans_of(other), lambda a, b: a & b)
+        return out
+
+    __or__ = union
+    __sub__ = difference
+    __and__ = intersection
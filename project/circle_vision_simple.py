@@ -1,32 +1,45 @@
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+from matplotlib.collections import PolyCollection
 import numpy as np
 import io
 from PIL import Image
 import zhplot
 
+def circle_octant(r):
+    """
+    整数半径 r 的中点圆算法在第一八分圆（x >= y >= 0）上的像素，
+    返回 (xs, ys) 两个整数数组，y 从 0 递增。
+    中点算法在第 y 行取的 x 恰为满足 x(x-1) < r² - y² 的最大整数，
+    因此可以对所有行一次性求出，无需逐点迭代。
+    """
+    if r <= 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    ys = np.arange(int(r / np.sqrt(2)) + 2, dtype=np.int64)
+    k = r * r - ys * ys
+    xs = np.floor((1 + np.sqrt(np.maximum(4 * k - 3, 0))) / 2).astype(np.int64)
+    # 浮点开方可能差 1，用整数条件校正
+    xs = np.where(xs * (xs - 1) >= k, xs - 1, xs)
+    xs = np.where((xs + 1) * xs < k, xs + 1, xs)
+    keep = xs >= ys
+    return xs[keep], ys[keep]
+
+def runs_of(values):
+    """相邻相等元素的游程长度列表"""
+    values = np.asarray(values)
+    if len(values) == 0:
+        return []
+    breaks = np.flatnonzero(np.diff(values) != 0) + 1
+    edges = np.concatenate(([0], breaks, [len(values)]))
+    return np.diff(edges).tolist()
+
 def generate_circle_segments(r):
     """
     生成整数半径 r 对应的圆周离散化后在第一象限上的“线段组”长度序列。
     """
     if r == 0:
         return []
-    x = r
-    y = 0
-    d = 1 - r
-    segments = []
-    current_segment = 0
-    while x >= y:
-        current_segment += 1
-        if d < 0:
-            d += 2 * y + 3
-        else:
-            d += 2 * (y - x) + 5
-            segments.append(current_segment)
-            current_segment = 0
-            x -= 1
-        y += 1
-    if current_segment > 0:
-        segments.append(current_segment)
+    xs, _ = circle_octant(r)
+    segments = runs_of(xs)
     mirrored = segments[::-1]
     full_segments = segments + mirrored
     return full_segments
@@ -36,41 +49,137 @@ def generate_quarter_circle_points(r):
     生成整数半径 r 对应的第一象限扇形（x>=0,y>=0）上
     所有离散化后的圆周坐标 (x,y) 列表。
     """
-    points = []
-    if r == 0:
-        return points
+    xs, ys = circle_octant(r)
+    return list(zip(xs.tolist(), ys.tolist()))
 
-    x = r
-    y = 0
-    d = 1 - r
+# 八分圆的 8 种对称变换：(交换 x/y, x 符号, y 符号)
+_OCTANT_SYMMETRY = [(False, 1, 1), (True, 1, 1), (True, -1, 1), (False, -1, 1),
+                    (False, -1, -1), (True, -1, -1), (True, 1, -1), (False, 1, -1)]
 
-    while x >= y:
-        points.append((x, y))
-        if d < 0:
-            d += 2 * y + 3
-        else:
-            d += 2 * (y - x) + 5
-            x -= 1
-        y += 1
+def path_runs(points):
+    """
+    按顺序排列的 8 连通像素路径上的“线段组”长度：遇到斜向一步即开始新的一段。
+    """
+    pts = np.asarray(points, dtype=np.int64).reshape(-1, 2)
+    if len(pts) == 0:
+        return []
+    steps = np.abs(np.diff(pts, axis=0))
+    diagonal = (steps[:, 0] != 0) & (steps[:, 1] != 0)
+    return runs_of(np.concatenate(([0], np.cumsum(diagonal))))
 
-    return points
+def generate_circle(r, start_angle=0.0, end_angle=360.0):
+    """
+    整数半径 r 的像素圆（或圆弧），只计算一次八分圆，再用对称变换得到其余部分。
+    start_angle / end_angle 为角度（度，逆时针，x 轴正方向为 0），默认整圆。
+    返回 (points, segments)：
+      points   —— (n, 2) 整数数组，按角度逆时针排列、无重复，圆心在原点；
+      segments —— 沿 points 顺序的“线段组”长度列表（见 path_runs）。
+    """
+    xs, ys = circle_octant(r)
+    if len(xs) == 0:
+        return np.zeros((0, 2), dtype=np.int64), []
+    parts = []
+    for swap, sx, sy in _OCTANT_SYMMETRY:
+        a, b = (ys, xs) if swap else (xs, ys)
+        parts.append(np.column_stack((sx * a, sy * b)))
+    pts = np.unique(np.concatenate(parts), axis=0)
 
-def draw_quarter_circle_image(r):
+    angles = (np.degrees(np.arctan2(pts[:, 1], pts[:, 0])) - start_angle) % 360.0
+    full = end_angle - start_angle >= 360.0
+    if not full:
+        keep = angles <= (end_angle - start_angle) % 360.0
+        pts, angles = pts[keep], angles[keep]
+    pts = pts[np.argsort(angles, kind="stable")]
+
+    segments = path_runs(pts)
+    if full and len(segments) > 1:
+        # 整圆首尾相接：若最后一步不是斜向，首尾两段实为同一段
+        step = np.abs(pts[0] - pts[-1])
+        if not (step[0] and step[1]):
+            segments = [segments[-1] + segments[0]] + segments[1:-1]
+    return pts, segments
+
+def circle_blocks(r, center=(0, 0), height=0, start_angle=0.0, end_angle=360.0):
+    """
+    以 center=(x, z) 为圆心、位于 height 高度的像素圆（弧）方块，返回 (n, 3) 整数 xyz 数组，
+    可直接交给 file_fill.place_blocks 写入世界，或用 write_coords_file 保存。
+    """
+    pts, _ = generate_circle(r, start_angle, end_angle)
+    cx, cz = center
+    return np.column_stack((pts[:, 0] + int(cx), np.full(len(pts), int(height)), pts[:, 1] + int(cz)))
+
+def coords_text(xyz) -> str:
+    """坐标文件内容：每个方块一行 "x y z" """
+    return "".join(f"{x} {y} {z}\n" for x, y, z in np.asarray(xyz, dtype=np.int64).reshape(-1, 3).tolist())
+
+def write_coords_file(path, xyz):
+    """按每行 "x y z" 的坐标文件格式保存方块"""
+    with open(path, "w") as f:
+        f.write(coords_text(xyz))
+
+# 像素圆示意图的限制
+MAX_RADIUS = 100000      # 允许的最大半径
+PIXEL_BUDGET = 1000      # 占用栅格每边最多的像素数，超过则按块降采样
+PATCH_RADIUS = 300       # 不超过该半径时逐格描边，更大时只画栅格图
+MAX_LABELS = 60          # 图上最多标注的线段组数量
+RASTER_FIGSIZE = 12      # 栅格图模式的画布尺寸（英寸）
+
+def quarter_occupancy(r, budget=PIXEL_BUDGET):
+    """
+    第一象限像素圆的占用栅格：返回 (image, factor)。
+    image[y, x] 为 True 表示该格（降采样后为 factor×factor 的块）内有圆周方块。
+    """
+    xs, ys = circle_octant(r)
+    factor = max(1, -(-(r + 1) // budget))
+    side = r // factor + 1
+    image = np.zeros((side, side), dtype=bool)
+    image[ys // factor, xs // factor] = True
+    image[xs // factor, ys // factor] = True
+    return image, factor
+
+def segment_label_positions(r, segments, max_labels=MAX_LABELS):
+    """
+    线段组标注位置（沿第一八分圆轮廓），返回 (mid_x, mid_y, 长度) 三个数组。
+    标注数量超过 max_labels 时等间隔抽取，避免文字重叠。
+    """
+    xs, ys = circle_octant(r)
+    lengths = np.asarray(segments, dtype=np.int64)
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    keep = starts < len(xs)
+    lengths, starts = lengths[keep], starts[keep]
+    ends = np.minimum(starts + lengths - 1, len(xs) - 1)
+    if len(lengths) > max_labels:
+        # 沿轮廓等距抽取，而不是按段号等距（45° 附近短段很密）
+        targets = np.linspace(0, len(xs) - 1, max_labels)
+        pick = np.unique(np.minimum(np.searchsorted(starts, targets), len(starts) - 1))
+        lengths, starts, ends = lengths[pick], starts[pick], ends[pick]
+    mid_x = (xs[starts] + xs[ends]) / 2
+    mid_y = (ys[starts] + ys[ends]) / 2
+    return mid_x, mid_y, lengths
+
+def draw_quarter_circle_image(r, segments=None):
     """
     根据半径 r，绘制一张“1/4 直角圆”的像素化示意图，并在图上标注每段
     的长度（线段组长度）。返回一个 PIL.Image.Image 对象（用于 Gradio 显示），
     以及一段文字说明（线段组的信息）。
+    圆周以占用栅格一次性绘制，像素数有上限；标注按数量抽取，
+    因此数万格的半径也能快速出图。
+    segments 可传入预先算好的线段组序列（如 segment_table 的缓存结果）。
     """
-    if r > 999:
-        return None, "错误：半径过大，建议不超过 999。"
-    if r <= 0:
+    if r > MAX_RADIUS:
+        return None, f"错误：半径过大，建议不超过 {MAX_RADIUS}。"
+    if r <= 0 or r != int(r):
         return None, "错误：请输入正整数半径。"
-    
-    quarter_points = generate_quarter_circle_points(r)
-    segments = generate_circle_segments(r)
+    r = int(r)
+
+    if segments is None:
+        segments = generate_circle_segments(r)
+    image, factor = quarter_occupancy(r)
 
     # 整体画布设置
-    fig, ax = plt.subplots(figsize=(min(20, r + 2), min(20, r + 2)))
+    size = min(20, r + 2) if r <= PATCH_RADIUS else RASTER_FIGSIZE
+    fig = Figure(figsize=(size, size))
+    ax = fig.add_subplot()
     ax.set_xlim(-0.5, r + 0.5)
     ax.set_ylim(-0.5, r + 0.5)
     # 只在重要刻度上画网格，避免过密
@@ -82,36 +191,33 @@ def draw_quarter_circle_image(r):
     ax.set_title(f'1/4 直角圆（半径={r}）', fontsize=16)
 
     # 把第一象限的 (x,y) 和 (y,x) 都画上，构成完整的扇形
-    all_points = set()
-    for x, y in quarter_points:
-        all_points.add((x, y))
-        all_points.add((y, x))
-
-    for x, y in all_points:
-        rect = plt.Rectangle((x - 0.5, y - 0.5), 1, 1,
-                             edgecolor='blue', facecolor='lightblue')
-        ax.add_patch(rect)
+    edges = np.arange(image.shape[0] + 1) * factor - 0.5
+    if r <= PATCH_RADIUS:
+        # 所有方块合成一个 PolyCollection，只产生一个绘图对象
+        ys, xs = np.nonzero(image)
+        corners = np.array([(-0.5, -0.5), (0.5, -0.5), (0.5, 0.5), (-0.5, 0.5)])
+        verts = np.column_stack((xs, ys))[:, None, :] + corners[None, :, :]
+        ax.add_collection(PolyCollection(verts, edgecolors='blue', facecolors='lightblue'))
+    else:
+        # 直接给出 RGBA 栅格，空格透明，省去颜色映射与掩码处理
+        rgba = np.zeros(image.shape + (4,), dtype=np.uint8)
+        rgba[image] = (0, 0, 255, 255)
+        ax.imshow(rgba, origin='lower', extent=(edges[0], edges[-1], edges[0], edges[-1]),
+                  interpolation='nearest')
 
     # 动态字体：r 越大，字体越小；但不小于 16
     font_size = max(16, 3000 // r)
 
     # 标注“线段组”编号（实际上只在第一象限轮廓上标记）
-    start_idx = 0
-    for seg_length in segments:
-        if start_idx >= len(quarter_points):
-            break
-        end_idx = min(start_idx + seg_length - 1, len(quarter_points) - 1)
-        mid_x = (quarter_points[start_idx][0] + quarter_points[end_idx][0]) / 2
-        mid_y = (quarter_points[start_idx][1] + quarter_points[end_idx][1]) / 2
+    for mid_x, mid_y, seg_length in zip(*segment_label_positions(r, segments)):
         ax.text(mid_x - 1, mid_y - 0.3, str(seg_length),
                 ha='center', va='center', color='red', fontsize=font_size)
-        start_idx = end_idx + 1
 
     # 把图存到内存 buffer，再由 PIL 读取，以便 Gradio 直接显示
     buf = io.BytesIO()
-    plt.tight_layout()
-    plt.savefig(buf, format='png')
-    plt.close(fig)
+    fig.tight_layout()
+    fig.savefig(buf, format='png')
+    fig.clear()  # 立即释放坐标轴与图元，不等垃圾回收
     buf.seek(0)
     image = Image.open(buf)
 
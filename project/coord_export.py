@@ -0,0 +1,120 @@
+import struct
+import zlib
+import numpy as np
+
+from chunk_order import block_order
+
+try:
+    import zstandard
+except ImportError:  # zstd 为可选依赖，未安装时不提供 .zst 格式
+    zstandard = None
+
+# 二进制坐标格式：头部 = 魔数 + 版本号 + 方块数 (uint64)；
+# 之后每个方块 3 个 int32（x y z，小端），按区块顺序排列
+MAGIC = b"SMCT-XYZ"
+FORMAT_VERSION = 1
+HEADER = MAGIC + struct.pack("<H", FORMAT_VERSION)
+COUNT = struct.Struct("<Q")
+RECORD_DTYPE = np.dtype("<i4")
+
+STREAM_BATCH = 65536  # 流式导出时每批处理的方块数
+
+# 导出格式：扩展名 -> (内容, 压缩方式, MIME 类型)
+EXPORT_FORMATS = {
+    "txt": ("text", None, "text/plain"),
+    "txt.gz": ("text", "gzip", "application/gzip"),
+    "txt.zst": ("text", "zstd", "application/zstd"),
+    "bin": ("binary", None, "application/octet-stream"),
+    "bin.gz": ("binary", "gzip", "application/gzip"),
+}
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+def available_formats():
+    """当前环境可用的导出格式（未安装 zstandard 时不含 .zst）"""
+    return [fmt for fmt, (_, codec, _) in EXPORT_FORMATS.items()
+            if codec != "zstd" or zstandard is not None]
+
+def chunk_sorted(xyz) -> np.ndarray:
+    """(n, 3) 整数 xyz 坐标按区块顺序排列（同 sort_blocks 的 "chunk"）"""
+    xyz = np.asarray(xyz, dtype=np.int64).reshape(-1, 3)
+    return xyz[block_order(xyz[:, [0, 2]], "chunk")]
+
+def to_binary(xyz) -> bytes:
+    """编码为二进制坐标格式；相同的方块集合总是得到相同的字节串"""
+    xyz = chunk_sorted(xyz)
+    return HEADER + COUNT.pack(len(xyz)) + xyz.astype(RECORD_DTYPE).tobytes()
+
+def from_binary(data) -> np.ndarray:
+    """解码二进制坐标格式，返回 (n, 3) int64 数组"""
+    if not data.startswith(HEADER):
+        raise ValueError("不是有效的二进制坐标文件")
+    (n,) = COUNT.unpack_from(data, len(HEADER))
+    start = len(HEADER) + COUNT.size
+    return np.frombuffer(data, RECORD_DTYPE, 3 * n, start).reshape(-1, 3).astype(np.int64)
+
+def _raw_batches(xyz, content):
+    """未压缩的导出内容，每批 STREAM_BATCH 个方块"""
+    if content == "binary":
+        yield HEADER + COUNT.pack(len(xyz))
+    for i in range(0, len(xyz), STREAM_BATCH):
+        batch = xyz[i:i + STREAM_BATCH]
+        if content == "binary":
+            yield batch.astype(RECORD_DTYPE).tobytes()
+        else:
+            yield "".join(f"{x} {y} {z}\n" for x, y, z in batch.tolist()).encode("ascii")
+
+def iter_export(xyz, fmt="txt"):
+    """
+    按 fmt 格式逐批生成导出文件的字节块，不在内存中拼出整个文件。
+    xyz 会先按区块顺序排列，因此同一组方块的导出内容总是相同，可由内容哈希命名。
+    gzip 头中不写时间戳，同样保证输出稳定。
+    """
+    if fmt not in available_formats():
+        raise ValueError(f"不支持的导出格式：{fmt}")
+    content, codec, _ = EXPORT_FORMATS[fmt]
+    batches = _raw_batches(chunk_sorted(xyz), content)
+    if codec is None:
+        yield from batches
+        return
+    if codec == "gzip":
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31：gzip 封装
+    else:
+        compressor = zstandard.ZstdCompressor().compressobj()
+    for batch in batches:
+        out = compressor.compress(batch)
+        if out:
+            yield out
+    yield compressor.flush()
+
+def write_export(path, xyz, fmt="txt"):
+    """把 xyz 坐标按 fmt 格式写入 path"""
+    with open(path, "wb") as f:
+        for block in iter_export(xyz, fmt):
+            f.write(block)
+    return path
+
+def parse_coords_text(text) -> np.ndarray:
+    """解析 "x y z" 坐标文本，忽略不是 3 个字段的行；高度等可以带小数（取整数部分）"""
+    rows = [parts for parts in (line.split() for line in text.splitlines()) if len(parts) == 3]
+    if not rows:
+        return np.zeros((0, 3), dtype=np.int64)
+    return np.array(rows, dtype=np.float64).astype(np.int64)
+
+def read_coords(path) -> np.ndarray:
+    """
+    读取任意导出格式的坐标文件（按文件头识别 gzip / zstd 压缩与二进制格式），
+    返回 (n, 3) int64 数组。
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    if data.startswith(GZIP_MAGIC):
+        data = zlib.decompress(data, 47)  # wbits=47：自动识别 gzip / zlib 头
+    elif data.startswith(ZSTD_MAGIC):
+        if zstandard is None:
+            raise ValueError("读取 .zst 文件需要安装 zstandard")
+        data = zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    if data.startswith(HEADER):
+        return from_binary(data)
+    return parse_coords_text(data.decode("utf-8"))
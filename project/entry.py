@@ -1,8 +1,76 @@
-from combined_demo import demo
+import sys
+import time
+
+STARTUP_BEGIN = time.perf_counter()
+
+import builtins
+import os
+
+# 启动耗时报告：运行时加参数 --startup-report，或设置环境变量 SMCT_STARTUP_REPORT=1
+STARTUP_REPORT = "--startup-report" in sys.argv or bool(os.environ.get("SMCT_STARTUP_REPORT"))
+REPORT_MIN_SECONDS = 0.01  # 报告中只列出耗时不少于该值的导入
+# 每次生成的分阶段耗时日志（见 stage_timer），设置 SMCT_TIMING_LOG=0 关闭
+TIMING_LOG = os.environ.get("SMCT_TIMING_LOG", "1") != "0"
+
+class ImportTimer:
+    """
+    统计启动阶段每个顶层包首次导入的耗时。
+    临时替换 builtins.__import__，耗时包含该包导入的依赖，因此各项之间会有重叠。
+    """
+    def __init__(self):
+        self.times = {}
+        self.original = builtins.__import__
+
+    def __enter__(self):
+        builtins.__import__ = self._import
+        return self
+
+    def __exit__(self, *exc):
+        builtins.__import__ = self.original
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        top = name.partition(".")[0]
+        if level or top in sys.modules or top in self.times:
+            return self.original(name, globals, locals, fromlist, level)
+        self.times[top] = None  # 先占位，包内部的相对导入不重复计时
+        start = time.perf_counter()
+        try:
+            return self.original(name, globals, locals, fromlist, level)
+        finally:
+            self.times[top] = time.perf_counter() - start
+
+def print_startup_report(phases, import_times):
+    """在控制台打印各启动阶段与各包导入的耗时"""
+    print("\n=== 启动耗时 ===")
+    for name, seconds in phases:
+        print(f"{seconds:8.3f} s  {name}")
+    print("--- 导入耗时（含依赖）---")
+    for name, seconds in sorted(import_times.items(), key=lambda kv: -(kv[1] or 0)):
+        if seconds and seconds >= REPORT_MIN_SECONDS:
+            print(f"{seconds:8.3f} s  {name}")
+    print()
 
 if __name__ == "__main__":
+    if TIMING_LOG:
+        from stage_timer import enable_logging
+        enable_logging()
+
+    with ImportTimer() as timer:
+        start = time.perf_counter()
+        from combined_demo import demo
+        phases = [("导入界面（gradio 与 combined_demo）", time.perf_counter() - start)]
+
+    start = time.perf_counter()
     demo.launch(
         server_name="127.0.0.1",
         server_port=7860,
-        inbrowser=True
-    )
\ No newline at end of file
+        inbrowser=True,
+        prevent_thread_lock=True
+    )
+    phases.append(("启动服务器并打开浏览器", time.perf_counter() - start))
+    phases.append(("合计", time.perf_counter() - STARTUP_BEGIN))
+
+    print(f"✅ 启动完成，用时 {time.perf_counter() - STARTUP_BEGIN:.1f} 秒")
+    if STARTUP_REPORT:
+        print_startup_report(phases, timer.times)
+    demo.block_thread()
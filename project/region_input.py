@@ -1,8 +1,154 @@
+import numpy as np
 import amulet
 from amulet.api.block import Block
-from amulet.utils.world_utils import block_coords_to_chunk_coords
 from amulet_nbt import StringTag
 
+def _clear_block_entities(chunk, inside):
+    """删除区块中满足 inside(x, y, z) 的旧方块实体"""
+    if len(chunk.block_entities):
+        for key in [k for k in chunk.block_entities.keys() if inside(*k)]:
+            del chunk.block_entities[key]
+
+def fill_box(level, coord_min, coord_max, block_id, block_entity=None, dimension="minecraft:overworld") -> int:
+    """
+    按区块切片填充长方体（坐标均含端点），每个区块只做一次切片赋值。
+    返回填充的方块数。
+    """
+    xmin, ymin, zmin = coord_min
+    xmax, ymax, zmax = coord_max
+    for cx in range(xmin // 16, xmax // 16 + 1):
+        for cz in range(zmin // 16, zmax // 16 + 1):
+            x0, x1 = max(xmin, cx * 16), min(xmax, cx * 16 + 15)
+            z0, z1 = max(zmin, cz * 16), min(zmax, cz * 16 + 15)
+            chunk = level.get_chunk(cx, cz, dimension)
+            chunk.blocks[x0 - cx * 16:x1 - cx * 16 + 1,
+                         ymin:ymax + 1,
+                         z0 - cz * 16:z1 - cz * 16 + 1] = block_id
+
+            if block_entity is not None:
+                for x in range(x0, x1 + 1):
+                    for y in range(ymin, ymax + 1):
+                        for z in range(z0, z1 + 1):
+                            chunk.block_entities[(x, y, z)] = block_entity
+            else:
+                _clear_block_entities(
+                    chunk,
+                    lambda x, y, z: x0 <= x <= x1 and ymin <= y <= ymax and z0 <= z <= z1)
+
+            chunk.changed = True
+    return (xmax - xmin + 1) * (ymax - ymin + 1) * (zmax - zmin + 1)
+
+def fill_columns(level, columns, block_id, dimension="minecraft:overworld") -> int:
+    """
+    批量填充竖直方块柱。columns: (n, 4) 整数数组，每行 x z y_start y_end（含端点，
+    y_start > y_end 的行视为空）。按区块、子区块分组，每个子区块一次向量化赋值。
+    写入位置上的旧方块实体会被清除。返回填充的方块数。
+    """
+    cols = np.asarray(columns, dtype=np.int64).reshape(-1, 4)
+    cols = cols[cols[:, 2] <= cols[:, 3]]
+    if len(cols) == 0:
+        return 0
+    cx, lx = np.divmod(cols[:, 0], 16)
+    cz, lz = np.divmod(cols[:, 1], 16)
+    y0, y1 = cols[:, 2], cols[:, 3]
+
+    order = np.lexsort((cz, cx))
+    keys = np.column_stack((cx, cz))[order]
+    bounds = np.flatnonzero(np.any(np.diff(keys, axis=0) != 0, axis=1)) + 1
+    ly = np.arange(16)
+    for idx in np.split(order, bounds):
+        chunk = level.get_chunk(int(cx[idx[0]]), int(cz[idx[0]]), dimension)
+        for sy in range(int(y0[idx].min()) // 16, int(y1[idx].max()) // 16 + 1):
+            ys = sy * 16 + ly
+            mask = (ys[None, :] >= y0[idx, None]) & (ys[None, :] <= y1[idx, None])
+            rows, dys = np.nonzero(mask)
+            if len(rows):
+                chunk.blocks.get_section(sy)[lx[idx][rows], dys, lz[idx][rows]] = block_id
+
+        ranges = {(int(x), int(z)): (int(a), int(b)) for x, z, a, b in cols[idx].tolist()}
+        _clear_block_entities(
+            chunk,
+            lambda x, y, z: (x, z) in ranges and ranges[(x, z)][0] <= y <= ranges[(x, z)][1])
+        chunk.changed = True
+    return int((y1 - y0 + 1).sum())
+
+def split_spans_by_chunk(spans) -> np.ndarray:
+    """
+    把横跨多个区块的行区间在区块边界处切开，返回新的 (n, 4) 数组 y z x_start x_end，
+    切开后每个区间都落在同一区块内。
+    """
+    spans = np.asarray(spans, dtype=np.int64).reshape(-1, 4)
+    spans = spans[spans[:, 2] <= spans[:, 3]]
+    first = spans[:, 2] // 16
+    counts = spans[:, 3] // 16 - first + 1
+    out = np.repeat(spans, counts, axis=0)
+    cx = np.repeat(first, counts) + np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    out[:, 2] = np.maximum(out[:, 2], cx * 16)
+    out[:, 3] = np.minimum(out[:, 3], cx * 16 + 15)
+    return out
+
+def fill_spans(level, spans, block_id, block_entity=None, dimension="minecraft:overworld") -> int:
+    """
+    按行区间批量填充方块。spans: block_spans.SpanSet，或 (n, 4) 整数数组，
+    每行 y z x_start x_end（含端点）。
+    区间先在区块边界处切开，再按 (区块, 子区块) 分组：每组用差分数组沿 x 累加
+    得到 16×16×16 的写入掩码，整块一次赋值。重叠的区间只写一次。
+    返回写入的方块数。
+    """
+    spans = split_spans_by_chunk(spans)
+    if len(spans) == 0:
+        return 0
+    y, z, x0, x1 = spans.T
+    cx, lx0 = np.divmod(x0, 16)
+    lx1 = x1 - cx * 16
+    cz, lz = np.divmod(z, 16)
+    sy, ly = np.divmod(y, 16)
+
+    order = np.lexsort((sy, cz, cx))
+    keys = np.column_stack((cx, cz, sy))[order]
+    bounds = np.flatnonzero(np.any(np.diff(keys, axis=0) != 0, axis=1)) + 1
+    starts = np.concatenate(([0], bounds))
+    ends = np.concatenate((bounds, [len(order)]))
+
+    count = 0
+    chunk = None
+    chunk_key = None
+    masks = {}
+    for start, end in zip(starts, ends):
+        kx, kz, ky = keys[start].tolist()
+        idx = order[start:end]
+        if (kx, kz) != chunk_key:
+            if chunk is not None:
+                _finish_span_chunk(chunk, chunk_key, masks, block_entity)
+            chunk = level.get_chunk(kx, kz, dimension)
+            chunk_key = (kx, kz)
+            masks = {}
+
+        # 区间起点 +1、终点后一格 -1，沿 x 累加后大于 0 的位置即被覆盖
+        diff = np.zeros((17, 16, 16), dtype=np.int32)
+        np.add.at(diff, (lx0[idx], ly[idx], lz[idx]), 1)
+        np.add.at(diff, (lx1[idx] + 1, ly[idx], lz[idx]), -1)
+        mask = np.cumsum(diff, axis=0)[:16] > 0
+        chunk.blocks.get_section(ky)[mask] = block_id
+        masks[ky] = mask
+        count += int(mask.sum())
+    _finish_span_chunk(chunk, chunk_key, masks, block_entity)
+    return count
+
+def _finish_span_chunk(chunk, chunk_key, masks, block_entity):
+    """fill_spans 写完一个区块后处理方块实体并标记修改"""
+    kx, kz = chunk_key
+    if block_entity is not None:
+        for ky, mask in masks.items():
+            for lx, ly, lz in np.argwhere(mask).tolist():
+                chunk.block_entities[(kx * 16 + lx, ky * 16 + ly, kz * 16 + lz)] = block_entity
+    else:
+        def inside(x, y, z):
+            mask = masks.get(y // 16)
+            return mask is not None and bool(mask[x - kx * 16, y % 16, z - kz * 16])
+        _clear_block_entities(chunk, inside)
+    chunk.changed = True
+
 def fill_region(
     world_path: str,
     coord1: tuple[int, int, int],
@@ -43,25 +189,8 @@ def fill_region(
     ymin, ymax = sorted([y1, y2])
     zmin, zmax = sorted([z1, z2])
 
-    # === 遍历填充区域 ===
-    count = 0
-    for x in range(xmin, xmax + 1):
-        for y in range(ymin, ymax + 1):
-            for z in range(zmin, zmax + 1):
-                cx, cz = block_coords_to_chunk_coords(x, z)
-                chunk = level.get_chunk(cx, cz, dimension)
-                offset_x, offset_z = x - 16 * cx, z - 16 * cz
-
-                chunk.blocks[offset_x, y, offset_z] = block_id
-
-                if block_entity is not None:
-                    chunk.block_entities[(x, y, z)] = block_entity
-                else:
-                    if (x, y, z) in chunk.block_entities:
-                        del chunk.block_entities[(x, y, z)]
-
-                chunk.changed = True
-                count += 1
+    # === 按区块切片填充 ===
+    count = fill_box(level, (xmin, ymin, zmin), (xmax, ymax, zmax), block_id, block_entity, dimension)
 
     level.save()
     level.close()
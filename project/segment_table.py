@@ -0,0 +1,213 @@
+import argparse
+import os
+import struct
+import sys
+import threading
+from contextlib import contextmanager
+import numpy as np
+
+from circle_vision_simple import MAX_RADIUS, circle_octant, runs_of
+
+if sys.platform == "win32":
+    import msvcrt
+else:
+    import fcntl
+
+# 文件格式：头部 = 魔数 + 版本号；之后每条记录 = (半径 r, 段数 n) + n 个 uint16 八分圆段长
+MAGIC = b"SMCT-SEG"
+FORMAT_VERSION = 1
+HEADER = MAGIC + struct.pack("<H", FORMAT_VERSION)
+RECORD = struct.Struct("<II")
+
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".slim_mcbe_curve_tool", "circle_segments.bin")
+
+def octant_runs(r):
+    """半径 r 的第一八分圆线段组长度，uint16 数组（整条象限序列为其本身加倒序）"""
+    xs, _ = circle_octant(r)
+    return np.asarray(runs_of(xs), dtype=np.uint16)
+
+def parse_records(data, pos, runs):
+    """从 data[pos:] 读取完整的记录存入 runs，返回最后一条完整记录的末尾位置"""
+    while pos + RECORD.size <= len(data):
+        r, n = RECORD.unpack_from(data, pos)
+        end = pos + RECORD.size + 2 * n
+        if end > len(data):
+            break
+        runs[r] = np.frombuffer(data, "<u2", n, pos + RECORD.size)
+        pos = end
+    return pos
+
+@contextmanager
+def file_lock(path):
+    """跨进程的排他锁（锁住 path 这个锁文件），等待过久或文件不可用时抛出 OSError"""
+    with open(path, "a+b") as f:
+        if sys.platform == "win32":
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)  # 最多重试约 10 秒
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+class SegmentTable:
+    """
+    像素圆线段组序列的持久化缓存，按需计算并追加写入磁盘。
+    第一次使用时才读取文件；文件版本不符或损坏时忽略旧内容并重建，末尾不完整的记录会被丢弃。
+    多个进程可能共用同一个文件：追加记录时持有文件锁（path + ".lock"），
+    并先读入其他进程在本进程上次读取之后追加的记录，每次只读写新增的部分。
+    """
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self._runs = None  # {半径: 段长数组}，第一次使用时读取文件
+        self.pending = {}  # 已计算、尚未写入文件的记录（写入失败时留到下次再写）
+        self.size = 0  # 已读入的文件长度（最后一条完整记录的末尾），0 表示还没有有效的头部
+        self.lock = threading.Lock()
+
+    @property
+    def runs(self):
+        """全部已知记录 {半径: 段长数组}"""
+        with self.lock:
+            return self._loaded()
+
+    def _loaded(self):
+        """调用方持有 self.lock；第一次调用时读入文件（只读，不加文件锁）"""
+        if self._runs is None:
+            self._runs = {}
+            try:
+                with open(self.path, "rb") as f:
+                    data = f.read()
+            except OSError:
+                data = b""
+            # 其他进程可能正在追加：读到的不完整记录被丢弃，下次同步时从 self.size 处重新读取
+            if data.startswith(HEADER):
+                self.size = parse_records(data, len(HEADER), self._runs)
+        return self._runs
+
+    def _sync(self, f):
+        """
+        持有文件锁时调用：读入文件中 self.size 之后（其他进程追加）的记录。
+        文件为空、版本不符或损坏时重建为只含头部的文件；末尾不完整的记录是写入中途崩溃留下的，截掉。
+        """
+        f.seek(0, os.SEEK_END)
+        end = f.tell()
+        if end < self.size:  # 文件被删除或重建过：从头读取，文件中没有的记录重新写入
+            self.size = 0
+            self.pending.update(self._runs)
+        f.seek(self.size)
+        data = f.read()
+        pos = 0
+        if self.size == 0:
+            if not data.startswith(HEADER):
+                f.truncate(0)
+                f.write(HEADER)
+                self.pending.update(self._runs)  # 重建后的文件需要写入全部记录
+                self.size = len(HEADER)
+                return
+            pos = len(HEADER)
+        found = {}
+        self.size += parse_records(data, pos, found)
+        for r in found:
+            self.pending.pop(r, None)
+        self._runs.update(found)
+        if self.size < end:
+            f.truncate(self.size)
+
+    def _flush(self):
+        """把 self.pending 追加到文件末尾；文件不可用时保留在内存中，下次再写。调用方持有 self.lock"""
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with file_lock(self.path + ".lock"), open(self.path, "a+b") as f:
+                self._sync(f)
+                if self.pending:
+                    f.write(b"".join(RECORD.pack(r, len(runs)) + runs.astype("<u2").tobytes()
+                                     for r, runs in sorted(self.pending.items())))
+                    f.flush()
+                    self.size = f.tell()
+                    self.pending.clear()
+        except OSError:
+            pass
+
+    def octant(self, r):
+        """半径 r 的八分圆段长数组，缺失时计算并追加写入磁盘"""
+        r = int(r)
+        with self.lock:
+            runs = self._loaded().get(r)
+            if runs is None:
+                runs = octant_runs(r)
+                self._runs[r] = self.pending[r] = runs
+                self._flush()
+        return runs
+
+    def get(self, r):
+        """
+        与 generate_circle_segments(r) 相同的第一象限线段组列表。
+        r 超过 MAX_RADIUS 时抛出 ValueError，不计算也不写入文件；调用方应先检查半径。
+        """
+        if r <= 0:
+            return []
+        if r > MAX_RADIUS:
+            raise ValueError(f"半径过大，建议不超过 {MAX_RADIUS}。")
+        runs = self.octant(r).tolist()
+        return runs + runs[::-1]
+
+    def precompute(self, max_radius):
+        """
+        批量计算 1..max_radius 中尚未缓存的半径，一次性追加写入磁盘，返回新增条数。
+        max_radius 超过 MAX_RADIUS 时抛出 ValueError。
+        """
+        max_radius = int(max_radius)
+        if max_radius > MAX_RADIUS:
+            raise ValueError(f"半径过大，建议不超过 {MAX_RADIUS}。")
+        with self.lock:
+            runs = self._loaded()
+            missing = [r for r in range(1, max_radius + 1) if r not in runs]
+            for r in missing:
+                runs[r] = self.pending[r] = octant_runs(r)
+            if missing:
+                self._flush()
+        return len(missing)
+
+    def csv_text(self, max_radius) -> str:
+        """
+        1..max_radius 的线段组表（CSV 文本），每行：半径,段数,空格分隔的段长。
+        max_radius 超过 MAX_RADIUS 时抛出 ValueError。
+        """
+        self.precompute(max_radius)
+        runs = self.runs
+        lines = ["radius,count,segments\n"]
+        for r in range(1, int(max_radius) + 1):
+            octant = runs[r].tolist()
+            full = octant + octant[::-1]
+            lines.append(f"{r},{len(full)},{' '.join(map(str, full))}\n")
+        return "".join(lines)
+
+    def write_csv(self, path, max_radius):
+        """导出 1..max_radius 的线段组表到 path"""
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.csv_text(max_radius))
+        return path
+
+segment_table = SegmentTable(os.environ.get("SMCT_SEGMENT_TABLE", DEFAULT_PATH))  # 导入时不读取文件
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="预计算像素圆线段组表")
+    parser.add_argument("max_radius", type=int, help="计算半径 1..max_radius")
+    parser.add_argument("--path", default=segment_table.path, help="缓存文件路径")
+    parser.add_argument("--csv", help="同时导出 CSV 表到该路径")
+    args = parser.parse_args()
+
+    if not 1 <= args.max_radius <= MAX_RADIUS:
+        parser.error(f"max_radius 应在 1 ~ {MAX_RADIUS} 之间")
+    table = SegmentTable(args.path)
+    added = table.precompute(args.max_radius)
+    print(f"✅ 新增 {added} 个半径，缓存共 {len(table.runs)} 个半径：{table.path}")
+    if args.csv:
+        table.write_csv(args.csv, args.max_radius)
+        print(f"✅ 已导出 CSV：{args.csv}")
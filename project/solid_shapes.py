@@ -0,0 +1,127 @@
+import numpy as np
+import amulet
+from amulet.api.block import Block
+from amulet_nbt import StringTag
+
+from ellipse_shapes import (ellipse_quadrant, row_extents, midpoint_coord, _isqrt_floor,
+                            split_row_spans, mirror_row_spans)
+from region_input import fill_spans
+from block_spans import SpanSet
+
+def circle_row_extents(r):
+    """半径 r 的像素圆在第 0..r 行（|z|）上的最大 x，实心圆盘的每行即为 [-x, x]"""
+    xs, zs = ellipse_quadrant(r, r)
+    return row_extents(xs, zs, int(r))
+
+def _layer_spans(zs, x0, x1, y, center):
+    """把以原点为圆心的 (z, x_start, x_end) 行区间平移到 center，并放在 y 层"""
+    cx, cz = center
+    return SpanSet(np.column_stack((np.full(len(zs), int(y)), zs + int(cz), x0 + int(cx), x1 + int(cx))))
+
+def disk_spans(r, center=(0, 0), height=0):
+    """
+    实心圆盘的行区间集合（SpanSet）。
+    边缘与 generate_circle(r) 的像素圆重合，即圆周加上其内部的全部方块。
+    """
+    r = int(r)
+    if r <= 0:
+        return SpanSet()
+    outer = circle_row_extents(r)
+    inner = np.full(r + 1, -1, dtype=np.int64)
+    return _layer_spans(*mirror_row_spans(outer, inner), height, center)
+
+def annulus_spans(r_outer, r_inner, center=(0, 0), height=0):
+    """
+    圆环（环形道路）的行区间集合：外缘为半径 r_outer 的像素圆（含），
+    内缘为半径 r_inner 的像素圆（不含，即内圆轮廓及其内部留空）。
+    """
+    r_outer, r_inner = int(r_outer), int(r_inner)
+    if r_outer <= 0:
+        return SpanSet()
+    if r_inner >= r_outer:
+        raise ValueError("内半径必须小于外半径")
+    outer = circle_row_extents(r_outer)
+    inner = np.full(r_outer + 1, -1, dtype=np.int64)
+    if r_inner > 0:
+        inner[:r_inner + 1] = circle_row_extents(r_inner)
+    return _layer_spans(*mirror_row_spans(outer, inner), height, center)
+
+def _ball_extents(r, dy, dz):
+    """
+    半径 r 的实心球在 (dy, dz) 行上的最大 |x|；该行不在球内时为 -1。
+    按中点圆判据推广到三维，并与 circle_octant 一样对各坐标轴对称：
+    设 m 为三个坐标绝对值中的最大者，方块在球内当且仅当 m(m-1) < r² - 其余两坐标的平方和。
+    因此三个方向都恰好到达 ±r，y = 0 层与 disk_spans(r) 相同。
+    """
+    dy, dz = np.abs(dy), np.abs(dz)
+    m = np.maximum(dy, dz)
+    s = np.minimum(dy, dz)
+    # x 为最大坐标（x >= m）：x(x-1) < r² - dy² - dz²
+    k = r * r - dy * dy - dz * dz
+    along_x = np.where(k >= 0, midpoint_coord(4 * k, 1), -1)
+    # 否则 m 为最大坐标（x < m）：x² < r² - s² - m(m-1)，即 x <= isqrt(c - 1)
+    c = r * r - s * s - m * (m - 1)
+    across = np.where(c > 0, _isqrt_floor(np.maximum(c - 1, 0)), -1)
+    return np.where(along_x >= m, along_x, np.minimum(across, m - 1))
+
+def sphere_spans(r, center=(0, 0, 0), thickness=None, dome=False):
+    """
+    球体的行区间集合（SpanSet）。
+    thickness 为 None 时为实心球，否则为厚度 thickness 的球壳（向内加厚）；
+    dome 为 True 时只保留 center 所在高度及以上的半球（穹顶）。
+    所有 (y, z) 行一次性向量化计算，半径 200 的球也只需几十万个区间。
+    """
+    r = int(r)
+    if r <= 0:
+        return SpanSet()
+    cx, cy, cz = (int(v) for v in center)
+    dy, dz = np.meshgrid(np.arange(0 if dome else -r, r + 1, dtype=np.int64),
+                         np.arange(-r, r + 1, dtype=np.int64), indexing="ij")
+    dy, dz = dy.ravel(), dz.ravel()
+    outer = _ball_extents(r, dy, dz)
+    if thickness is None or int(thickness) >= r:
+        inner = np.full(len(dy), -1, dtype=np.int64)
+    else:
+        inner = _ball_extents(r - int(thickness), dy, dz)
+
+    rows, x0, x1 = split_row_spans(outer, inner)
+    return SpanSet(np.column_stack((dy[rows] + cy, dz[rows] + cz, x0 + cx, x1 + cx)))
+
+def fill_shape(
+    world_path: str,
+    spans,
+    block_name: str,
+    block_half: str | None = None,
+    dimension: str = "minecraft:overworld",
+    version: tuple[int, int, int] = (1, 21, 81),
+) -> str:
+    """
+    把 disk_spans / annulus_spans / sphere_spans 生成的行区间集合（或其并、差）写入世界，
+    按区块、子区块整块赋值，不逐个方块写入。
+    返回：操作结果的提示字符串。
+    """
+    # === 构造方块对象 ===
+    if block_half in ("top", "bottom"):
+        props = {"minecraft:vertical_half": StringTag(block_half)}
+    else:
+        props = {}
+
+    block = Block(namespace="minecraft", base_name=block_name, properties=props)
+
+    # === 打开世界 ===
+    level = amulet.load_level(world_path)
+
+    try:
+        # === 转换成通用方块，并在调色板中注册 ===
+        version_obj = level.translation_manager.get_version("bedrock", version)
+        universal_block, block_entity, _ = version_obj.block.to_universal(block)
+        block_id = level.block_palette.get_add_block(universal_block)
+
+        # === 按区块批量写入 ===
+        count = fill_spans(level, spans, block_id, block_entity, dimension)
+
+        level.save()
+    finally:
+        level.close()
+
+    return f"✅ 成功放置 {count} 个“{block_name}”（属性：{props}）。"
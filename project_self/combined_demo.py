@@ -5,74 +5,103 @@ import os
 import shutil
 from pathlib import Path
 
-from file_fill import fill_from_file
-from region_input import fill_region
+from stage_timer import timed_request, stage
 
-from angle_straight import plot_full_track
-from circle_vision_simple import draw_quarter_circle_image
+# 为了缩短启动时间，较重的模块在第一次用到时才导入：
+# matplotlib 等绘图模块在首次绘图时，plotly 在生成交互式图时，
+# amulet（世界编辑）在首次编辑世界时。
 
-import matplotlib
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
-import pandas as pd
-import plotly.graph_objects as go
-import zhplot
+TIMING_HEADERS = ["阶段", "耗时 (ms)", "占比 (%)", "次数"]  # 调试面板中耗时表的表头
 
 # === 火车轨道设计 & 像素圆功能 ===
 
 def generate_track_design(mode, x0, y0, x1, y1, k1, k2,
                           track_width, curvature, ground_height,
                           use_mid_point, xm, ym, k_mid):
-    try:
-        html_file = None
-        plotly_fig = None
-        coords = pd.DataFrame(columns=['X', 'Height', 'Y'])
-
-        def safe_convert(s):
-            try:
-                return float('inf') if str(s).lower() == "inf" else float(s)
-            except:
-                return 0.0
-
-        use_line = (mode == "直线模式")
-        k1 = 0.0 if use_line else safe_convert(k1)
-        k2 = 0.0 if use_line else safe_convert(k2)
-
-        k_mid_converted = None
-        if use_mid_point:
-            if use_line:
-                k_mid_converted = 0.0
-            elif k_mid is not None and str(k_mid).strip():
-                k_mid_converted = safe_convert(k_mid)
-
-        via = (xm, ym) if use_mid_point else None
-        k_via = k_mid_converted if use_mid_point else None
-        effective_curvature = 3.0 if use_line else curvature
-
-        fig = plt.figure(figsize=(10, 8))
-        ax = fig.add_subplot(111)
-
-        plot_full_track(
-            (x0, y0), (x1, y1),
-            k1, k2,
-            track_width,
-            effective_curvature,
-            via=via,
-            k_via=k_via,
-            ground_height=ground_height,
-            use_line=use_line
-        )
-
-        static_img = tempfile.NamedTemporaryFile(suffix=".png", delete=False)
-        plt.savefig(static_img.name, bbox_inches='tight', dpi=100)
-        plt.close(fig)
-
-        coord_file = "rail_output.txt"
-        if os.path.exists(coord_file):
-            coords = pd.read_csv(coord_file, sep=' ', header=None, names=['X', 'Height', 'Y'])
+    """生成轨道静态图与坐标文件；各阶段耗时显示在“调试”面板并写入日志"""
+    with timed_request("generate_track_design") as timings:
+        with stage("imports"):  # 首次生成时包含 matplotlib、pandas 的导入
+            import pandas as pd
+            from matplotlib.figure import Figure
+            from angle_straight import plot_full_track
+
+        try:
+            coords = pd.DataFrame(columns=['X', 'Height', 'Y'])
+
+            def safe_convert(s):
+                try:
+                    return float('inf') if str(s).lower() == "inf" else float(s)
+                except:
+                    return 0.0
+
+            use_line = (mode == "直线模式")
+            k1 = 0.0 if use_line else safe_convert(k1)
+            k2 = 0.0 if use_line else safe_convert(k2)
+
+            k_mid_converted = None
+            if use_mid_point:
+                if use_line:
+                    k_mid_converted = 0.0
+                elif k_mid is not None and str(k_mid).strip():
+                    k_mid_converted = safe_convert(k_mid)
+
+            via = (xm, ym) if use_mid_point else None
+            k_via = k_mid_converted if use_mid_point else None
+            effective_curvature = 3.0 if use_line else curvature
+
+            # 每次请求使用独立的 Figure，不依赖 pyplot 的全局“当前图像”
+            fig = Figure(figsize=(10, 8))
+
+            with stage("plot_full_track"):
+                plot_full_track(
+                    (x0, y0), (x1, y1),
+                    k1, k2,
+                    track_width,
+                    effective_curvature,
+                    via=via,
+                    k_via=k_via,
+                    ground_height=ground_height,
+                    use_line=use_line,
+                    order="chunk",
+                    fig=fig
+                )
+
+            with stage("savefig"):
+                static_img = tempfile.NamedTemporaryFile(suffix=".png", delete=False)
+                fig.savefig(static_img.name, bbox_inches='tight', dpi=100)
+                fig.clear()
+
+            with stage("read_csv"):
+                coord_file = "rail_output.txt"
+                if os.path.exists(coord_file):
+                    coords = pd.read_csv(coord_file, sep=' ', header=None, names=['X', 'Height', 'Y'])
+
+            with stage("to_csv"):
+                temp_coord_file = tempfile.NamedTemporaryFile(suffix=".txt", delete=False)
+                coords.to_csv(temp_coord_file.name, sep=' ', index=False, header=False)
+                temp_coord_file.close()
+                table = coords.round(2).values.tolist()
+
+        except Exception as e:
+            raise gr.Error(f"生成轨道设计时出错: {str(e)}")
+
+    # 交互式图与 HTML 由“生成 交互式 图”按钮按需生成，这里先清空旧结果
+    return static_img.name, temp_coord_file.name, None, table, None, timings.rows()
+
+def build_interactive_view(table):
+    """
+    由坐标表（X 高度 Z）生成交互式轨道像素图及其 HTML 文件。
+    只在用户打开交互式视图时调用，plotly 也在此时才导入。各阶段耗时显示在“调试”面板。
+    """
+    if table is None or len(table) == 0:
+        raise gr.Error("请先生成轨道。")
+    with timed_request("build_interactive_view") as timings:
+        with stage("imports"):
+            import plotly.graph_objects as go
+
+        with stage("plotly_shapes"):
             shapes, hover_x, hover_y, hover_text = [], [], [], []
-            for row in coords.itertuples(index=False):
-                x, height, y = row
+            for x, height, y in table.values.tolist():
                 shapes.append(dict(
                     type="rect",
                     x0=x - 0.5, x1=x + 0.5,
@@ -82,8 +111,9 @@ def generate_track_design(mode, x0, y0, x1, y1, k1, k2,
                 ))
                 hover_x.append(x)
                 hover_y.append(y)
-                hover_text.append(f"X: {x}, Y: {y}, 高度: {height}")
+                hover_text.append(f"X: {x:g}, Y: {y:g}, 高度: {height}")
 
+        with stage("plotly_figure"):
             plotly_fig = go.Figure()
             plotly_fig.add_trace(go.Scatter(
                 x=hover_x,
@@ -103,22 +133,33 @@ def generate_track_design(mode, x0, y0, x1, y1, k1, k2,
                 hovermode='closest'
             )
 
+        with stage("write_html"):
             html_file = tempfile.NamedTemporaryFile(suffix=".html", delete=False)
             plotly_fig.write_html(html_file.name)
             html_file.close()
-
-        temp_coord_file = tempfile.NamedTemporaryFile(suffix=".txt", delete=False)
-        coords.to_csv(temp_coord_file.name, sep=' ', index=False, header=False)
-        temp_coord_file.close()
-
-        return static_img.name, temp_coord_file.name, html_file.name if html_file else None, coords.round(2).values.tolist(), plotly_fig
-
-    except Exception as e:
-        raise gr.Error(f"生成轨道设计时出错: {str(e)}")
+    return plotly_fig, html_file.name, timings.rows()
 
 
 def gradio_draw_quarter_circle(r):
-    return draw_quarter_circle_image(r)
+    from circle_vision_simple import MAX_RADIUS, draw_quarter_circle_image
+    from segment_table import segment_table
+
+    r = r or 0
+    if not 1 <= r <= MAX_RADIUS or r != int(r):
+        return draw_quarter_circle_image(r)  # 只返回错误提示，不计算、不写入线段组表
+    return draw_quarter_circle_image(int(r), segment_table.get(int(r)))
+
+def export_segment_csv(max_radius):
+    """导出 1..max_radius 的线段组 CSV 表"""
+    from circle_vision_simple import MAX_RADIUS
+    from segment_table import segment_table
+
+    max_radius = int(max_radius or 0)
+    if not 1 <= max_radius <= MAX_RADIUS:
+        raise gr.Error(f"请输入 1 ~ {MAX_RADIUS} 之间的最大半径。")
+    csv_file = tempfile.NamedTemporaryFile(suffix=".csv", delete=False)
+    csv_file.close()
+    return segment_table.write_csv(csv_file.name, max_radius)
 
 # === Minecraft 世界多步骤编辑功能 ===
 
@@ -127,6 +168,8 @@ def run_file_fill(world_path, coords_file, block_name, slab_choice):
     Gradio 调用：从文件填充
     slab_choice: 三个选项 "none"/"top"/"bottom"
     """
+    from file_fill import fill_from_file
+
     # 如果用户选择 none，就把 slab_choice 设为 None
     block_half = slab_choice if slab_choice in ("top", "bottom") else None
 
@@ -148,6 +191,8 @@ def run_region_fill(
     Gradio 调用：按区域填充
     slab_choice: 三个选项 "none"/"top"/"bottom"
     """
+    from region_input import fill_region
+
     block_half = slab_choice if slab_choice in ("top", "bottom") else None
     coord1 = (int(x1), int(y1), int(z1))
     coord2 = (int(x2), int(y2), int(z2))
@@ -159,6 +204,43 @@ def run_region_fill(
     return result
 
 
+def run_shape_fill(world_path, shape, cx, cy, cz, radius, inner, block_name, slab_choice):
+    """
+    Gradio 调用：按形状填充
+    shape: "圆盘" / "圆环" / "实心球" / "球壳" / "穹顶"
+    inner: 圆环的内半径，或球壳、穹顶的厚度
+    """
+    from solid_shapes import disk_spans, annulus_spans, sphere_spans, fill_shape
+
+    block_half = slab_choice if slab_choice in ("top", "bottom") else None
+    radius, inner = int(radius), int(inner or 0)
+
+    try:
+        if shape == "圆盘":
+            spans = disk_spans(radius, (int(cx), int(cz)), int(cy))
+        elif shape == "圆环":
+            spans = annulus_spans(radius, inner, (int(cx), int(cz)), int(cy))
+        else:
+            thickness = None if shape == "实心球" else max(inner, 1)
+            spans = sphere_spans(radius, (int(cx), int(cy), int(cz)), thickness, dome=shape == "穹顶")
+        result = fill_shape(world_path, spans, block_name, block_half)
+    except Exception as e:
+        result = f"❌ 运行时发生错误：{e}"
+    return result
+
+
+def gradio_draw_ellipse(a, b, exponent, width, fill, height):
+    from circle_vision_simple import write_coords_file
+    from ellipse_shapes import draw_ellipse_image, shape_blocks
+
+    image, info, points = draw_ellipse_image(a, b, exponent, width, fill)
+    if points is None:
+        return image, info, None
+    coord_file = tempfile.NamedTemporaryFile(suffix=".txt", delete=False)
+    coord_file.close()
+    write_coords_file(coord_file.name, shape_blocks(points, height=int(height or 0)))
+    return image, info, coord_file.name
+
 # === Gradio 界面整合 ===
 
 with gr.Blocks(theme=gr.themes.Soft(), title="Slim MCBE Curve Tool ") as demo:
@@ -196,12 +278,16 @@ with gr.Blocks(theme=gr.themes.Soft(), title="Slim MCBE Curve Tool ") as demo:
                             gr.Markdown("### 下载txt坐标文件后上传至‘世界编辑工具’页面自动填充")                            
                             with gr.Tabs():
                                 with gr.TabItem("交互式 可视化"):
+                                    interactive_btn = gr.Button("生成 交互式 图")
                                     plotly_output = gr.Plot(label="交互式 轨道 图")
                                     coord_table = gr.Dataframe(label="轨道 坐标", headers=["X","高度","Z"],
                                                                datatype=["number","number","number"], col_count=3)
                                 with gr.TabItem("下载 区域"):
                                     download_coords = gr.File(label="下载 坐标 文件 (.txt)")
                                     download_html = gr.File(label="下载 HTML 可视化")
+                                with gr.TabItem("调试"):
+                                    timing_table = gr.Dataframe(label="各阶段 耗时（最近一次生成）", headers=TIMING_HEADERS,
+                                                                datatype=["str","number","number","number"], col_count=4)
 
 
                     # 动态显示/隐藏曲线相关参数
@@ -231,7 +317,7 @@ with gr.Blocks(theme=gr.themes.Soft(), title="Slim MCBE Curve Tool ") as demo:
                         ],
                         inputs=[mode, x0, y0, x1, y1, k1, k2, track_width, curvature, ground_height, 
                             use_mid_point, xm, ym, k_mid],
-                        outputs=[output_plot, download_coords, download_html, coord_table, plotly_output],
+                        outputs=[output_plot, download_coords, download_html, coord_table, plotly_output, timing_table],
                         fn=generate_track_design,
                         cache_examples=False
                     )
@@ -240,15 +326,44 @@ with gr.Blocks(theme=gr.themes.Soft(), title="Slim MCBE Curve Tool ") as demo:
                         fn=generate_track_design,
                         inputs=[mode, x0, y0, x1, y1, k1, k2, track_width,
                                 curvature, ground_height, use_mid_point, xm, ym, k_mid],
-                        outputs=[output_plot, download_coords, download_html, coord_table, plotly_output]
+                        outputs=[output_plot, download_coords, download_html, coord_table, plotly_output, timing_table]
                         )
 
+                    interactive_btn.click(
+                        fn=build_interactive_view,
+                        inputs=coord_table,
+                        outputs=[plotly_output, download_html, timing_table]
+                    )
+
                 with gr.TabItem("🔵 像素圆"):
                     radius_input = gr.Number(label="半径", value=50, precision=0)
                     run_button = gr.Button("绘制", variant="primary")
                     text_output = gr.Textbox(label="线段 信息")                    
                     image_output = gr.Image(type="pil", label="四分之 一 圆 图像")
                     run_button.click(fn=gradio_draw_quarter_circle, inputs=radius_input, outputs=[image_output, text_output])
+                    with gr.Row():
+                        csv_radius = gr.Number(label="线段组表 最大半径", value=1000, precision=0)
+                        csv_button = gr.Button("导出 线段组 CSV")
+                    csv_output = gr.File(label="下载 线段组 表 (.csv)")
+                    csv_button.click(fn=export_segment_csv, inputs=csv_radius, outputs=csv_output)
+
+                with gr.TabItem("🟠 椭圆 / 超椭圆"):
+                    with gr.Row():
+                        ellipse_a = gr.Number(label="半轴 a（X 方向）", value=40, precision=0)
+                        ellipse_b = gr.Number(label="半轴 b（Z 方向）", value=25, precision=0)
+                        ellipse_n = gr.Number(label="指数 n（2 为椭圆，越大越方）", value=2)
+                    with gr.Row():
+                        ellipse_width = gr.Number(label="线宽", value=1, precision=0)
+                        ellipse_fill = gr.Checkbox(label="实心", value=False)
+                        ellipse_height = gr.Number(label="放置高度", value=0, precision=0)
+                    ellipse_button = gr.Button("绘制", variant="primary")
+                    ellipse_text = gr.Textbox(label="线段 信息")
+                    ellipse_image = gr.Image(type="pil", label="椭圆 图像")
+                    ellipse_file = gr.File(label="下载 坐标 (.txt)")
+                    ellipse_button.click(
+                        fn=gradio_draw_ellipse,
+                        inputs=[ellipse_a, ellipse_b, ellipse_n, ellipse_width, ellipse_fill, ellipse_height],
+                        outputs=[ellipse_image, ellipse_text, ellipse_file])
 
         # —— Tab2：Minecraft 多步骤编辑 —— 
         with gr.TabItem("🌐 世界编辑工具"):
@@ -261,7 +376,7 @@ with gr.Blocks(theme=gr.themes.Soft(), title="Slim MCBE Curve Tool ") as demo:
                 with gr.TabItem("从文件坐标填充"):
                     gr.Markdown("**说明：** 上传一个文本文件，里面每行是 `x y z`，程序会将所有这些点设置成指定方块。")
                     file_world = gr.Textbox(label="世界文件夹路径", placeholder="例如：E:/my_mc_world")
-                    coords_file = gr.File(label="坐标文件 (*.txt)，每行格式：x y z")
+                    coords_file = gr.File(label="坐标文件 (*.txt / .txt.gz / .txt.zst / .bin)，文本每行格式：x y z")
                     file_block = gr.Textbox(label="方块名称", placeholder="例如：stone 或 normal_stone_slab")
                     file_slab = gr.Radio(
                         choices=["none", "top", "bottom"],
@@ -304,8 +419,35 @@ with gr.Blocks(theme=gr.themes.Soft(), title="Slim MCBE Curve Tool ") as demo:
                         outputs=[region_output]
                     )
 
+                # —— Tab3：按形状填充 —— 
+                with gr.TabItem("按形状填充"):
+                    gr.Markdown("**说明：** 以中心点和半径生成圆盘、圆环、球体或穹顶，按区块整块写入世界。")
+                    shape_world = gr.Textbox(label="世界文件夹路径", placeholder="例如：E:/my_mc_world")
+                    shape_kind = gr.Radio(choices=["圆盘", "圆环", "实心球", "球壳", "穹顶"], value="圆盘", label="形状")
+                    shape_cx = gr.Number(label="中心 X", value=0)
+                    shape_cy = gr.Number(label="中心 Y（圆盘/圆环所在高度）", value=64)
+                    shape_cz = gr.Number(label="中心 Z", value=0)
+                    shape_radius = gr.Number(label="半径", value=20, precision=0)
+                    shape_inner = gr.Number(label="圆环内半径 / 球壳、穹顶厚度", value=2, precision=0)
+
+                    shape_block = gr.Textbox(label="方块名称", placeholder="例如：stone 或 normal_stone_slab")
+                    shape_slab = gr.Radio(
+                        choices=["none", "top", "bottom"],
+                        label="如果是半砖，选择‘top’或‘bottom’，否则选‘none’",
+                        value="none"
+                    )
+                    shape_btn = gr.Button("开始形状填充")
+                    shape_output = gr.Textbox(label="运行结果")
+
+                    shape_btn.click(
+                        run_shape_fill,
+                        inputs=[shape_world, shape_kind, shape_cx, shape_cy, shape_cz,
+                                shape_radius, shape_inner, shape_block, shape_slab],
+                        outputs=[shape_output]
+                    )
+
     gr.Markdown("---\nMCBE Curve Tool，欢迎体验！")
+
     
 if __name__ == "__main__":
     demo.launch(server_name="127.0.0.1", server_port=7860)
-
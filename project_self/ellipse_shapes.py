@@ -0,0 +1,256 @@
+from matplotlib.figure import Figure
+import numpy as np
+import io
+from PIL import Image
+import zhplot  # noqa: F401  仅为副作用：注册中文字体，示意图标题含中文
+
+from circle_vision_simple import path_runs, PIXEL_BUDGET, RASTER_FIGSIZE
+
+# 椭圆半轴上限：整数判别式 4a²b² 需在 int64 范围内
+MAX_AXIS = 20000
+# 示意图允许展开的最大方块数（实心或加宽的大椭圆会非常多）
+MAX_SHAPE_BLOCKS = 20_000_000
+
+def _isqrt_floor(k):
+    """逐元素 floor(sqrt(k))（k 为非负整数数组），浮点开方后用整数条件校正"""
+    s = np.floor(np.sqrt(k.astype(float))).astype(np.int64)
+    s = np.where(s * s > k, s - 1, s)
+    s = np.where((s + 1) * (s + 1) <= k, s + 1, s)
+    return s
+
+def midpoint_coord(k, p):
+    """
+    满足 p²(2v-1)² <= k 的最大整数 v（k < 0 时为 -1）。
+    即中点 v-½ 仍落在曲线内、v+½ 落在曲线外，对应中点算法在该行/列的取值。
+    """
+    k = np.asarray(k, dtype=np.int64)
+    v = np.full(k.shape, -1, dtype=np.int64)
+    ok = k >= 0
+    # p(2v-1) <= sqrt(k) ⇔ 2v-1 <= floor(sqrt(k) / p) = floor(isqrt(k) / p)
+    v[ok] = (_isqrt_floor(k[ok]) // p + 1) // 2
+    return v
+
+def _order_quadrant(xs, ys):
+    """
+    去重并从 (a, 0) 到 (0, b) 逆时针排列：象限内的轮廓 x 单调不增、y 单调不减，
+    按 (x 降序, y 升序) 排序即可。相邻两点跨度超过 1 格处
+    （两段取整方式的衔接处）按直线补齐，保证 8 连通。
+    """
+    pts = np.unique(np.column_stack((xs, ys)), axis=0)
+    pts = pts[np.lexsort((pts[:, 1], -pts[:, 0]))]
+
+    gap = np.abs(np.diff(pts, axis=0)).max(axis=1, initial=0)
+    if np.any(gap > 1):
+        counts = np.concatenate((np.maximum(gap, 1), [1]))
+        start = np.repeat(pts, counts, axis=0)
+        step = np.repeat(np.vstack((np.diff(pts, axis=0), [[0, 0]])), counts, axis=0)
+        k = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        frac = k / np.repeat(counts, counts)
+        pts = np.trunc(start + step * frac[:, None] + 0.5).astype(np.int64)
+    return pts[:, 0], pts[:, 1]
+
+def ellipse_quadrant(a, b):
+    """
+    整数半轴 a（x 方向）、b（y 方向）的中点椭圆在第一象限上的像素，
+    返回 (xs, ys)，从 (a, 0) 逆时针排到 (0, b)。
+    与 circle_octant 相同，每行/列的取值直接由中点判别式的闭式解得出：
+      - 平缓段（|斜率| <= 1）按列取 y：a²(2y-1)² <= 4b²(a²-x²) 的最大 y；
+      - 陡峭段按行取 x：b²(2x-1)² <= 4a²(b²-y²) 的最大 x。
+    a == b 时结果与 generate_quarter_circle_points 一致。
+    """
+    a, b = int(a), int(b)
+    if a <= 0 or b <= 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    cols = np.arange(a + 1, dtype=np.int64)
+    y1 = midpoint_coord(4 * b * b * (a * a - cols * cols), a)
+    # 平缓段为从 x = 0 开始、满足 b²x <= a²y 的前缀，陡峭段接着覆盖其下方所有行
+    gentle = np.logical_and.accumulate(b * b * cols <= a * a * y1)
+    ye = y1[gentle][-1]
+    rows = np.arange(ye, dtype=np.int64)
+    x2 = midpoint_coord(4 * a * a * (b * b - rows * rows), b)
+    return _order_quadrant(np.concatenate((cols[gentle], x2)),
+                           np.concatenate((y1[gentle], rows)))
+
+def superellipse_quadrant(a, b, exponent=4.0):
+    """
+    超椭圆 |x/a|^n + |y/b|^n = 1（n = exponent）在第一象限上的像素，返回 (xs, ys)。
+    与中点椭圆同样分成两段：梯度偏向 y 的部分按列取整，其余按行取整，
+    所有行列一次性向量化计算。n = 2 为普通椭圆，n 越大越接近圆角矩形。
+    """
+    a, b, n = int(a), int(b), float(exponent)
+    if a <= 0 or b <= 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    if n <= 0:
+        raise ValueError("超椭圆指数必须为正数")
+    cols = np.arange(a + 1, dtype=float)
+    rows = np.arange(b + 1, dtype=float)
+    y_true = b * np.clip(1 - (cols / a) ** n, 0, 1) ** (1 / n)
+    x_true = a * np.clip(1 - (rows / b) ** n, 0, 1) ** (1 / n)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # 梯度 ∝ (x^(n-1) / a^n, y^(n-1) / b^n)，分量较小的方向按该方向逐格取值
+        gentle = (cols / a) ** (n - 1) / a <= (y_true / b) ** (n - 1) / b
+        steep = (rows / b) ** (n - 1) / b <= (x_true / a) ** (n - 1) / a
+    # 端点处（x = 0 或 y = 0）的比较可能是 nan，按所在段补上
+    gentle[0] = True
+    steep[0] = True
+    xs = np.concatenate((cols[gentle], np.trunc(x_true[steep] + 0.5)))
+    ys = np.concatenate((np.trunc(y_true[gentle] + 0.5), rows[steep]))
+    return _order_quadrant(xs.astype(np.int64), ys.astype(np.int64))
+
+def row_extents(xs, ys, height):
+    """每行 0..height 上轮廓的最大 x，没有像素的行为 -1"""
+    out = np.full(height + 1, -1, dtype=np.int64)
+    np.maximum.at(out, ys, xs)
+    return out
+
+def _mirror_outline(xs, ys):
+    """把第一象限的有序轮廓镜像成整圈，按逆时针排列且无重复"""
+    q = np.column_stack((xs, ys))
+    # 坐标轴上的点只属于一侧，镜像时跳过，避免重复
+    off_y = q[:, 0] > 0
+    off_x = q[:, 1] > 0
+    parts = [q, (q[off_y] * (-1, 1))[::-1], q[off_x] * (-1, -1),
+             (q[off_y & off_x] * (1, -1))[::-1]]
+    return np.concatenate(parts)
+
+def split_row_spans(outer, inner):
+    """
+    把关于 x = 0 对称的各行 [-outer, -inner-1] ∪ [inner+1, outer] 拆成区间，
+    返回 (行下标, x_start, x_end)。inner 为 -1 的行是实心行，左右合并为一段；
+    outer <= inner 的行为空。
+    """
+    rows = np.flatnonzero(outer > inner)
+    outer, inner = outer[rows], inner[rows]
+    solid = inner < 0
+    index = np.concatenate((rows, rows[~solid]))
+    x0 = np.concatenate((np.where(solid, -outer, inner + 1), -outer[~solid]))
+    x1 = np.concatenate((outer, -inner[~solid] - 1))
+    return index, x0, x1
+
+def mirror_row_spans(outer, inner):
+    """
+    按行把第一象限的 [inner+1, outer] 区间镜像到四个象限，
+    返回按 (y, x) 排序的行区间 (ys, x_start, x_end)（均含端点）。
+    outer / inner 以行号 0..len-1 为下标，inner 为 -1 的行是实心行。
+    """
+    ys, x0, x1 = split_row_spans(outer, inner)
+    # y > 0 的行再镜像到下半部分
+    lower = ys > 0
+    ys = np.concatenate((ys, -ys[lower]))
+    x0 = np.concatenate((x0, x0[lower]))
+    x1 = np.concatenate((x1, x1[lower]))
+
+    order = np.lexsort((x0, ys))
+    return ys[order], x0[order], x1[order]
+
+def expand_spans(ys, x0, x1):
+    """把行区间展开为逐格的 (n, 2) 整数数组 (x, y)"""
+    lengths = x1 - x0 + 1
+    starts = np.cumsum(lengths) - lengths
+    px = np.arange(lengths.sum()) - np.repeat(starts - x0, lengths)
+    return np.column_stack((px, np.repeat(ys, lengths)))
+
+def _shape(quadrant, a, b, width, fill):
+    """由象限轮廓函数 quadrant(a, b) 组装出轮廓、加宽或实心的整圈像素"""
+    a, b, width = int(a), int(b), int(width)
+    if a > MAX_AXIS or b > MAX_AXIS:
+        raise ValueError(f"半轴过大，建议不超过 {MAX_AXIS}")
+    xs, ys = quadrant(a, b)
+    if len(xs) == 0:
+        return np.zeros((0, 2), dtype=np.int64), []
+    segments = path_runs(np.column_stack((xs, ys)))
+    if not fill and width <= 1:
+        return _mirror_outline(xs, ys), segments
+
+    outer = row_extents(xs, ys, b)
+    inner = np.full(b + 1, -1, dtype=np.int64)
+    if not fill and min(a, b) > width:
+        ixs, iys = quadrant(a - width, b - width)
+        inner[:b - width + 1] = row_extents(ixs, iys, b - width)
+    return expand_spans(*mirror_row_spans(outer, inner)), segments
+
+def generate_ellipse(a, b, width=1, fill=False):
+    """
+    中点椭圆（半轴 a、b，圆心在原点），输出约定与 generate_circle 相同：
+    返回 (points, segments)
+      points   —— (n, 2) 整数数组：width 为 1 且不填充时为按逆时针排列的轮廓，
+                  否则为按 (y, x) 排列的加宽环带（向内加宽 width 格）或实心椭圆；
+      segments —— 第一象限轮廓（从 (a, 0) 到 (0, b)）的“线段组”长度列表。
+    """
+    return _shape(ellipse_quadrant, a, b, width, fill)
+
+def generate_superellipse(a, b, exponent=4.0, width=1, fill=False):
+    """
+    超椭圆 |x/a|^n + |y/b|^n = 1（圆角矩形广场等），返回值与 generate_ellipse 相同。
+    """
+    return _shape(lambda p, q: superellipse_quadrant(p, q, exponent), a, b, width, fill)
+
+def shape_blocks(points, center=(0, 0), height=0):
+    """
+    把 (n, 2) 平面像素平移到 center=(x, z)、放在 height 高度，返回 (n, 3) 整数 xyz 数组，
+    可交给 file_fill.place_blocks 或 circle_vision_simple.write_coords_file。
+    """
+    pts = np.asarray(points, dtype=np.int64).reshape(-1, 2)
+    cx, cz = center
+    return np.column_stack((pts[:, 0] + int(cx), np.full(len(pts), int(height)), pts[:, 1] + int(cz)))
+
+def draw_shape_image(points, title, budget=PIXEL_BUDGET):
+    """
+    把整圈像素画成占用栅格图，返回 PIL.Image.Image。
+    像素过多时按 factor×factor 的块降采样，每边不超过 budget 个像素。
+    """
+    pts = np.asarray(points, dtype=np.int64).reshape(-1, 2)
+    lo = pts.min(axis=0)
+    span = pts.max(axis=0) - lo + 1
+    factor = max(1, -(-int(span.max()) // budget))
+    w, h = (span + factor - 1) // factor
+    image = np.zeros((h, w), dtype=bool)
+    image[(pts[:, 1] - lo[1]) // factor, (pts[:, 0] - lo[0]) // factor] = True
+
+    rgba = np.zeros(image.shape + (4,), dtype=np.uint8)
+    rgba[image] = (0, 0, 255, 255)
+    fig = Figure(figsize=(RASTER_FIGSIZE, RASTER_FIGSIZE))
+    ax = fig.add_subplot()
+    ax.imshow(rgba, origin='lower', interpolation='nearest',
+              extent=(lo[0] - 0.5, lo[0] - 0.5 + w * factor,
+                      lo[1] - 0.5, lo[1] - 0.5 + h * factor))
+    ax.grid(True, color='gray', linestyle='--', linewidth=0.5)
+    ax.set_aspect('equal')
+    ax.set_title(title, fontsize=16)
+
+    buf = io.BytesIO()
+    fig.tight_layout()
+    fig.savefig(buf, format='png')
+    fig.clear()  # 立即释放坐标轴与图元，不等垃圾回收
+    buf.seek(0)
+    return Image.open(buf)
+
+def draw_ellipse_image(a, b, exponent=2.0, width=1, fill=False):
+    """
+    绘制椭圆（exponent = 2）或超椭圆的像素示意图。
+    返回 (PIL.Image.Image, 文字说明, 整圈像素 (n, 2) 数组)；参数错误时图片与像素为 None。
+    """
+    a, b, width = int(a or 0), int(b or 0), int(width or 1)
+    if a <= 0 or b <= 0:
+        return None, "错误：请输入正整数半轴。", None
+    if a > MAX_AXIS or b > MAX_AXIS:
+        return None, f"错误：半轴过大，建议不超过 {MAX_AXIS}。", None
+    if exponent is None or exponent <= 0:
+        return None, "错误：超椭圆指数必须为正数。", None
+    inner = 0 if fill else max(a - width, 0) * max(b - width, 0)
+    if np.pi * (a * b - inner) > MAX_SHAPE_BLOCKS:
+        return None, f"错误：方块数过多（约 {np.pi * (a * b - inner):.0f}），建议不超过 {MAX_SHAPE_BLOCKS}。", None
+
+    if exponent == 2:
+        points, segments = generate_ellipse(a, b, width, fill)
+        name = "椭圆"
+    else:
+        points, segments = generate_superellipse(a, b, exponent, width, fill)
+        name = f"超椭圆 n={exponent:g}"
+    style = "实心" if fill else f"线宽 {max(width, 1)}"
+    image = draw_shape_image(points, f"{name}（a={a}, b={b}，{style}）")
+
+    segment_str = ' '.join(map(str, segments))
+    info = (f"方块总数：{len(points)}\n"
+            f"第一象限线段组（共{len(segments)}段）：\n{segment_str}")
+    return image, info, points
@@ -1,8 +1,15 @@
 import math
-import matplotlib.pyplot as plt
+import os
+from functools import lru_cache
+import numpy as np
+from matplotlib.figure import Figure
 import matplotlib.patches as patches
 import zhplot
 
+from chunk_order import block_order, sort_blocks
+from height_profile import profile_blocks
+from stage_timer import stage, timed
+
 def unit_vector(k, direction=1):
     """计算单位向量，direction参数用于控制方向（1或-1）"""
     if k == float('inf') or abs(k) > 1e6:
@@ -47,6 +54,7 @@ def enforce_4connectivity(raw_pixels):
             prev = p
     return deduped
 
+@timed()
 def generate_line(P0, P1, samples_per_unit=1.0):
     x0, y0 = P0
     x1, y1 = P1
@@ -67,7 +75,51 @@ def generate_line(P0, P1, samples_per_unit=1.0):
     consistent = enforce_4connectivity(raw)
     return consistent, [(x0 + t * dx, y0 + t * dy) for t in [i/N for i in range(N+1)]]
 
-def generate_bezier(P0, P3, k1, k2, curvature, samples_per_unit=1.5):
+def bernstein_at(t):
+    """三次 Bernstein 基在参数数组 t 处的取值，形状 (len(t), 4)"""
+    t = np.asarray(t, dtype=float)
+    s = 1 - t
+    return np.column_stack((s**3, 3 * s**2 * t, 3 * s * t**2, t**3))
+
+@lru_cache(maxsize=256)
+def bernstein_basis(N):
+    """
+    三次 Bézier 在 t = 0, 1/N, ..., 1 处的 Bernstein 基矩阵，形状 (N+1, 4)。
+    基矩阵只与采样数 N 有关，按 N 缓存（LRU 淘汰），返回只读数组。
+    """
+    basis = bernstein_at(np.arange(N + 1) / N)
+    basis.setflags(write=False)
+    return basis
+
+def arc_length_table(ctrl, M):
+    """
+    用 M 段折线近似曲线，返回 (t 表, 累积弧长表)，用于弧长到参数 t 的反查。
+    """
+    t_table = np.arange(M + 1) / M
+    dense = bernstein_at(t_table) @ ctrl
+    seg = np.hypot(*np.diff(dense, axis=0).T)
+    cum = np.concatenate(([0.0], np.cumsum(seg)))
+    return t_table, cum
+
+def arc_length_params(ctrl, spacing=1.0, oversample=2):
+    """
+    按弧长等距（默认每个方块约一个点）选取参数 t，返回 t 数组。
+    弯道处不再欠采样，平直段也不会产生大量重复像素。
+    """
+    chord = math.hypot(*(ctrl[3] - ctrl[0]))
+    polygon = np.hypot(*np.diff(ctrl, axis=0).T).sum()
+    M = max(int(math.ceil(polygon * oversample)), 64)
+    t_table, cum = arc_length_table(ctrl, M)
+    total = cum[-1]
+    n = max(int(math.ceil(max(total, chord) / spacing)), 4)
+    return np.interp(np.linspace(0.0, total, n + 1), cum, t_table)
+
+@timed()
+def generate_bezier(P0, P3, k1, k2, curvature, samples_per_unit=1.5, sampling="uniform"):
+    """
+    sampling: "uniform" 按参数 t 均匀采样（每单位弦长 samples_per_unit 个点）；
+              "arclength" 按弧长均匀采样，每个方块约一个点。
+    """
     # 计算起点到终点的方向
     dx_total = P3[0] - P0[0]
     dy_total = P3[1] - P0[1]
@@ -103,22 +155,16 @@ def generate_bezier(P0, P3, k1, k2, curvature, samples_per_unit=1.5):
     P1 = (P0[0] + d1 * ux1, P0[1] + d1 * uy1)
     P2 = (P3[0] - d2 * ux2, P3[1] - d2 * uy2)
 
-    N = max(int(d * samples_per_unit), 4)
-    curve_points = []
-    pixel_coords = []
-    for i in range(N + 1):
-        t = i / N
-        b0 = (1 - t)**3
-        b1 = 3 * (1 - t)**2 * t
-        b2 = 3 * (1 - t) * t**2
-        b3 = t**3
-
-        ux = b0*P0[0] + b1*P1[0] + b2*P2[0] + b3*P3[0]
-        vy = b0*P0[1] + b1*P1[1] + b2*P2[1] + b3*P3[1]
-        curve_points.append((ux, vy))
-
-        ix, iy = int(ux + 0.5), int(vy + 0.5)
-        pixel_coords.append((ix, iy))
+    ctrl = np.array((P0, P1, P2, P3), dtype=float)
+    if sampling == "uniform":
+        N = max(int(d * samples_per_unit), 4)
+        pts = bernstein_basis(N) @ ctrl
+    elif sampling == "arclength":
+        pts = bernstein_at(arc_length_params(ctrl)) @ ctrl
+    else:
+        raise ValueError(f"未知的采样方式：{sampling}")
+    curve_points = list(map(tuple, pts.tolist()))
+    pixel_coords = list(map(tuple, np.trunc(pts + 0.5).astype(int).tolist()))
 
     raw = remove_duplicates(pixel_coords)
     consistent = enforce_4connectivity(raw)
@@ -137,7 +183,20 @@ def draw_arrow(ax, point, k, length=8, color='green'):
     
     ax.arrow(point[0], point[1], dx*length, dy*length, head_width=2, head_length=4, fc=color, ec=color)
 
-def plot_full_track(a, b, k1, k2, track_width=1.0, curvature=3.0, via=None, k_via=None, ground_height=0.0, use_line=False):
+@timed()
+def dilate_blocks(centerline, track_width):
+    """把中心线像素按 track_width 的正方形加宽，返回去重后的 (n, 2) 整数数组"""
+    pts = np.array(centerline, dtype=np.int64).reshape(-1, 2)
+    half = int(track_width // 2)
+    r = np.arange(-half, half + 1)
+    offsets = np.stack(np.meshgrid(r, r, indexing="ij"), axis=-1).reshape(-1, 2)
+    return np.unique((pts[:, None, :] + offsets[None, :, :]).reshape(-1, 2), axis=0)
+
+def compute_track(a, b, k1, k2, track_width=1.0, curvature=3.0, via=None, k_via=None, use_line=False, sampling="uniform"):
+    """
+    只计算轨道几何，不绘图、不写文件。
+    返回 (中心线像素列表, [(曲线采样点, 控制点), ...], 加宽后的方块数组)。
+    """
     all_points = []
     curves = []
     
@@ -158,84 +217,127 @@ def plot_full_track(a, b, k1, k2, track_width=1.0, curvature=3.0, via=None, k_vi
             mid = via
             if k_via is not None:
                 k_mid = k_via
-                pix1, curve1, ctrl1 = generate_bezier(a, mid, k1, k_mid, curvature)
-                pix2, curve2, ctrl2 = generate_bezier(mid, b, k_mid, k2, curvature)
+                pix1, curve1, ctrl1 = generate_bezier(a, mid, k1, k_mid, curvature, sampling=sampling)
+                pix2, curve2, ctrl2 = generate_bezier(mid, b, k_mid, k2, curvature, sampling=sampling)
                 all_points += pix1 + pix2
                 curves = [(curve1, ctrl1), (curve2, ctrl2)]
             else:
                 k_mid = (k1+k2)/2
-                pix1, curve1, ctrl1 = generate_bezier(a, mid, k1, k_mid, curvature)
-                pix2, curve2, ctrl2 = generate_bezier(mid, b, k_mid, k2, curvature)
+                pix1, curve1, ctrl1 = generate_bezier(a, mid, k1, k_mid, curvature, sampling=sampling)
+                pix2, curve2, ctrl2 = generate_bezier(mid, b, k_mid, k2, curvature, sampling=sampling)
                 all_points += pix1 + pix2
                 curves = [(curve1, ctrl1), (curve2, ctrl2)]
         else:
-            pix, curve, ctrl = generate_bezier(a, b, k1, k2, curvature)
+            pix, curve, ctrl = generate_bezier(a, b, k1, k2, curvature, sampling=sampling)
             all_points += pix
             curves = [(curve, ctrl)]
 
-    drawn_pixels = set()
-    for (cx, cy) in remove_duplicates(all_points):
-        half = int(track_width // 2)
-        for dx in range(-half, half + 1):
-            for dy in range(-half, half + 1):
-                drawn_pixels.add((cx + dx, cy + dy))
-
-    if drawn_pixels:
-        all_x, all_y = zip(*drawn_pixels)
-        xmin, xmax = min(all_x), max(all_x)
-        ymin, ymax = min(all_y), max(all_y)
+    centerline = remove_duplicates(all_points)
+    return centerline, curves, dilate_blocks(centerline, track_width)
+
+def plot_full_track(a, b, k1, k2, track_width=1.0, curvature=3.0, via=None, k_via=None, ground_height=0.0, use_line=False, order="xz", sampling="uniform", end_height=None, height_step=None, output_file="rail_output.txt", fig=None, step_output_file=None):
+    """
+    end_height 不为 None 时，轨道高度沿弧长从 ground_height 渐变到 end_height
+    （每格最多升降一格），坐标文件中每个方块写出各自的高度。
+    height_step 为 "slab" 或 "stair" 时（需同时给出 end_height），被 quantize_heights
+    标记的方块（半格高度处的下半砖 / 升降处的楼梯）不写入 output_file，
+    而是写入 step_output_file（默认为 output_file 加后缀，如 rail_output_slab.txt），
+    两个文件分别用普通方块与半砖 / 楼梯填充即可。
+    output_file 为 None 时不写坐标文件（多进程并发调用时由调用方使用返回值）。
+    fig: 由调用方创建的 matplotlib.figure.Figure，轨道画在其中并按轨道范围调整尺寸，
+    调用方用 fig.savefig 保存；不经过 pyplot 的全局“当前图像”，并发渲染互不干扰。
+    为 None 时画在一张临时 Figure 上（只需要坐标时）。
+    在 stage_timer.timed_request 中调用时，各阶段耗时（几何、补丁、坐标轴等）记入其中。
+    """
+    with stage("compute_track"):
+        centerline, curves, blocks = compute_track(a, b, k1, k2, track_width, curvature,
+                                          via=via, k_via=k_via, use_line=use_line, sampling=sampling)
+    drawn_pixels = blocks  # dilate_blocks 已去重，直接使用 (n, 2) 数组
+
+    if len(drawn_pixels):
+        xmin, ymin = drawn_pixels.min(axis=0).tolist()
+        xmax, ymax = drawn_pixels.max(axis=0).tolist()
         width = xmax - xmin + 1
         height = ymax - ymin + 1
         figsize = (max(6, width / 5), max(5, height / 5))
     else:
         figsize = (10, 8)
 
-    fig, ax = plt.subplots(figsize=figsize)
-    ax.set_aspect('equal')
-    ax.set_title("Rail Track with Intermediate Point & Width")
-    ax.set_xlabel("X")
-    ax.set_ylabel("Y")
-
-    for curve, ctrl in curves:
-        cx, cy = zip(*curve)
-        ax.plot(cx, cy, '-', color='black', linewidth=1)
-        if ctrl:  # 只有贝塞尔曲线有控制点
-            P0, P1, P2, P3 = ctrl
-            ax.plot(*zip(P0, P1), '--', color='gray', linewidth=1)
-            ax.plot(*zip(P2, P3), '--', color='gray', linewidth=1)
-            ax.plot(P1[0], P1[1], 'o', color='purple')
-            ax.plot(P2[0], P2[1], 'o', color='purple')
-
-    if not use_line:  # 只有曲线模式显示箭头
-        draw_arrow(ax, a, k1, color='green')
-        draw_arrow(ax, b, k2, color='green')
-
-    if via:
-        ax.plot(via[0], via[1], 'ro', label='经过点')
-        ax.text(via[0], via[1] + 3, '中间点', ha='center', color='red')
-
-    for (px, py) in drawn_pixels:
-        rect = patches.Rectangle(
-            (px - 0.5, py - 0.5), 1, 1,
-            edgecolor='blue',
-            facecolor='lightblue'
-        )
-        ax.add_patch(rect)
-
-    margin = 5
-    ax.set_xlim(xmin - margin, xmax + margin)
-    ax.set_ylim(ymin - margin, ymax + margin)
-    ax.set_xticks(range(int(xmin - margin), int(xmax + margin + 1)))
-    ax.set_yticks(range(int(ymin - margin), int(ymax + margin + 1)))
-    ax.grid(True, which='both', linestyle='--', linewidth=0.5, alpha=0.7)
-    ax.legend()
-
-    with open("rail_output.txt", "w") as f:
-        for (x, y) in sorted(drawn_pixels):
-            f.write(f"{x} {ground_height} {y}\n")
-
-    ax.legend()
-    plt.tight_layout()
+    with stage("plot_curves"):
+        if fig is None:
+            fig = Figure(figsize=figsize)
+        else:
+            fig.set_size_inches(figsize)
+        ax = fig.add_subplot()
+        ax.set_aspect('equal')
+        ax.set_title("Rail Track with Intermediate Point & Width")
+        ax.set_xlabel("X")
+        ax.set_ylabel("Y")
+
+        for curve, ctrl in curves:
+            cx, cy = zip(*curve)
+            ax.plot(cx, cy, '-', color='black', linewidth=1)
+            if ctrl:  # 只有贝塞尔曲线有控制点
+                P0, P1, P2, P3 = ctrl
+                ax.plot(*zip(P0, P1), '--', color='gray', linewidth=1)
+                ax.plot(*zip(P2, P3), '--', color='gray', linewidth=1)
+                ax.plot(P1[0], P1[1], 'o', color='purple')
+                ax.plot(P2[0], P2[1], 'o', color='purple')
+
+        if not use_line:  # 只有曲线模式显示箭头
+            draw_arrow(ax, a, k1, color='green')
+            draw_arrow(ax, b, k2, color='green')
+
+        if via:
+            ax.plot(via[0], via[1], 'ro', label='经过点')
+            ax.text(via[0], via[1] + 3, '中间点', ha='center', color='red')
+
+    with stage("patches"):
+        for (px, py) in drawn_pixels.tolist():
+            rect = patches.Rectangle(
+                (px - 0.5, py - 0.5), 1, 1,
+                edgecolor='blue',
+                facecolor='lightblue'
+            )
+            ax.add_patch(rect)
+
+    with stage("axes"):
+        margin = 5
+        ax.set_xlim(xmin - margin, xmax + margin)
+        ax.set_ylim(ymin - margin, ymax + margin)
+        ax.set_xticks(range(int(xmin - margin), int(xmax + margin + 1)))
+        ax.set_yticks(range(int(ymin - margin), int(ymax + margin + 1)))
+        ax.grid(True, which='both', linestyle='--', linewidth=0.5, alpha=0.7)
+        ax.legend()
+
+    with stage("block_order"):
+        if end_height is None:
+            ordered = sort_blocks(drawn_pixels, order)
+            rows = [(x, ground_height, y) for (x, y) in ordered.tolist()]
+        else:
+            xyz, steps = profile_blocks(centerline, track_width, ground_height, end_height, step=height_step)
+            idx = block_order(xyz[:, [0, 2]], order)
+            xyz, steps = xyz[idx], steps[idx]
+            ordered = xyz[:, [0, 2]]
+            rows = xyz[~steps].tolist()
+            step_rows = xyz[steps].tolist()
+    if output_file is not None:
+        with stage("write_coords"):
+            with open(output_file, "w") as f:
+                for (x, h, y) in rows:
+                    f.write(f"{x} {h} {y}\n")
+            if end_height is not None and height_step is not None:
+                if step_output_file is None:
+                    root, ext = os.path.splitext(output_file)
+                    step_output_file = f"{root}_{height_step}{ext}"
+                with open(step_output_file, "w") as f:
+                    for (x, h, y) in step_rows:
+                        f.write(f"{x} {h} {y}\n")
+
+    with stage("tight_layout"):
+        ax.legend()
+        fig.tight_layout()
+    return ordered
     
 if __name__ == "__main__":
     print("请输入起点坐标 a(x0, y0)：")
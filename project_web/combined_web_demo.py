@@ -1,230 +1,716 @@
 import gradio as gr
 import zipfile
-import tempfile
 import os
 import shutil
+import tempfile
 from pathlib import Path
 import threading
 import time
+import itertools
+import math
+import hashlib
+import mimetypes
+import re
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from datetime import datetime, timedelta
+from io import BytesIO
 
-from file_fill import fill_from_file
-from region_input import fill_region
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import Response, FileResponse, StreamingResponse
+from PIL import Image
+import uvicorn
 
-from angle_straight import plot_full_track
-from circle_vision_simple import draw_quarter_circle_image
+from circle_vision_simple import MAX_RADIUS, draw_quarter_circle_image
+from segment_table import segment_table
+from coord_export import EXPORT_FORMATS, available_formats, to_binary, from_binary, iter_export
+import render_worker
+from stage_timer import current, enable_logging, timed_request, stage
 
 import matplotlib
 matplotlib.use('Agg')
-import matplotlib.pyplot as plt
+import numpy as np
 import pandas as pd
-import plotly.graph_objects as go
-import zhplot
+import plotly.io as pio
 
 # === 全局配置 ===
-MAX_CONCURRENT_USERS = 5  # 最大同时访问人数
-current_users = 0
-current_users_lock = threading.Lock()
-
-# === 临时文件管理器 ===
-class TempFileManager:
-    def __init__(self):
-        self.temp_files = []
+JOB_WORKERS = max(2, os.cpu_count() or 2)  # 计算任务线程数
+JOB_TIMEOUT_SECONDS = 120  # 单个任务开始运行后的超时时间
+JOB_POLL_SECONDS = 0.5  # 等待任务时刷新排队状态的间隔
+MAX_JOB_COST = 20_000_000  # 单个任务允许的估算工作量（约等于方块数）
+MAX_QUEUED_COST = 80_000_000  # 排队与运行中任务的估算工作量总和上限
+MAX_WAITING_REQUESTS = 64  # 同时等待结果的请求数（Gradio 并发上限）
+RENDER_WORKERS = JOB_WORKERS  # 渲染进程数，与计算任务线程数一致
+RENDER_POLL_SECONDS = 0.1  # 等待渲染结果时检查任务是否已取消或超时的间隔
+ARTIFACT_MAX_AGE_MINUTES = 30  # 生成结果在最后一次访问后的保留时间
+ARTIFACT_MEMORY_BYTES = 256 * 1024 * 1024  # 内存中生成结果的总字节数上限
+ARTIFACT_SPILL_DIR = os.environ.get("SMCT_ARTIFACT_SPILL_DIR")  # 设置后，超出内存上限的结果转存到该目录
+ARTIFACT_SPILL_BYTES = 2 * 1024 * 1024 * 1024  # 转存目录的总字节数上限
+TRACK_CACHE_SIZE = 64  # 轨道结果缓存条目上限
+MAX_SEGMENT_CSV_RADIUS = 5000  # 线段组 CSV 导出的最大半径
+TIMING_LOG = os.environ.get("SMCT_TIMING_LOG", "1") != "0"  # 每次生成输出一行分阶段耗时日志
+TIMING_HEADERS = ["阶段", "耗时 (ms)", "占比 (%)", "次数"]  # 调试面板中耗时表的表头
+
+# === 生成结果存储 ===
+class ArtifactStore:
+    """
+    生成结果（坐标文件、HTML、CSV 等）的内存存储，以内容的 SHA-256 为键：
+    相同内容只保存一份，通过 /artifacts/<键>/<文件名> 下载。
+    条目按最后访问时间排序（LRU），总字节数超过上限时淘汰最久未访问的条目；
+    配置了转存目录时，被淘汰的条目先写入磁盘，磁盘部分同样有字节上限。
+    由于所有条目的保留时间相同，过期条目总在队首，每次操作只需从队首弹出。
+    磁盘读写都在锁外进行。
+    """
+    def __init__(self, memory_bytes=ARTIFACT_MEMORY_BYTES, spill_dir=ARTIFACT_SPILL_DIR,
+                 spill_bytes=ARTIFACT_SPILL_BYTES, max_age_minutes=ARTIFACT_MAX_AGE_MINUTES):
+        self.memory_bytes = memory_bytes
+        self.spill_dir = spill_dir
+        self.spill_bytes = spill_bytes
+        self.max_age = max_age_minutes * 60
+        self.memory = OrderedDict()  # 键 -> (最后访问时间, bytes)
+        self.spilled = OrderedDict()  # 键 -> (最后访问时间, 文件路径, 字节数)
+        self.memory_used = 0
+        self.spill_used = 0
         self.lock = threading.Lock()
-        
-    def add_file(self, file_path):
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+
+    def put(self, data) -> str:
+        """保存 bytes 或 str（按 UTF-8 编码），返回内容哈希键"""
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        key = hashlib.sha256(data).hexdigest()[:32]
         with self.lock:
-            self.temp_files.append({
-                'path': file_path,
-                'created_at': datetime.now()
-            })
-            
-    def cleanup_old_files(self, max_age_minutes=30):
-        """清理超过指定时间的临时文件"""
+            now = time.monotonic()
+            removed = self._expire(now)
+            if key in self.memory:
+                self.memory[key] = (now, self.memory[key][1])
+                self.memory.move_to_end(key)
+            elif key in self.spilled:
+                _, path, size = self.spilled[key]
+                self.spilled[key] = (now, path, size)
+                self.spilled.move_to_end(key)
+            else:
+                self.memory[key] = (now, data)
+                self.memory_used += len(data)
+            # 刚放入的条目本身不淘汰，保证返回的链接至少可以下载一次
+            victims = []
+            while self.memory_used > self.memory_bytes and len(self.memory) > 1:
+                old_key, (_, old_data) = self.memory.popitem(last=False)
+                self.memory_used -= len(old_data)
+                victims.append((old_key, old_data))
+        self._unlink(removed)
+        if self.spill_dir:
+            for victim_key, victim_data in victims:
+                self._spill(victim_key, victim_data)
+        return key
+
+    def _spill(self, key, data):
+        """把被淘汰的条目写入转存目录（锁外写文件，写完再登记）"""
+        if len(data) > self.spill_bytes:
+            return
+        # 每次转存使用独立的文件名，同一键被并发转存时互不覆盖
+        fd, path = tempfile.mkstemp(dir=self.spill_dir, prefix=key + "_")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        with self.lock:
+            if key in self.memory or key in self.spilled:
+                # 写文件期间该键又被放回内存或已由其他线程转存：这份文件不再需要
+                removed = [path]
+            else:
+                # 转存时刷新访问时间，使队列仍按访问时间有序
+                self.spilled[key] = (time.monotonic(), path, len(data))
+                self.spill_used += len(data)
+                removed = []
+                while self.spill_used > self.spill_bytes and self.spilled:
+                    _, (_, old_path, size) = self.spilled.popitem(last=False)
+                    self.spill_used -= size
+                    removed.append(old_path)
+        self._unlink(removed)
+
+    def _expire(self, now):
+        """弹出队首的过期条目（调用方持有锁），返回需要删除的转存文件"""
+        while self.memory:
+            key, (touched, data) = next(iter(self.memory.items()))
+            if now - touched <= self.max_age:
+                break
+            del self.memory[key]
+            self.memory_used -= len(data)
+        removed = []
+        while self.spilled:
+            key, (touched, path, size) = next(iter(self.spilled.items()))
+            if now - touched <= self.max_age:
+                break
+            del self.spilled[key]
+            self.spill_used -= size
+            removed.append(path)
+        return removed
+
+    @staticmethod
+    def _unlink(paths):
+        for path in paths:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+    def get(self, key):
+        """返回 bytes（内存中）、文件路径（已转存）或 None（不存在或已过期），并刷新访问时间"""
+        with self.lock:
+            now = time.monotonic()
+            removed = self._expire(now)
+            if key in self.memory:
+                result = self.memory[key][1]
+                self.memory[key] = (now, result)
+                self.memory.move_to_end(key)
+            elif key in self.spilled:
+                _, result, size = self.spilled[key]
+                self.spilled[key] = (now, result, size)
+                self.spilled.move_to_end(key)
+            else:
+                result = None
+        self._unlink(removed)
+        return result
+
+    def touch(self, keys):
+        """
+        确认 keys 全部仍在存储中，并一起刷新它们的访问时间（在同一次加锁内完成，
+        检查之后不会被单独淘汰）。任何一个已不存在时返回 False，且不刷新。
+        """
+        with self.lock:
+            now = time.monotonic()
+            removed = self._expire(now)
+            present = all(k in self.memory or k in self.spilled for k in keys)
+            if present:
+                for key in keys:
+                    if key in self.memory:
+                        self.memory[key] = (now, self.memory[key][1])
+                        self.memory.move_to_end(key)
+                    else:
+                        _, path, size = self.spilled[key]
+                        self.spilled[key] = (now, path, size)
+                        self.spilled.move_to_end(key)
+        self._unlink(removed)
+        return present
+
+    def __contains__(self, key):
+        with self.lock:
+            removed = self._expire(time.monotonic())
+            present = key in self.memory or key in self.spilled
+        self._unlink(removed)
+        return present
+
+    def clear(self):
+        """清空存储并删除全部转存文件"""
+        with self.lock:
+            paths = [path for _, path, _ in self.spilled.values()]
+            self.memory.clear()
+            self.spilled.clear()
+            self.memory_used = self.spill_used = 0
+        self._unlink(paths)
+
+artifact_store = ArtifactStore()
+
+def artifact_link(key, filename, label):
+    """artifact_store 中的生成结果（以 put 返回的键指定）的下载链接 HTML"""
+    return f'<a href="/artifacts/{key}/{filename}" download="{filename}">⬇️ {label}</a>'
+
+def coords_links(key, prefix, label):
+    """
+    artifact_store 中二进制坐标格式的方块坐标（以 put 返回的键指定）的各导出格式下载链接 HTML。
+    文件名带内容哈希，同样的坐标总是同一个地址，浏览器与代理可以直接缓存。
+    """
+    links = [f'<a href="/coords/{key}/{prefix}_{key[:12]}.{fmt}" download="{prefix}_{key[:12]}.{fmt}">.{fmt}</a>'
+             for fmt in available_formats()]
+    return f"⬇️ {label}：" + " ｜ ".join(links)
+
+# === 轨道结果缓存 ===
+class TrackResultCache:
+    """
+    以归一化参数为键的轨道计算结果缓存（LRU + 过期时间）。
+    缓存值引用 artifact_store 中的生成结果，因此过期时间与其保留时间一致；
+    命中时确认这些结果全部仍在存储中并一起刷新访问时间，
+    避免某个文件已被淘汰、下载链接失效。
+    """
+    def __init__(self, max_size=TRACK_CACHE_SIZE, ttl_minutes=ARTIFACT_MAX_AGE_MINUTES):
+        self.max_size = max_size
+        self.ttl = timedelta(minutes=ttl_minutes)
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            created_at, result, keys = entry
+            expired = datetime.now() - created_at > self.ttl
+            if expired or not artifact_store.touch(keys):
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return result
+
+    def put(self, key, result, keys):
+        with self.lock:
+            self.entries[key] = (datetime.now(), result, list(keys))
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+track_cache = TrackResultCache()
+
+# === 计算任务调度 ===
+class JobRejected(Exception):
+    """任务因工作量超限而未被接受"""
+
+class JobCancelled(Exception):
+    """任务已被取消或超时，其渲染进程已被终止"""
+
+_job_local = threading.local()
+
+def current_job():
+    """当前计算线程正在运行的任务，不在任务中时为 None"""
+    return getattr(_job_local, "job", None)
+
+class Job:
+    def __init__(self, job_id, fn, args, cost, timeout):
+        self.id = job_id
+        self.fn = fn
+        self.args = args
+        self.cost = cost
+        self.timeout = timeout
+        self.started_at = None
+        self.future = None
+        self.cancelled = threading.Event()
+        self.released = False  # 工作量是否已归还
+
+    def stopped(self):
+        """任务已被取消，或开始运行后超过了超时时间"""
+        return self.cancelled.is_set() or (
+            self.started_at is not None and time.monotonic() - self.started_at > self.timeout)
+
+class JobScheduler:
+    """
+    按估算工作量（而不是在线人数）接纳计算任务的调度器。
+    任务进入有界线程池排队执行；排队与运行中任务的工作量总和超过上限时拒绝新任务。
+    提供排队位置、超时与取消：尚未开始的任务直接移出队列；已开始的任务由 RenderPool
+    在等待渲染结果时发现（见 Job.stopped）并终止其渲染进程。取消时立即归还工作量，
+    超时的任务在渲染进程被终止、计算线程退出时归还。
+    """
+    def __init__(self, workers=JOB_WORKERS, max_job_cost=MAX_JOB_COST, max_queued_cost=MAX_QUEUED_COST,
+                 timeout=JOB_TIMEOUT_SECONDS):
+        self.workers = workers
+        self.max_job_cost = max_job_cost
+        self.max_queued_cost = max_queued_cost
+        self.timeout = timeout
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+        self.pending = OrderedDict()  # 尚未开始的任务，按提交顺序
+        self.running = set()
+        self.queued_cost = 0
+        self.ids = itertools.count(1)
+        self.lock = threading.Lock()
+
+    def submit(self, fn, *args, cost=1):
+        cost = max(1, int(cost))
+        if cost > self.max_job_cost:
+            raise JobRejected(f"任务规模过大（估算 {cost} 格，上限 {self.max_job_cost}），请缩小参数或使用本地版本。")
+        with self.lock:
+            if self.queued_cost + cost > self.max_queued_cost:
+                raise JobRejected("当前服务器任务繁忙，请稍后再试。\n建议下载本地版本使用：https://github.com/regivsbannia/Slim_MCBE_Curve_Tool")
+            job = Job(next(self.ids), fn, args, cost, self.timeout)
+            self.pending[job.id] = job
+            self.queued_cost += cost
+            job.future = self.executor.submit(self._run, job)
+        job.future.add_done_callback(lambda _: self._finish(job))
+        return job
+
+    def _run(self, job):
+        with self.lock:
+            self.pending.pop(job.id, None)
+            if job.cancelled.is_set():
+                raise JobCancelled()
+            self.running.add(job.id)
+            job.started_at = time.monotonic()
+        _job_local.job = job
+        try:
+            return job.fn(*job.args)
+        finally:
+            _job_local.job = None
+
+    def _finish(self, job):
+        with self.lock:
+            self.pending.pop(job.id, None)
+            self.running.discard(job.id)
+        self._release(job)
+
+    def _release(self, job):
+        """归还任务的工作量（只归还一次）"""
+        with self.lock:
+            if not job.released:
+                job.released = True
+                self.queued_cost -= job.cost
+
+    def position(self, job):
+        """排在该任务之前、尚未开始的任务数；任务已开始时为 0"""
+        with self.lock:
+            if job.id not in self.pending:
+                return 0
+            return list(self.pending).index(job.id)
+
+    def cancel(self, job):
+        """取消任务并立即归还工作量：未开始的移出队列，已开始的由 RenderPool 终止其渲染进程"""
+        job.cancelled.set()
+        if not job.future.cancel():
+            self._release(job)
+
+    def summary(self):
         with self.lock:
-            now = datetime.now()
-            to_remove = []
-            for file_info in self.temp_files:
-                if os.path.exists(file_info['path']):
-                    file_age = now - file_info['created_at']
-                    if file_age > timedelta(minutes=max_age_minutes):
-                        try:
-                            os.unlink(file_info['path'])
-                            to_remove.append(file_info)
-                        except:
-                            pass
-            for file_info in to_remove:
-                self.temp_files.remove(file_info)
-                
-    def cleanup_all(self):
-        """清理所有临时文件"""
+            return (f"计算线程：{len(self.running)}/{self.workers} 运行中，"
+                    f"{len(self.pending)} 个任务排队")
+
+scheduler = JobScheduler()
+
+# === 渲染进程池 ===
+class RenderProcess:
+    """一个渲染进程（运行 render_worker.serve），通过管道逐个执行任务，可以单独终止"""
+    def __init__(self, context):
+        self.conn, child = context.Pipe()
+        self.process = context.Process(target=render_worker.serve, args=(child,), daemon=True)
+        self.process.start()
+        child.close()
+
+    def call(self, fn, args, stopped=None):
+        """
+        执行 fn(*args) 并返回结果。stopped() 为真时终止本进程并抛出 JobCancelled；
+        进程异常退出时抛出 EOFError。
+        """
+        self.conn.send((fn, args))
+        while not self.conn.poll(RENDER_POLL_SECONDS):
+            if stopped is not None and stopped():
+                self.terminate()
+                raise JobCancelled()
+            if not self.process.is_alive():
+                raise EOFError()
+        ok, value = self.conn.recv()
+        if not ok:
+            raise value
+        return value
+
+    def terminate(self):
+        self.conn.close()
+        self.process.terminate()
+        self.process.join(timeout=5)
+
+class RenderPool:
+    """
+    预热的渲染进程池：matplotlib、zhplot、plotly 在子进程中预先导入并画过一张图，
+    计算与渲染都在子进程中完成，只把 PNG 字节、坐标数组等结果传回，
+    多个用户的渲染不再争抢主进程的 GIL。
+    每个进程同一时间只执行一个任务；任务被取消或超时时只终止执行它的那个进程，
+    进程异常退出时同样换一个新进程，其他进程中的任务不受影响。
+    进程在第一次使用（或 start）时才创建，导入本模块不会启动任何进程。
+    """
+    def __init__(self, workers=RENDER_WORKERS):
+        self.workers = workers
+        self.lock = threading.Lock()
+        self.slots = threading.Semaphore(workers)
+        self.idle = []  # 空闲的渲染进程
+        self.context = None
+
+    @staticmethod
+    def _context():
+        # 主进程运行着 Web 服务器的多个线程，fork 出的子进程可能继承被其他线程持有的锁，
+        # 因此用 forkserver（Windows 等不支持时用 spawn）。forkserver 预先导入 render_worker，
+        # 各渲染进程从它 fork 出来，共享已导入的 matplotlib、plotly 等模块。
+        # 两种方式下子进程都会重新导入主脚本（以 __mp_main__ 为名），所以主脚本导入时不能启动进程
+        if "forkserver" in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context("forkserver")
+            context.set_forkserver_preload(["render_worker"])
+            return context
+        return multiprocessing.get_context("spawn")
+
+    def start(self):
+        """启动全部渲染进程（已启动时不做任何事），进程在后台完成预热"""
         with self.lock:
-            for file_info in self.temp_files:
-                if os.path.exists(file_info['path']):
-                    try:
-                        os.unlink(file_info['path'])
-                    except:
-                        pass
-            self.temp_files.clear()
-
-temp_manager = TempFileManager()
-
-# 启动后台清理线程
-def cleanup_daemon():
-    while True:
-        time.sleep(300)  # 每5分钟清理一次
-        temp_manager.cleanup_old_files()
-
-cleanup_thread = threading.Thread(target=cleanup_daemon, daemon=True)
-cleanup_thread.start()
-
-# === 用户访问控制 ===
-def check_user_limit():
-    """检查是否超过用户限制"""
-    global current_users
-    with current_users_lock:
-        if current_users >= MAX_CONCURRENT_USERS:
-            return False, "当前服务器访问人数过多，请稍后再试。\n建议下载本地版本使用：https://github.com/regivsbannia/Slim_MCBE_Curve_Tool"
-        current_users += 1
-        return True, f"欢迎使用！当前在线用户：{current_users}/{MAX_CONCURRENT_USERS}"
-
-def release_user():
-    """释放用户计数"""
-    global current_users
-    with current_users_lock:
-        if current_users > 0:
-            current_users -= 1
+            if self.context is None:
+                self.context = self._context()
+                self.idle = [RenderProcess(self.context) for _ in range(self.workers)]
+
+    def run(self, fn, *args):
+        """
+        在渲染进程中执行 fn(*args) 并等待结果。在计算任务中调用时，
+        任务被取消或超时（current_job().stopped()）会终止该渲染进程并抛出 JobCancelled。
+        """
+        self.start()
+        job = current_job()
+        stopped = job.stopped if job is not None else None
+        while not self.slots.acquire(timeout=RENDER_POLL_SECONDS):
+            if stopped is not None and stopped():
+                raise JobCancelled()
+        try:
+            with self.lock:
+                worker = self.idle.pop() if self.idle else RenderProcess(self.context)
+            try:
+                result = worker.call(fn, args, stopped)
+            except (JobCancelled, EOFError, OSError) as e:
+                worker.terminate()
+                with self.lock:
+                    self.idle.append(RenderProcess(self.context))  # 立即补上一个新进程并开始预热
+                if isinstance(e, JobCancelled):
+                    raise
+                raise RuntimeError("渲染进程异常退出（可能是内存不足），请缩小参数后重试。")
+            with self.lock:
+                self.idle.append(worker)
+            return result
+        finally:
+            self.slots.release()
+
+    def shutdown(self):
+        with self.lock:
+            workers, self.idle = self.idle, []
+        for worker in workers:
+            worker.terminate()
+
+render_pool = RenderPool()
+
+def run_job(fn, args, cost, n_outputs):
+    """
+    Gradio 生成器处理函数的公共部分：提交任务并等待结果。
+    等待期间输出排队状态（其余 n_outputs 个输出保持不变），最后输出结果与完成状态。
+    用户取消或页面关闭导致生成器被关闭时，会一并取消尚未完成的任务。
+    """
+    try:
+        job = scheduler.submit(fn, *args, cost=cost)
+    except JobRejected as e:
+        raise gr.Error(str(e))
+    unchanged = tuple(gr.update() for _ in range(n_outputs))
+    try:
+        while True:
+            try:
+                result = job.future.result(timeout=JOB_POLL_SECONDS)
+                break
+            except FutureTimeoutError:
+                pass
+            if job.started_at is None:
+                status = f"⏳ 排队中，前面还有 {scheduler.position(job)} 个任务……"
+            elif job.stopped():
+                raise gr.Error(f"任务超过 {scheduler.timeout} 秒未完成，已放弃，请缩小参数后重试。")
+            else:
+                status = f"⚙️ 计算中（已用 {time.monotonic() - job.started_at:.0f} 秒）……"
+            yield unchanged + (status,)
+    finally:
+        if not job.future.done():
+            scheduler.cancel(job)
+    yield tuple(result) + ("✅ 完成",)
 
 # === 火车轨道设计 & 像素圆功能 ===
 
 def generate_track_design(mode, x0, y0, x1, y1, k1, k2,
                           track_width, curvature, ground_height,
                           use_mid_point, xm, ym, k_mid):
-    # 检查用户限制
-    allowed, msg = check_user_limit()
-    if not allowed:
-        raise gr.Error(msg)
-    
+    params = normalize_track_params(mode, x0, y0, x1, y1, k1, k2,
+                                    track_width, curvature, ground_height,
+                                    use_mid_point, xm, ym, k_mid)
+    cached = track_cache.get(params)
+    if cached is not None:
+        with timed_request("generate_track_design") as timings:
+            with stage("track_cache_hit"):
+                outputs = track_outputs(cached)
+        if outputs is not None:
+            yield outputs + (timings.rows(), "✅ 完成（缓存）")
+            return
     try:
-        html_file = None
-        plotly_fig = None
-        coords = pd.DataFrame(columns=['X', 'Height', 'Y'])
-
-        def safe_convert(s):
-            try:
-                return float('inf') if str(s).lower() == "inf" else float(s)
-            except:
-                return 0.0
-
-        use_line = (mode == "直线模式")
-        k1 = 0.0 if use_line else safe_convert(k1)
-        k2 = 0.0 if use_line else safe_convert(k2)
-
-        k_mid_converted = None
-        if use_mid_point:
-            if use_line:
-                k_mid_converted = 0.0
-            elif k_mid is not None and str(k_mid).strip():
-                k_mid_converted = safe_convert(k_mid)
-
-        via = (xm, ym) if use_mid_point else None
-        k_via = k_mid_converted if use_mid_point else None
-        effective_curvature = 3.0 if use_line else curvature
-
-        fig = plt.figure(figsize=(10, 8))
-        ax = fig.add_subplot(111)
-
-        plot_full_track(
-            (x0, y0), (x1, y1),
-            k1, k2,
-            track_width,
-            effective_curvature,
-            via=via,
-            k_via=k_via,
-            ground_height=ground_height,
-            use_line=use_line
-        )
-
-        static_img = tempfile.NamedTemporaryFile(suffix=".png", delete=False)
-        plt.savefig(static_img.name, bbox_inches='tight', dpi=100)
-        plt.close(fig)
-        temp_manager.add_file(static_img.name)
-
-        coord_file = "rail_output.txt"
-        if os.path.exists(coord_file):
-            coords = pd.read_csv(coord_file, sep=' ', header=None, names=['X', 'Height', 'Y'])
-            shapes, hover_x, hover_y, hover_text = [], [], [], []
-            for row in coords.itertuples(index=False):
-                x, height, y = row
-                shapes.append(dict(
-                    type="rect",
-                    x0=x - 0.5, x1=x + 0.5,
-                    y0=y - 0.5, y1=y + 0.5,
-                    line=dict(color="blue", width=0.5),
-                    fillcolor="lightblue"
-                ))
-                hover_x.append(x)
-                hover_y.append(y)
-                hover_text.append(f"X: {x}, Y: {y}, 高度: {height}")
-
-            plotly_fig = go.Figure()
-            plotly_fig.add_trace(go.Scatter(
-                x=hover_x,
-                y=hover_y,
-                mode='markers',
-                marker=dict(size=8, color='rgba(0,0,0,0)'),
-                hoverinfo='text',
-                text=hover_text,
-                showlegend=False
-            ))
-            plotly_fig.update_layout(
-                title="轨道像素图（交互）",
-                xaxis=dict(title="X 坐标", gridcolor='lightgray', scaleanchor="y", scaleratio=1),
-                yaxis=dict(title="Y 坐标", gridcolor='lightgray'),
-                shapes=shapes,
-                height=600,
-                hovermode='closest'
-            )
-
-            html_file = tempfile.NamedTemporaryFile(suffix=".html", delete=False)
-            plotly_fig.write_html(html_file.name)
-            html_file.close()
-            temp_manager.add_file(html_file.name)
-
-        temp_coord_file = tempfile.NamedTemporaryFile(suffix=".txt", delete=False)
-        coords.to_csv(temp_coord_file.name, sep=' ', index=False, header=False)
-        temp_coord_file.close()
-        temp_manager.add_file(temp_coord_file.name)
-
-        return static_img.name, temp_coord_file.name, html_file.name if html_file else None, coords.round(2).values.tolist(), plotly_fig
-
+        yield from run_job(cached_track_design, (params,), estimate_track_cost(params), 6)
+    except gr.Error:
+        raise
     except Exception as e:
-        release_user()  # 出错时释放用户计数
         raise gr.Error(f"生成轨道设计时出错: {str(e)}")
 
+def cached_track_design(params):
+    """在计算线程中运行：计算轨道并写入结果缓存，另返回各阶段耗时表"""
+    with timed_request("generate_track_design") as timings:
+        result = compute_track_design(*params)
+        track_cache.put(params, result, result[0])
+        with stage("track_outputs"):
+            outputs = track_outputs(result)
+    if outputs is None:
+        raise RuntimeError("生成结果已被清理，请重试。")
+    return outputs + (timings.rows(),)
+
+def track_outputs(result):
+    """把缓存的轨道结果（静态图以存储键保存）转换为界面输出；静态图已不在存储中时返回 None"""
+    keys, coords_link, html_link, table, plotly_fig = result
+    png = artifact_store.get(keys[0])
+    if png is None:
+        return None
+    return Image.open(BytesIO(png)), coords_link, html_link, table, plotly_fig
+
+def estimate_track_cost(params):
+    """按路径长度 × 宽度估算轨道方块数，作为调度的工作量"""
+    use_line, a, b, _, _, track_width, _, _, via, _ = params
+    stops = [a] + ([via] if via else []) + [b]
+    length = sum(math.dist(p, q) for p, q in zip(stops, stops[1:]))
+    return (length + 1) * max(track_width, 1)
+
+def normalize_track_params(mode, x0, y0, x1, y1, k1, k2,
+                           track_width, curvature, ground_height,
+                           use_mid_point, xm, ym, k_mid):
+    """
+    把界面输入转换为计算用参数，并去掉与当前模式无关的字段，
+    返回可哈希的元组，同时作为结果缓存的键：
+    (use_line, a, b, k1, k2, track_width, curvature, ground_height, via, k_via)
+    """
+    def safe_convert(s):
+        try:
+            return float('inf') if str(s).lower() == "inf" else float(s)
+        except:
+            return 0.0
+
+    def num(v):
+        return round(float(v or 0.0), 6)
+
+    use_line = (mode == "直线模式")
+    k1 = 0.0 if use_line else safe_convert(k1)
+    k2 = 0.0 if use_line else safe_convert(k2)
+
+    k_mid_converted = None
+    if use_mid_point:
+        if use_line:
+            k_mid_converted = 0.0
+        elif k_mid is not None and str(k_mid).strip():
+            k_mid_converted = safe_convert(k_mid)
+
+    via = (num(xm), num(ym)) if use_mid_point else None
+    k_via = k_mid_converted if use_mid_point else None
+    effective_curvature = 3.0 if use_line else num(curvature)
+
+    return (use_line, (num(x0), num(y0)), (num(x1), num(y1)), k1, k2,
+            int(track_width), effective_curvature, num(ground_height), via, k_via)
+
+def compute_track_design(use_line, a, b, k1, k2, track_width, effective_curvature,
+                         ground_height, via, k_via):
+    """
+    根据归一化参数在渲染进程中计算轨道，静态图、交互图 HTML 和坐标文件存入 artifact_store。
+    返回 ((静态图, 坐标, HTML 的存储键), 坐标文件链接, HTML 链接, 坐标表, 交互图)。
+    """
+    with stage("render_process"):  # 含排队等待渲染进程与结果传回的时间
+        rendered = render_pool.run(render_worker.render_track, use_line, a, b, k1, k2, track_width,
+                                   effective_curvature, ground_height, via, k_via)
+    if current() is not None:
+        current().merge(rendered["timings"], prefix="render_process")
+
+    with stage("pandas_table"):
+        c = rendered["coords"]
+        coords = pd.DataFrame({'X': c[:, 0].astype(int), 'Height': c[:, 1], 'Y': c[:, 2].astype(int)})
+        table = coords.round(2).values.tolist()
+    with stage("plotly_from_json"):
+        plotly_fig = pio.from_json(rendered["plotly_json"])
+
+    with stage("artifact_store"):
+        png_key = artifact_store.put(rendered["png"])
+        html_key = artifact_store.put(rendered["html"])
+        # 方块坐标为整数，高度四舍五入到整格
+        coords_key = artifact_store.put(to_binary(np.round(c).astype(np.int64)))
+        html_link = artifact_link(html_key, "rail_track.html", "下载 HTML 可视化")
+        coords_link = coords_links(coords_key, "rail", "下载 坐标 文件")
+
+    return (png_key, coords_key, html_key), coords_link, html_link, table, plotly_fig
+
 def gradio_draw_quarter_circle(r):
-    allowed, msg = check_user_limit()
-    if not allowed:
-        raise gr.Error(msg)
-    try:
-        return draw_quarter_circle_image(r)
-    finally:
-        release_user()
+    r = r or 0
+    yield from run_job(draw_quarter_circle, (r,), 2 * abs(r), 2)
+
+def draw_quarter_circle(r):
+    if not 1 <= r <= MAX_RADIUS or r != int(r):
+        return draw_quarter_circle_image(r)  # 只返回错误提示，不计算、不写入线段组表
+    return render_pool.run(draw_quarter_circle_image, int(r), segment_table.get(int(r)))
+
+def export_segment_csv(max_radius):
+    """导出 1..max_radius 的线段组 CSV 表"""
+    max_radius = int(max_radius or 0)
+    if not 1 <= max_radius <= MAX_SEGMENT_CSV_RADIUS:
+        raise gr.Error(f"请输入 1 ~ {MAX_SEGMENT_CSV_RADIUS} 之间的最大半径。")
+    yield from run_job(write_segment_csv, (max_radius,), max_radius * max_radius // 2, 1)
+
+def write_segment_csv(max_radius):
+    link = artifact_link(artifact_store.put(segment_table.csv_text(max_radius)), f"segments_1_{max_radius}.csv",
+                         "下载 线段组 表 (.csv)")
+    return (link,)
+
+def gradio_draw_ellipse(a, b, exponent, width, fill, height):
+    a, b, width = abs(int(a or 0)), abs(int(b or 0)), max(int(width or 1), 1)
+    inner = 0 if fill else max(a - width, 0) * max(b - width, 0)
+    cost = math.pi * (a * b - inner) + a + b
+    yield from run_job(draw_ellipse, (a, b, exponent, width, fill, height), cost, 3)
+
+def draw_ellipse(a, b, exponent, width, fill, height):
+    image, info, data = render_pool.run(render_worker.render_ellipse, a, b, exponent,
+                                        width, fill, height)
+    if data is None:
+        return image, info, ""
+    return image, info, coords_links(artifact_store.put(data), f"ellipse_{a}x{b}", "下载 坐标")
+
+# === 生成结果下载 ===
+app = FastAPI()
+
+@app.get("/artifacts/{key}/{filename}")
+def download_artifact(key: str, filename: str):
+    if not re.fullmatch(r"[0-9a-f]{32}", key) or not re.fullmatch(r"[\w.\-]+", filename):
+        raise HTTPException(status_code=404)
+    data = artifact_store.get(key)
+    if data is None:
+        raise HTTPException(status_code=404, detail="文件已过期，请重新生成")
+    media_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    if isinstance(data, bytes):
+        return Response(data, media_type=media_type,
+                        headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+    return FileResponse(data, media_type=media_type, filename=filename)
+
+@app.get("/coords/{key}/{filename}")
+def download_coords_file(key: str, filename: str, request: Request):
+    """按文件名的扩展名把保存的坐标流式转换为对应格式；内容由键决定，允许长期缓存"""
+    fmt = filename.split(".", 1)[1] if "." in filename else ""
+    if (not re.fullmatch(r"[0-9a-f]{32}", key) or not re.fullmatch(r"[\w.\-]+", filename)
+            or fmt not in available_formats()):
+        raise HTTPException(status_code=404)
+    etag = f'"{key}-{fmt}"'
+    headers = {"Cache-Control": f"public, max-age={ARTIFACT_MAX_AGE_MINUTES * 60}, immutable",
+               "ETag": etag}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    data = artifact_store.get(key)
+    if data is None:
+        raise HTTPException(status_code=404, detail="文件已过期，请重新生成")
+    if not isinstance(data, bytes):
+        with open(data, "rb") as f:
+            data = f.read()
+    headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return StreamingResponse(iter_export(from_binary(data), fmt),
+                             media_type=EXPORT_FORMATS[fmt][2], headers=headers)
 
 # === Gradio 界面整合 ===
 
-with gr.Blocks(theme=gr.themes.Soft(), title="Slim MCBE Curve Tool ") as demo:
+# Gradio 自己缓存的图片同样按保留时间清理
+with gr.Blocks(theme=gr.themes.Soft(), title="Slim MCBE Curve Tool ",
+               delete_cache=(300, ARTIFACT_MAX_AGE_MINUTES * 60)) as demo:
     gr.Markdown("# Slim MCBE Curve Tool  |  轻量级MCBE曲线工具")
     gr.Markdown("*Thanks to [Amulet](https://www.amuletmc.com/)*")
     gr.Markdown("""
     ⚠️ **重要提示**：
-    1. 临时文件会在30分钟后自动清理，请及时下载需要的文件
+    1. 生成的文件在30分钟未访问后自动清理，请及时下载需要的文件
     2. 关闭或刷新页面后，生成的文件将无法再次访问
     3. 建议下载本地版本以获得更好的性能和稳定性
     """)
     
-    # 用户计数器显示
-    user_counter = gr.Markdown(f"当前在线用户：{current_users}/{MAX_CONCURRENT_USERS}")
+    # 服务器任务状态显示
+    server_status = gr.Markdown(scheduler.summary())
+    gr.Timer(5).tick(fn=scheduler.summary, outputs=server_status)
     
     with gr.Tabs():
 
@@ -251,9 +737,12 @@ with gr.Blocks(theme=gr.themes.Soft(), title="Slim MCBE Curve Tool ") as demo:
                                 ym = gr.Number(label="中间点 Z", value=30.0)
                                 k_mid = gr.Textbox(label="中间点 斜率", value=None)
                             use_mid_point.change(fn=lambda x: gr.update(visible=x), inputs=use_mid_point, outputs=mid_col)
-                            submit_btn = gr.Button("生成 轨道 图", variant="primary")
+                            with gr.Row():
+                                submit_btn = gr.Button("生成 轨道 图", variant="primary")
+                                track_cancel = gr.Button("取消")
+                            track_status = gr.Markdown()
                         with gr.Column(scale=2):
-                            output_plot = gr.Image(label="轨道 静态 图")
+                            output_plot = gr.Image(type="pil", format="png", label="轨道 静态 图")
                             gr.Markdown("### 下载txt坐标文件后上传至本地版本进行世界编辑")
                             gr.Markdown("⚠️ **注意：文件将在30分钟后自动删除，请及时下载**")
                             with gr.Tabs():
@@ -262,8 +751,11 @@ with gr.Blocks(theme=gr.themes.Soft(), title="Slim MCBE Curve Tool ") as demo:
                                     coord_table = gr.Dataframe(label="轨道 坐标", headers=["X","高度","Z"],
                                                                datatype=["number","number","number"], col_count=3)
                                 with gr.TabItem("下载 区域"):
-                                    download_coords = gr.File(label="下载 坐标 文件 (.txt)")
-                                    download_html = gr.File(label="下载 HTML 可视化")
+                                    download_coords = gr.HTML()
+                                    download_html = gr.HTML()
+                                with gr.TabItem("调试"):
+                                    timing_table = gr.Dataframe(label="各阶段 耗时（最近一次生成）", headers=TIMING_HEADERS,
+                                                                datatype=["str","number","number","number"], col_count=4)
 
                     # 动态显示/隐藏曲线相关参数
                     def update_mode_ui(mode):
@@ -292,31 +784,50 @@ with gr.Blocks(theme=gr.themes.Soft(), title="Slim MCBE Curve Tool ") as demo:
                         ],
                         inputs=[mode, x0, y0, x1, y1, k1, k2, track_width, curvature, ground_height, 
                             use_mid_point, xm, ym, k_mid],
-                        outputs=[output_plot, download_coords, download_html, coord_table, plotly_output],
+                        outputs=[output_plot, download_coords, download_html, coord_table, plotly_output, timing_table, track_status],
                         fn=generate_track_design,
                         cache_examples=False
                     )
                     
-                    def generate_and_release(*args, **kwargs):
-                        try:
-                            result = generate_track_design(*args, **kwargs)
-                            return result
-                        finally:
-                            release_user()
-                    
-                    submit_btn.click(
-                        fn=generate_and_release,
+                    track_event = submit_btn.click(
+                        fn=generate_track_design,
                         inputs=[mode, x0, y0, x1, y1, k1, k2, track_width,
                                 curvature, ground_height, use_mid_point, xm, ym, k_mid],
-                        outputs=[output_plot, download_coords, download_html, coord_table, plotly_output]
+                        outputs=[output_plot, download_coords, download_html, coord_table, plotly_output, timing_table, track_status]
                     )
+                    track_cancel.click(fn=None, cancels=[track_event])
 
                 with gr.TabItem("🔵 像素圆"):
                     radius_input = gr.Number(label="半径", value=50, precision=0)
                     run_button = gr.Button("绘制", variant="primary")
                     text_output = gr.Textbox(label="线段 信息")                    
                     image_output = gr.Image(type="pil", label="四分之 一 圆 图像")
-                    run_button.click(fn=gradio_draw_quarter_circle, inputs=radius_input, outputs=[image_output, text_output])
+                    circle_status = gr.Markdown()
+                    run_button.click(fn=gradio_draw_quarter_circle, inputs=radius_input, outputs=[image_output, text_output, circle_status])
+                    with gr.Row():
+                        csv_radius = gr.Number(label="线段组表 最大半径", value=1000, precision=0)
+                        csv_button = gr.Button("导出 线段组 CSV")
+                    csv_output = gr.HTML()
+                    csv_button.click(fn=export_segment_csv, inputs=csv_radius, outputs=[csv_output, circle_status])
+
+                with gr.TabItem("🟠 椭圆 / 超椭圆"):
+                    with gr.Row():
+                        ellipse_a = gr.Number(label="半轴 a（X 方向）", value=40, precision=0)
+                        ellipse_b = gr.Number(label="半轴 b（Z 方向）", value=25, precision=0)
+                        ellipse_n = gr.Number(label="指数 n（2 为椭圆，越大越方）", value=2)
+                    with gr.Row():
+                        ellipse_width = gr.Number(label="线宽", value=1, precision=0)
+                        ellipse_fill = gr.Checkbox(label="实心", value=False)
+                        ellipse_height = gr.Number(label="放置高度", value=0, precision=0)
+                    ellipse_button = gr.Button("绘制", variant="primary")
+                    ellipse_text = gr.Textbox(label="线段 信息")
+                    ellipse_image = gr.Image(type="pil", label="椭圆 图像")
+                    ellipse_file = gr.HTML()
+                    ellipse_status = gr.Markdown()
+                    ellipse_button.click(
+                        fn=gradio_draw_ellipse,
+                        inputs=[ellipse_a, ellipse_b, ellipse_n, ellipse_width, ellipse_fill, ellipse_height],
+                        outputs=[ellipse_image, ellipse_text, ellipse_file, ellipse_status])
 
         # —— Tab2：本地版本指引 —— 
         with gr.TabItem("🌐 自动放置工具"):
@@ -380,15 +891,20 @@ with gr.Blocks(theme=gr.themes.Soft(), title="Slim MCBE Curve Tool ") as demo:
             """)
 
     gr.Markdown("---\nMCBE Curve Tool，欢迎体验！")
-    
-    # 页面关闭时清理用户计数
-    demo.unload(release_user)
+
     
 if __name__ == "__main__":
-    demo.queue(max_size=MAX_CONCURRENT_USERS).launch(
-        server_name="0.0.0.0", 
-        server_port=7861,
-        show_error=True
-    )
-    # 程序退出时清理所有临时文件
-    temp_manager.cleanup_all()
\ No newline at end of file
+    if TIMING_LOG:
+        enable_logging()
+    # 在后台拉起渲染进程（启动 forkserver 需要先导入 render_worker），不推迟首页；
+    # 第一个请求到来时若仍在启动，会等待 start 完成
+    threading.Thread(target=render_pool.start, name="render_pool_start", daemon=True).start()
+    demo.queue(default_concurrency_limit=MAX_WAITING_REQUESTS)
+    # 界面与 /artifacts 下载由同一个 FastAPI 应用提供
+    gr.mount_gradio_app(app, demo, path="", show_error=True)
+    try:
+        uvicorn.run(app, host="0.0.0.0", port=int(os.environ.get("SMCT_WEB_PORT", 7861)))
+    finally:
+        render_pool.shutdown()
+        # 程序退出时删除转存到磁盘的结果
+        artifact_store.clear()
\ No newline at end of file
@@ -0,0 +1,104 @@
+import numpy as np
+import amulet
+from amulet.api.block import Block
+from amulet_nbt import StringTag
+
+from region_input import fill_columns
+from terrain import read_surface_heights
+
+def plan_cut_fill(xyz, surface, clearance=0):
+    """
+    根据轨道方块与地表高度计算土方：返回字典
+      "cut"         —— (n, 4) 数组，每行 x z y_start y_end，需要清空（挖方）的方块柱；
+      "fill"        —— (m, 4) 数组，每行 x z y_start y_end，需要填实（填方）的方块柱；
+      "cut_volume"  —— 挖方方块数；
+      "fill_volume" —— 填方方块数。
+    xyz: (k, 3) 轨道方块；同一 (x, z) 有多个方块时，挖方从最高者之上开始，
+         填方到最低者之下为止。
+    surface: 与 xyz 逐行对应的地表最高方块 y（NaN 表示未知，该列不计算）。
+    clearance: 轨道上方至少保留的净空格数，净空内的方块一并清空。
+    """
+    xyz = np.asarray(xyz, dtype=np.int64).reshape(-1, 3)
+    surface = np.asarray(surface, dtype=float).reshape(-1)
+    empty = np.zeros((0, 4), dtype=np.int64)
+    if len(xyz) == 0:
+        return {"cut": empty, "fill": empty, "cut_volume": 0, "fill_volume": 0}
+
+    # 按 (x, z) 分组，取每列轨道的最高、最低高度
+    xz, inverse = np.unique(xyz[:, [0, 2]], axis=0, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    top = np.full(len(xz), np.iinfo(np.int64).min)
+    bottom = np.full(len(xz), np.iinfo(np.int64).max)
+    np.maximum.at(top, inverse, xyz[:, 1])
+    np.minimum.at(bottom, inverse, xyz[:, 1])
+    ground = np.full(len(xz), np.nan)
+    ground[inverse] = surface
+
+    known = ~np.isnan(ground)
+    xz, top, bottom = xz[known], top[known], bottom[known]
+    ground = ground[known].astype(np.int64)
+
+    cut_end = np.maximum(ground, top + clearance)
+    cut = np.column_stack((xz, top + 1, cut_end))
+    cut = cut[cut[:, 2] <= cut[:, 3]]
+
+    fill = np.column_stack((xz, ground + 1, bottom - 1))
+    fill = fill[fill[:, 2] <= fill[:, 3]]
+
+    return {
+        "cut": cut,
+        "fill": fill,
+        "cut_volume": int((cut[:, 3] - cut[:, 2] + 1).sum()),
+        "fill_volume": int((fill[:, 3] - fill[:, 2] + 1).sum()),
+    }
+
+def cut_and_fill(
+    world_path: str,
+    xyz,
+    fill_block_name: str,
+    clearance: int = 0,
+    block_half: str | None = None,
+    dimension: str = "minecraft:overworld",
+    version: tuple[int, int, int] = (1, 21, 81),
+    dry_run: bool = False,
+) -> str:
+    """
+    按轨道方块 xyz 对世界做挖方与填方：轨道上方的地形（及 clearance 格净空）清为空气，
+    轨道下方到地表之间用 fill_block_name 填实。轨道本身不在此放置。
+    dry_run 为 True 时只统计土方量，不修改世界。
+    返回：操作结果的提示字符串。
+    """
+    # === 构造方块对象 ===
+    if block_half in ("top", "bottom"):
+        props = {"minecraft:vertical_half": StringTag(block_half)}
+    else:
+        props = {}
+
+    block = Block(namespace="minecraft", base_name=fill_block_name, properties=props)
+
+    # === 打开世界 ===
+    level = amulet.load_level(world_path)
+
+    try:
+        xyz = np.asarray(xyz, dtype=np.int64).reshape(-1, 3)
+        surface = read_surface_heights(level, xyz[:, [0, 2]], dimension)
+        plan = plan_cut_fill(xyz, surface, clearance)
+        summary = f"挖方 {plan['cut_volume']} 格（{len(plan['cut'])} 列），填方 {plan['fill_volume']} 格（{len(plan['fill'])} 列）"
+        if dry_run:
+            return f"📐 土方估算：{summary}。"
+
+        # === 转换成通用方块，并在调色板中注册 ===
+        version_obj = level.translation_manager.get_version("bedrock", version)
+        universal_block, _, _ = version_obj.block.to_universal(block)
+        fill_id = level.block_palette.get_add_block(universal_block)
+        air_id = level.block_palette.get_add_block(Block("universal_minecraft", "air"))
+
+        # === 按区块批量写入方块柱 ===
+        fill_columns(level, plan["cut"], air_id, dimension)
+        fill_columns(level, plan["fill"], fill_id, dimension)
+
+        level.save()
+    finally:
+        level.close()
+
+    return f"✅ 土方完成：{summary}（填方方块 {fill_block_name}）。"
@@ -1,8 +1,55 @@
+import numpy as np
 import amulet
 from amulet.api.block import Block
-from amulet.utils.world_utils import block_coords_to_chunk_coords
 from amulet_nbt import StringTag
 
+from block_spans import SpanSet
+from region_input import fill_spans
+from coord_export import read_coords
+
+def place_blocks(level, xyz, block_id, block_entity=None, dimension="minecraft:overworld") -> int:
+    """
+    按区块、子区块分组批量写入方块，每个区块只读取一次。
+    xyz: (n, 3) 整数数组，每行 x y z。
+    返回写入的方块数。
+    """
+    xyz = np.asarray(xyz, dtype=np.int64).reshape(-1, 3)
+    if len(xyz) == 0:
+        return 0
+    cx, lx = np.divmod(xyz[:, 0], 16)
+    cz, lz = np.divmod(xyz[:, 2], 16)
+    sy, ly = np.divmod(xyz[:, 1], 16)
+
+    # 按 (cx, cz, sy) 排序后切分，每组对应一个子区块
+    order = np.lexsort((sy, cz, cx))
+    keys = np.column_stack((cx, cz, sy))[order]
+    bounds = np.flatnonzero(np.any(np.diff(keys, axis=0) != 0, axis=1)) + 1
+    starts = np.concatenate(([0], bounds))
+    ends = np.concatenate((bounds, [len(order)]))
+
+    chunk = None
+    chunk_key = None
+    for start, end in zip(starts, ends):
+        kx, kz, ky = keys[start].tolist()
+        idx = order[start:end]
+        if (kx, kz) != chunk_key:
+            chunk = level.get_chunk(kx, kz, dimension)
+            chunk_key = (kx, kz)
+            chunk.changed = True
+        chunk.blocks.get_section(ky)[lx[idx], ly[idx], lz[idx]] = block_id
+
+        if block_entity is not None:
+            # 如果方块有方块实体（slab 可能没有）
+            for x, y, z in xyz[idx].tolist():
+                chunk.block_entities[(x, y, z)] = block_entity
+        elif len(chunk.block_entities):
+            # 否则如果当前位置有旧方块实体，也要清除
+            written = set(map(tuple, xyz[idx].tolist()))
+            for key in [k for k in chunk.block_entities.keys() if k in written]:
+                del chunk.block_entities[key]
+
+    return len(xyz)
+
 def fill_from_file(
     world_path: str,
     coords_file: str,
@@ -13,6 +60,7 @@ def fill_from_file(
 ) -> str:
     """
     从 coords_file 中读取所有 x y z 坐标，批量将这些位置设置为指定方块。
+    coords_file 可以是文本、.txt.gz / .txt.zst 压缩文本或 .bin 二进制坐标文件。
     block_name: 方块 ID，比如 "stone"、"normal_stone_slab" 等。
     block_half: 如果是半砖，传 "top" 或 "bottom"；否则传 None。
     返回：操作结果的提示字符串。
@@ -34,42 +82,19 @@ def fill_from_file(
     universal_block, block_entity, _ = version_obj.block.to_universal(block)
     block_id = level.block_palette.get_add_block(universal_block)
 
-    # === 从文件里读取所有坐标 ===
-    coords: list[tuple[int, int, int]] = []
+    # === 从文件里读取所有坐标（文本、gzip / zstd 压缩或二进制格式） ===
     try:
-        with open(coords_file, "r") as f:
-            for line in f:
-                parts = line.strip().split()
-                if len(parts) == 3:
-                    x, y, z = map(int, parts)
-                    coords.append((x, y, z))
+        coords = read_coords(coords_file)
     except Exception as e:
         level.close()
         return f"❌ 无法读取坐标文件：{e}"
 
-    if not coords:
+    if len(coords) == 0:
         level.close()
         return "⚠️ 坐标文件中没有有效的 x y z 数值。"
 
-    # === 遍历坐标，逐块写入 ===
-    count = 0
-    for x, y, z in coords:
-        cx, cz = block_coords_to_chunk_coords(x, z)
-        chunk = level.get_chunk(cx, cz, dimension)
-        offset_x, offset_z = x - 16 * cx, z - 16 * cz
-
-        chunk.blocks[offset_x, y, offset_z] = block_id
-
-        if block_entity is not None:
-            # 如果方块有方块实体（slab 可能没有）
-            chunk.block_entities[(x, y, z)] = block_entity
-        else:
-            # 否则如果当前位置有旧方块实体，也要清除
-            if (x, y, z) in chunk.block_entities:
-                del chunk.block_entities[(x, y, z)]
-
-        chunk.changed = True
-        count += 1
+    # === 合并为行区间，按区块整块写入 ===
+    count = fill_spans(level, SpanSet.from_points(coords), block_id, block_entity, dimension)
 
     # === 保存并关闭世界 ===
     level.save()
@@ -0,0 +1,137 @@
+import numpy as np
+
+# MCBE 铁轨每前进一格最多升高（或降低）一格
+MAX_RAIL_RISE = 1
+NEAREST_CHUNK = 1 << 20  # nearest_indices 每批距离矩阵的元素数上限
+
+def path_distance(centerline):
+    """中心线上每个点到起点的累积路径长度（方块数），形状 (n,)"""
+    pts = np.asarray(centerline, dtype=float).reshape(-1, 2)
+    if len(pts) == 0:
+        return np.zeros(0)
+    step = np.hypot(*np.diff(pts, axis=0).T)
+    return np.concatenate(([0.0], np.cumsum(step)))
+
+def nearest_indices(centerline, points):
+    """
+    返回 points 中每个点在中心线上最近点的下标。
+    按批计算距离，每批的距离矩阵不超过 NEAREST_CHUNK 个元素，内存不随 点数 × 中心线长度 增长。
+    """
+    pts = np.asarray(centerline, dtype=float).reshape(-1, 2)
+    q = np.asarray(points, dtype=float).reshape(-1, 2)
+    out = np.empty(len(q), dtype=np.int64)
+    batch = max(1, NEAREST_CHUNK // max(len(pts), 1))
+    for i in range(0, len(q), batch):
+        block = q[i:i + batch]
+        d2 = (block[:, 0, None] - pts[None, :, 0]) ** 2 + (block[:, 1, None] - pts[None, :, 1]) ** 2
+        out[i:i + batch] = d2.argmin(axis=1)
+    return out
+
+def height_profile(centerline, start_height=0.0, end_height=None,
+                   waypoints=None, waypoint_heights=None, max_rise=MAX_RAIL_RISE):
+    """
+    沿中心线弧长线性插值出每个点的高度（浮点），形状 (n,)。
+    - 只给 start_height / end_height 时，从起点到终点均匀变化；
+    - 给出 waypoints 与 waypoint_heights 时，在这些路径点（取中心线上最近点）
+      之间分段线性插值，起终点高度仍由 start_height / end_height 决定
+      （end_height 为 None 时沿用最后一个路径点的高度）。
+    任意两个关键点之间的坡度超过 max_rise（每格升高格数）时抛出 ValueError。
+    """
+    s = path_distance(centerline)
+    if len(s) == 0:
+        return s
+    end = start_height if end_height is None else end_height
+
+    key_s = [0.0]
+    key_h = [float(start_height)]
+    if waypoints is not None and len(waypoints):
+        if waypoint_heights is None or len(waypoint_heights) != len(waypoints):
+            raise ValueError("waypoint_heights 的数量必须与 waypoints 一致")
+        idx = nearest_indices(centerline, waypoints)
+        order = np.argsort(idx, kind="stable")
+        key_s += s[idx[order]].tolist()
+        key_h += [float(waypoint_heights[i]) for i in order]
+        if end_height is None:
+            end = key_h[-1]
+    key_s.append(float(s[-1]))
+    key_h.append(float(end))
+
+    key_s = np.array(key_s)
+    key_h = np.array(key_h)
+    ds = np.diff(key_s)
+    dh = np.abs(np.diff(key_h))
+    too_steep = (dh > max_rise * ds + 1e-9)
+    if np.any(too_steep):
+        i = int(np.argmax(too_steep))
+        raise ValueError(
+            f"坡度过大：第 {i} 段在 {ds[i]:.1f} 格内需要升降 {dh[i]:.1f} 格，"
+            f"超过每格 {max_rise} 格的限制")
+    return np.interp(s, key_s, key_h)
+
+def quantize_heights(heights, step=None, max_rise=MAX_RAIL_RISE):
+    """
+    把浮点高度转换为方块高度，返回 (整数 y 数组, 台阶标记数组)。
+    step:
+      None    —— 直接取整，不标记台阶；
+      "stair" —— 取整，并标记比前一格高或低的位置（在此放置楼梯）；
+      "slab"  —— 按半格取整，标记处于半格高度的位置（在 y 处放置下半砖）。
+    相邻两格的高度差会被限制在 max_rise 以内；台阶标记按限制后的高度计算。
+    限制改变了终点高度时（输入本身的坡度超过 max_rise）抛出 ValueError。
+    """
+    h = np.asarray(heights, dtype=float)
+    if step == "slab":
+        halves = np.floor(h * 2 + 0.5)
+        y = np.floor(halves / 2).astype(np.int64)
+    elif step in (None, "stair"):
+        y = np.floor(h + 0.5).astype(np.int64)
+    else:
+        raise ValueError(f"未知的台阶方式：{step}")
+
+    # 取整后仍可能出现超过限制的跳变（如关键点本身不是整数），逐格收紧
+    if len(y) > 1 and np.any(np.abs(np.diff(y)) > max_rise):
+        rise = np.clip(np.diff(y), -max_rise, max_rise)
+        clamped = np.concatenate(([y[0]], y[0] + np.cumsum(rise)))
+        if clamped[-1] != y[-1]:
+            raise ValueError(
+                f"坡度过大：按每格最多升降 {max_rise} 格铺设，终点高度只能到 {clamped[-1]}，"
+                f"无法到达 {y[-1]}")
+        y = clamped
+
+    mask = np.zeros(len(y), dtype=bool)
+    if step == "slab":
+        mask = (halves % 2) == 1
+    elif step == "stair":
+        mask[1:] = y[1:] != y[:-1]
+    return y, mask
+
+def profile_blocks(centerline, track_width=1, start_height=0.0, end_height=None,
+                   waypoints=None, waypoint_heights=None, step=None,
+                   max_rise=MAX_RAIL_RISE):
+    """
+    计算带坡度的轨道方块：返回 (xyz 整数数组 (n, 3), 台阶标记数组 (n,))。
+    """
+    center = np.asarray(centerline, dtype=np.int64).reshape(-1, 2)
+    heights = height_profile(center, start_height, end_height,
+                             waypoints, waypoint_heights, max_rise)
+    y, mask = quantize_heights(heights, step, max_rise)
+    return dilate_with_heights(center, y, mask, track_width)
+
+def dilate_with_heights(centerline, y, mask, track_width=1):
+    """
+    按 track_width 加宽带高度的中心线，返回 (xyz (n, 3), 台阶标记 (n,))。
+    加宽后的方块取其对应中心线点的高度；多个中心线点覆盖同一方块时，
+    优先取中心线本身，其次取路径上靠前的点。
+    """
+    center = np.asarray(centerline, dtype=np.int64).reshape(-1, 2)
+    half = int(track_width // 2)
+    r = np.arange(-half, half + 1)
+    offsets = np.stack(np.meshgrid(r, r, indexing="ij"), axis=-1).reshape(-1, 2)
+    # 偏移 (0, 0) 放在最前，保证中心线方块保留自己的高度
+    offsets = offsets[np.argsort(np.abs(offsets).sum(axis=1), kind="stable")]
+
+    xz = (offsets[:, None, :] + center[None, :, :]).reshape(-1, 2)
+    ys = np.tile(np.asarray(y), len(offsets))
+    marks = np.tile(np.asarray(mask, dtype=bool), len(offsets))
+    xz, first = np.unique(xz, axis=0, return_index=True)
+    xyz = np.column_stack((xz[:, 0], ys[first], xz[:, 1]))
+    return xyz, marks[first]
@@ -0,0 +1,135 @@
+import io
+
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')
+from matplotlib.figure import Figure
+import plotly.graph_objects as go
+import zhplot  # noqa: F401  仅为副作用：在渲染进程中注册中文字体（warm_up 与轨道图标题含中文）
+
+from angle_straight import plot_full_track
+from coord_export import to_binary
+from ellipse_shapes import draw_ellipse_image, shape_blocks
+from stage_timer import timed_request, stage
+
+# 本模块中的函数在渲染进程中运行：参数与返回值都经过 pickle 传递，
+# 因此只返回字节串、文本、数组等普通数据，不写文件、不依赖当前工作目录。
+
+def warm_up():
+    """渲染进程初始化：先画一张小图，把字体缓存、Agg 后端等一次性开销提前付掉"""
+    fig = Figure(figsize=(1, 1))
+    fig.add_subplot().set_title("预热")
+    fig.savefig(io.BytesIO(), format='png')
+    go.Figure()
+
+def serve(conn):
+    """
+    渲染进程的主循环：预热后逐个从 conn 接收 (函数, 参数)，执行并发回 (是否成功, 结果或异常)。
+    主进程关闭管道时退出；任务超时或被取消时主进程直接终止本进程。
+    """
+    warm_up()
+    while True:
+        try:
+            fn, args = conn.recv()
+        except EOFError:
+            return
+        try:
+            reply = (True, fn(*args))
+        except Exception as e:
+            reply = (False, e)
+        try:
+            conn.send(reply)
+        except Exception as e:  # 结果或异常无法 pickle
+            conn.send((False, RuntimeError(f"{type(e).__name__}: {e}")))
+
+def track_plotly_figure(coords):
+    """由 (n, 3) 坐标（X 高度 Z）构造交互式轨道像素图"""
+    shapes, hover_text = [], []
+    for x, height, y in coords.tolist():
+        x, y = int(x), int(y)
+        shapes.append(dict(
+            type="rect",
+            x0=x - 0.5, x1=x + 0.5,
+            y0=y - 0.5, y1=y + 0.5,
+            line=dict(color="blue", width=0.5),
+            fillcolor="lightblue"
+        ))
+        hover_text.append(f"X: {x}, Y: {y}, 高度: {height}")
+
+    plotly_fig = go.Figure()
+    plotly_fig.add_trace(go.Scatter(
+        x=coords[:, 0],
+        y=coords[:, 2],
+        mode='markers',
+        marker=dict(size=8, color='rgba(0,0,0,0)'),
+        hoverinfo='text',
+        text=hover_text,
+        showlegend=False
+    ))
+    plotly_fig.update_layout(
+        title="轨道像素图（交互）",
+        xaxis=dict(title="X 坐标", gridcolor='lightgray', scaleanchor="y", scaleratio=1),
+        yaxis=dict(title="Y 坐标", gridcolor='lightgray'),
+        shapes=shapes,
+        height=600,
+        hovermode='closest'
+    )
+    return plotly_fig
+
+def render_track(use_line, a, b, k1, k2, track_width, effective_curvature,
+                 ground_height, via, k_via):
+    """
+    计算并渲染轨道，返回字典：
+      "png"         —— 静态图 PNG 字节；
+      "coords"      —— (n, 3) 浮点数组，每行 X 高度 Z，按区块顺序排列；
+      "plotly_json" —— 交互图的 JSON 字符串（主进程用 plotly.io.from_json 还原）；
+      "html"        —— 可下载的交互图 HTML；
+      "timings"     —— 渲染进程内各阶段耗时（StageTimings.as_dict），由主进程合并。
+    """
+    # 每次渲染使用独立的 Figure，保存后立即清空，不依赖 pyplot 的全局状态
+    with timed_request("render_track", log=False) as timings:
+        fig = Figure(figsize=(10, 8))
+        with stage("plot_full_track"):
+            ordered = plot_full_track(
+                a, b,
+                k1, k2,
+                track_width,
+                effective_curvature,
+                via=via,
+                k_via=k_via,
+                ground_height=ground_height,
+                use_line=use_line,
+                order="chunk",
+                output_file=None,
+                fig=fig
+            )
+
+        with stage("savefig"):
+            buf = io.BytesIO()
+            fig.savefig(buf, format='png', bbox_inches='tight', dpi=100)
+            fig.clear()
+
+        coords = np.column_stack((ordered[:, 0], np.full(len(ordered), float(ground_height)), ordered[:, 1]))
+        with stage("plotly_shapes"):
+            plotly_fig = track_plotly_figure(coords)
+        with stage("plotly_json"):
+            plotly_json = plotly_fig.to_json()
+        with stage("write_html"):
+            html = plotly_fig.to_html()
+    return {
+        "png": buf.getvalue(),
+        "coords": coords,
+        "plotly_json": plotly_json,
+        "html": html,
+        "timings": timings.as_dict(),
+    }
+
+def render_ellipse(a, b, exponent, width, fill, height):
+    """
+    绘制椭圆示意图并把方块坐标编码为二进制坐标格式（比文本小，传输更快）。
+    返回 (PIL.Image.Image, 文字说明, 坐标字节串)；参数错误时坐标为 None。
+    """
+    image, info, points = draw_ellipse_image(a, b, exponent, width, fill)
+    if points is None:
+        return image, info, None
+    return image, info, to_binary(shape_blocks(points, height=int(height or 0)))
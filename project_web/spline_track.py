@@ -0,0 +1,95 @@
+import numpy as np
+
+from angle_straight import (unit_vector, bernstein_at, remove_duplicates,
+                            enforce_4connectivity, dilate_blocks)
+
+def _as_waypoints(points):
+    """转为 (n, 2) 浮点数组，并去掉相邻的重复点"""
+    pts = np.asarray(points, dtype=float).reshape(-1, 2)
+    if len(pts) < 2:
+        raise ValueError("至少需要起点和终点两个路径点")
+    keep = np.ones(len(pts), dtype=bool)
+    keep[1:] = np.any(np.diff(pts, axis=0) != 0, axis=1)
+    pts = pts[keep]
+    if len(pts) < 2:
+        raise ValueError("路径点全部重合")
+    return pts, keep
+
+def waypoint_tangents(points, slopes=None):
+    """
+    计算每个路径点处的单位切向量，形状 (n, 2)。
+    slopes 中给出的斜率（数字或 inf）沿行进方向取向；未给出（None）的
+    路径点按前后两点连线方向（Catmull-Rom）自动确定，端点取相邻线段方向。
+    """
+    pts = np.asarray(points, dtype=float)
+    n = len(pts)
+    # 行进方向：内部点取 P[i+1] - P[i-1]，端点取相邻线段
+    travel = np.empty_like(pts)
+    travel[0] = pts[1] - pts[0]
+    travel[-1] = pts[-1] - pts[-2]
+    travel[1:-1] = pts[2:] - pts[:-2]
+    norm = np.hypot(travel[:, 0], travel[:, 1])
+    # 前后点重合（折返）时退回到后一段方向
+    bad = norm == 0
+    if np.any(bad):
+        fallback = np.vstack((np.diff(pts, axis=0), pts[-1:] - pts[-2:-1]))
+        travel[bad] = fallback[bad]
+        norm = np.hypot(travel[:, 0], travel[:, 1])
+    tangents = travel / norm[:, None]
+
+    if slopes is not None:
+        if len(slopes) != n:
+            raise ValueError("slopes 的数量必须与路径点数量一致")
+        for i, k in enumerate(slopes):
+            if k is None:
+                continue
+            u = np.array(unit_vector(float(k)))
+            tangents[i] = u if np.dot(u, travel[i]) >= 0 else -u
+    return tangents
+
+def spline_control_points(points, slopes=None, curvature=3.0):
+    """
+    分段三次 Bézier 的控制点，形状 (段数, 4, 2)。
+    相邻两段在连接点处共用同一切线方向，保证切线连续；
+    控制柄长度与 generate_bezier 一致，为该段弦长 / curvature。
+    """
+    pts, keep = _as_waypoints(points)
+    if slopes is not None:
+        slopes = [k for k, kept in zip(slopes, keep) if kept]
+    tangents = waypoint_tangents(pts, slopes)
+
+    d = np.hypot(*np.diff(pts, axis=0).T)[:, None] / curvature
+    ctrl = np.empty((len(pts) - 1, 4, 2))
+    ctrl[:, 0] = pts[:-1]
+    ctrl[:, 1] = pts[:-1] + d * tangents[:-1]
+    ctrl[:, 2] = pts[1:] - d * tangents[1:]
+    ctrl[:, 3] = pts[1:]
+    return ctrl
+
+def generate_spline(points, slopes=None, curvature=3.0, samples_per_unit=1.5):
+    """
+    经过任意多个路径点的分段三次曲线，所有段一次性向量化求值。
+    返回 (4 连通像素列表, 曲线采样点数组 (m, 2), 控制点数组 (段数, 4, 2))，
+    连接点处的重复方块已去除。
+    """
+    ctrl = spline_control_points(points, slopes, curvature)
+    chords = np.hypot(*(ctrl[:, 3] - ctrl[:, 0]).T)
+    counts = np.maximum((chords * samples_per_unit).astype(int), 4)
+
+    # 各段 t 依次拼接：每段 0..1 共 N+1 个点，seg 记录所属段号
+    seg = np.repeat(np.arange(len(ctrl)), counts + 1)
+    starts = np.repeat(np.cumsum(counts + 1) - (counts + 1), counts + 1)
+    t = (np.arange(len(seg)) - starts) / counts[seg]
+
+    curve = np.einsum("mk,mkj->mj", bernstein_at(t), ctrl[seg])
+    pixels = list(map(tuple, np.trunc(curve + 0.5).astype(int).tolist()))
+    consistent = enforce_4connectivity(remove_duplicates(pixels))
+    return consistent, curve, ctrl
+
+def compute_spline_track(points, slopes=None, track_width=1, curvature=3.0):
+    """
+    计算多段曲线轨道：返回 (中心线像素列表, 加宽后的方块数组)，
+    方块数组可直接交给 sort_blocks / 写入坐标文件。
+    """
+    centerline, _, _ = generate_spline(points, slopes, curvature)
+    return centerline, dilate_blocks(centerline, track_width)
@@ -0,0 +1,122 @@
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+# 分阶段计时：timed_request 包住一次请求，其中的 stage / @timed 记录各阶段耗时。
+# 没有进行中的请求时 stage 只做一次线程局部变量查询，可以一直开着。
+logger = logging.getLogger("smct.timing")
+
+TIMED_FUNCTIONS = {}  # 阶段名 -> 用 @timed 注册的函数
+_local = threading.local()
+
+class StageTimings:
+    """
+    一次请求内各阶段的耗时。阶段可以嵌套，名称按层级用 "/" 连接；
+    同名阶段多次进入时累加耗时与次数。
+    """
+    def __init__(self, name):
+        self.name = name
+        self.stages = {}  # 阶段名 -> [秒, 次数]，按首次进入的顺序
+        self.stack = []
+        self.start = time.perf_counter()
+        self.total = None
+
+    def add(self, stage, seconds, count=1):
+        entry = self.stages.setdefault(stage, [0.0, 0])
+        entry[0] += seconds
+        entry[1] += count
+
+    def merge(self, data, prefix=None):
+        """合并另一进程中记录的结果（as_dict 的返回值），挂在当前阶段或 prefix 之下"""
+        base = "/".join(self.stack + ([prefix] if prefix else []))
+        for stage, (ms, count) in data["stages"].items():
+            self.add(f"{base}/{stage}" if base else stage, ms / 1000, count)
+
+    def as_dict(self):
+        total = self.total if self.total is not None else time.perf_counter() - self.start
+        return {
+            "name": self.name,
+            "total_ms": round(total * 1000, 3),
+            "stages": {stage: [round(s * 1000, 3), n] for stage, (s, n) in self.stages.items()},
+        }
+
+    def rows(self):
+        """界面表格用：[[阶段（按层级缩进）, 耗时 ms, 占总耗时 %, 次数], ...]，最后一行为合计"""
+        data = self.as_dict()
+        total = data["total_ms"] or 1.0
+        rows = []
+        for stage, (ms, count) in data["stages"].items():
+            depth = stage.count("/")
+            rows.append(["　" * depth + stage.rsplit("/", 1)[-1], ms, round(100 * ms / total, 1), count])
+        rows.append(["合计", data["total_ms"], 100.0, 1])
+        return rows
+
+def enable_logging(stream=None):
+    """
+    把耗时日志输出到 stream（默认标准错误），每次请求一行：
+    时间 smct.timing {"event": "stage_timings", "name": ..., "total_ms": ..., "stages": {...}}
+    只配置 "smct.timing" 这一个日志器，不影响其他库的日志。
+    """
+    if logger.handlers:
+        return
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(logging.Formatter("%(asctime)s %(name)s %(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+def current():
+    """当前线程中进行中的请求计时，没有时为 None"""
+    return getattr(_local, "timings", None)
+
+@contextmanager
+def timed_request(name, log=True):
+    """
+    记录一次请求的各阶段耗时，产出 StageTimings。
+    结束时（log 为 True）以一行 JSON 写入 "smct.timing" 日志，便于按字段检索。
+    """
+    timings = StageTimings(name)
+    previous = current()
+    _local.timings = timings
+    try:
+        yield timings
+    finally:
+        timings.total = time.perf_counter() - timings.start
+        _local.timings = previous
+        if log and logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps({"event": "stage_timings", **timings.as_dict()}, ensure_ascii=False))
+
+@contextmanager
+def stage(name):
+    """把 with 块的耗时记为当前请求中的一个阶段；没有进行中的请求时不做任何事"""
+    timings = current()
+    if timings is None:
+        yield
+        return
+    timings.stack.append(name)
+    key = "/".join(timings.stack)
+    timings.stages.setdefault(key, [0.0, 0])  # 先占位，使外层阶段排在其内层阶段之前
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(key, time.perf_counter() - start)
+        timings.stack.pop()
+
+def timed(name=None):
+    """装饰器：把函数调用记为一个阶段（默认用函数名），并登记到 TIMED_FUNCTIONS"""
+    def decorator(fn):
+        stage_name = name or fn.__name__
+        TIMED_FUNCTIONS[stage_name] = fn
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if current() is None:
+                return fn(*args, **kwargs)
+            with stage(stage_name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,178 @@
+import numpy as np
+import amulet
+from amulet.api.block import Block
+from amulet.api.errors import ChunkLoadError
+from amulet_nbt import StringTag
+
+from file_fill import place_blocks
+from height_profile import MAX_RAIL_RISE, quantize_heights, dilate_with_heights
+
+# 视为“空气”的方块（通用命名空间下的 base_name）
+AIR_BLOCKS = ("air", "cave_air", "void_air")
+
+def air_mask(level) -> np.ndarray:
+    """按全局调色板下标给出是否为空气的布尔数组"""
+    return np.array([block.base_name in AIR_BLOCKS for block in level.block_palette], dtype=bool)
+
+def _blocks_at(chunk, lx, ys, lz) -> np.ndarray:
+    """读取区块内若干位置的调色板下标，不存在的子区块视为空气（下标 0）"""
+    out = np.zeros(len(ys), dtype=np.int64)
+    sy, ly = np.divmod(ys, 16)
+    for s in np.unique(sy).tolist():
+        if s not in chunk.blocks:
+            continue
+        sel = sy == s
+        out[sel] = chunk.blocks.get_sub_chunk(s)[lx[sel], ly[sel], lz[sel]]
+    return out
+
+def _scan_columns(chunk, lx, lz, is_air) -> np.ndarray:
+    """自上而下逐个子区块扫描，返回每列最高非空气方块的 y；找不到时为 NaN"""
+    top = np.full(len(lx), np.nan)
+    todo = np.ones(len(lx), dtype=bool)
+    for s in sorted(chunk.blocks.sub_chunks, reverse=True):
+        if not todo.any():
+            break
+        cols = chunk.blocks.get_sub_chunk(s)[lx[todo], :, lz[todo]]  # (k, 16)
+        solid = ~is_air[cols]
+        found = solid.any(axis=1)
+        highest = 15 - np.argmax(solid[:, ::-1], axis=1)
+        rows = np.flatnonzero(todo)
+        top[rows[found]] = s * 16 + highest[found]
+        todo[rows[found]] = False
+    return top
+
+def read_surface_heights(level, xz, dimension="minecraft:overworld", use_heightmap=True) -> np.ndarray:
+    """
+    读取每个 (x, z) 位置地表最高非空气方块的 y，形状 (n,)，未生成的区块为 NaN。
+    按区块分组，每个区块只加载一次：
+    - 区块带有高度图（基岩版 Data2D）时先按高度图取值，并检查该方块非空气、
+      其上方为空气；高度图缺失、全零或与实际方块不符的列再做列扫描；
+    - 列扫描对整列做向量化判断，自上而下逐个子区块进行，找到即停。
+    """
+    xz = np.asarray(xz, dtype=np.int64).reshape(-1, 2)
+    heights = np.full(len(xz), np.nan)
+    if len(xz) == 0:
+        return heights
+
+    is_air = np.zeros(0, dtype=bool)
+    min_y = level.bounds(dimension).min_y
+    cx, lx = np.divmod(xz[:, 0], 16)
+    cz, lz = np.divmod(xz[:, 1], 16)
+
+    order = np.lexsort((cz, cx))
+    keys = np.column_stack((cx, cz))[order]
+    bounds = np.flatnonzero(np.any(np.diff(keys, axis=0) != 0, axis=1)) + 1
+    for idx in np.split(order, bounds):
+        kx, kz = int(cx[idx[0]]), int(cz[idx[0]])
+        try:
+            chunk = level.get_chunk(kx, kz, dimension)
+        except ChunkLoadError:
+            continue
+        # 调色板在加载区块时才会扩充，需要时重新计算空气表
+        if len(is_air) != len(level.block_palette):
+            is_air = air_mask(level)
+        ix, iz = lx[idx], lz[idx]
+
+        top = np.full(len(idx), np.nan)
+        height_map = chunk.misc.get("height") if use_heightmap else None
+        if isinstance(height_map, np.ndarray) and height_map.shape == (16, 16) and height_map.any():
+            # 基岩版高度图按 [z, x] 存放，值为最高方块上方第一格相对世界底部的高度
+            guess = min_y + height_map[iz, ix].astype(np.int64) - 1
+            below = _blocks_at(chunk, ix, guess, iz)
+            above = _blocks_at(chunk, ix, guess + 1, iz)
+            ok = ~is_air[below] & is_air[above]
+            top[ok] = guess[ok]
+        missing = np.isnan(top)
+        if missing.any():
+            top[missing] = _scan_columns(chunk, ix[missing], iz[missing], is_air)
+        heights[idx] = top
+    return heights
+
+def smooth_terrain_profile(heights, window=5, max_rise=MAX_RAIL_RISE) -> np.ndarray:
+    """
+    把沿轨道顺序排列的地表高度平滑成可铺轨的高度（浮点），形状 (n,)。
+    1. NaN（未生成区块）按前后有效值线性插值；
+    2. 宽度为 window 的滑动平均；
+    3. 坡度限制：分别求不高于、不低于该曲线且每格升降不超过 max_rise 的
+       最紧包络线，取两者的平均值，结果同样满足坡度限制。
+    """
+    h = np.asarray(heights, dtype=float).copy()
+    n = len(h)
+    if n == 0:
+        return h
+    valid = ~np.isnan(h)
+    if not valid.any():
+        raise ValueError("轨道经过的区块均未生成，无法读取地形高度")
+    idx = np.arange(n)
+    h[~valid] = np.interp(idx[~valid], idx[valid], h[valid])
+
+    if window > 1 and n > 1:
+        pad = window // 2
+        padded = np.pad(h, pad, mode="edge")
+        h = np.convolve(padded, np.ones(window) / window, mode="same")[pad:pad + n]
+
+    r = max_rise * idx
+    # 不高于 h 的最大坡度受限曲线（向下削）：min_j (h_j + max_rise * |i - j|)
+    lower = np.minimum(np.minimum.accumulate(h - r) + r,
+                       np.minimum.accumulate((h + r)[::-1])[::-1] - r)
+    # 不低于 h 的最小坡度受限曲线（向上填）：max_j (h_j - max_rise * |i - j|)
+    upper = np.maximum(np.maximum.accumulate(h + r) - r,
+                       np.maximum.accumulate((h - r)[::-1])[::-1] + r)
+    return (lower + upper) / 2
+
+def fill_track_on_terrain(
+    world_path: str,
+    centerline,
+    block_name: str,
+    track_width: int = 1,
+    block_half: str | None = None,
+    height_offset: int = 1,
+    window: int = 5,
+    max_rise: int = MAX_RAIL_RISE,
+    dimension: str = "minecraft:overworld",
+    version: tuple[int, int, int] = (1, 21, 81),
+) -> str:
+    """
+    贴地模式：沿中心线读取地表高度，平滑并限制坡度后铺设轨道。
+    centerline: 按行进顺序排列的中心线 (x, z) 像素（如 compute_track 的第一个返回值）。
+    height_offset: 轨道相对地表的高度，默认 1 即铺在地表方块之上。
+    返回：操作结果的提示字符串。
+    """
+    # === 构造方块对象 ===
+    if block_half in ("top", "bottom"):
+        props = {"minecraft:vertical_half": StringTag(block_half)}
+    else:
+        props = {}
+
+    block = Block(namespace="minecraft", base_name=block_name, properties=props)
+
+    # === 打开世界 ===
+    level = amulet.load_level(world_path)
+
+    try:
+        # === 转换成通用方块，并在调色板中注册 ===
+        version_obj = level.translation_manager.get_version("bedrock", version)
+        universal_block, block_entity, _ = version_obj.block.to_universal(block)
+
+        # === 按区块读取地表高度并平滑 ===
+        center = np.asarray(centerline, dtype=np.int64).reshape(-1, 2)
+        surface = read_surface_heights(level, center, dimension)
+        try:
+            smoothed = smooth_terrain_profile(surface, window, max_rise)
+            y, mask = quantize_heights(smoothed + height_offset, None, max_rise)
+        except ValueError as e:
+            return f"❌ {e}"
+        xyz, _ = dilate_with_heights(center, y, mask, track_width)
+
+        block_id = level.block_palette.get_add_block(universal_block)
+
+        # === 按区块批量写入 ===
+        count = place_blocks(level, xyz, block_id, block_entity, dimension)
+
+        # === 保存 ===
+        level.save()
+    finally:
+        level.close()
+
+    return (f"✅ 成功贴地放置 {count} 个方块（{block_name}，属性 {props}），"
+            f"高度范围 {int(xyz[:, 1].min())} ~ {int(xyz[:, 1].max())}。")
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# 测试针对 project/ 中的模块（project_self/、project_web/ 中的共享模块与其相同）；
+# 网页版独有的模块（combined_web_demo、render_worker）从 project_web/ 导入
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "project_web"))
+sys.path.insert(0, os.path.join(ROOT, "project"))
@@ -0,0 +1,23 @@
+import numpy as np
+import pytest
+
+from angle_straight import plot_full_track
+from coord_export import read_coords
+
+@pytest.mark.parametrize("step", ["slab", "stair"])
+def test_height_step_blocks_go_to_separate_file(tmp_path, step):
+    out = tmp_path / "rail.txt"
+    ordered = plot_full_track((0, 0), (60, 20), 0.0, 0.0, 3, 3.0, ground_height=0.0,
+                              end_height=7.5, height_step=step, output_file=str(out))
+    plain = read_coords(out)
+    marked = read_coords(tmp_path / f"rail_{step}.txt")
+    assert len(marked) > 0
+    assert len(plain) + len(marked) == len(ordered)
+    both = np.vstack((plain, marked))
+    assert len(np.unique(both[:, [0, 2]], axis=0)) == len(ordered)
+
+def test_no_step_file_without_height_step(tmp_path):
+    out = tmp_path / "rail.txt"
+    ordered = plot_full_track((0, 0), (30, 10), 0.0, 0.0, 1, 3.0, end_height=5.0, output_file=str(out))
+    assert len(read_coords(out)) == len(ordered)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["rail.txt"]
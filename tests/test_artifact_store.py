@@ -0,0 +1,32 @@
+import os
+
+from combined_web_demo import ArtifactStore
+
+def test_spill_of_a_key_back_in_memory_removes_its_file(tmp_path):
+    store = ArtifactStore(memory_bytes=1024, spill_dir=str(tmp_path))
+    key = store.put(b"x" * 100)
+    # 模拟竞争：该键被淘汰、写入磁盘的同时又被 put 放回了内存
+    store._spill(key, b"x" * 100)
+    assert os.listdir(tmp_path) == []
+    assert store.spill_used == 0 and not store.spilled
+    assert store.get(key) == b"x" * 100
+
+def test_evicted_entries_are_spilled_and_readable(tmp_path):
+    store = ArtifactStore(memory_bytes=150, spill_dir=str(tmp_path))
+    first = store.put(b"a" * 100)
+    store.put(b"b" * 100)
+    path = store.get(first)
+    assert isinstance(path, str) and open(path, "rb").read() == b"a" * 100
+    assert store.spill_used == 100 and len(os.listdir(tmp_path)) == 1
+
+def test_contains_unlinks_expired_files_outside_the_lock(tmp_path):
+    store = ArtifactStore(memory_bytes=150, spill_dir=str(tmp_path))
+    first = store.put(b"a" * 100)
+    store.put(b"b" * 100)
+    assert first in store.spilled
+    unlink, held = store._unlink, []
+    store._unlink = lambda paths: (held.append(store.lock.locked()), unlink(paths))
+    store.max_age = -1  # 全部条目都已过期
+    assert first not in store
+    assert held and not any(held)
+    assert os.listdir(tmp_path) == []
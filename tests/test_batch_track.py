@@ -0,0 +1,24 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from batch_track import normalize_specs
+
+@pytest.mark.parametrize("value, expected", [
+    ("False", False), ("false", False), ("0", False), ("no", False), ("", False), (" NO ", False),
+    ("True", True), ("true", True), ("1", True), ("yes", True), ("YES", True),
+    (True, True), (False, False), (1, True), (0, False), (1.0, True), (np.bool_(False), False),
+])
+def test_use_line_parses_spreadsheet_values(value, expected):
+    [spec] = normalize_specs([{"x0": 0, "y0": 0, "x1": 10, "y1": 5, "use_line": value}])
+    assert spec["use_line"] is expected
+
+@pytest.mark.parametrize("value", ["maybe", "2", 2, 0.5])
+def test_use_line_rejects_unknown_values(value):
+    with pytest.raises(ValueError):
+        normalize_specs([{"x0": 0, "y0": 0, "x1": 10, "y1": 5, "use_line": value}])
+
+def test_use_line_strings_from_dataframe():
+    df = pd.DataFrame({"x0": [0, 0], "y0": [0, 0], "x1": [10, 10], "y1": [5, 5],
+                       "use_line": ["False", "True"]})
+    assert [spec["use_line"] for spec in normalize_specs(df)] == [False, True]
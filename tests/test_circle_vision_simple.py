@@ -0,0 +1,12 @@
+import pytest
+
+from circle_vision_simple import MAX_RADIUS, draw_quarter_circle_image
+
+@pytest.mark.parametrize("r", [2.5, 0.5, -3, 0, MAX_RADIUS + 1])
+def test_invalid_radius_returns_error(r):
+    image, info = draw_quarter_circle_image(r)
+    assert image is None and info.startswith("错误")
+
+def test_integral_float_radius_is_accepted():
+    image, info = draw_quarter_circle_image(5.0)
+    assert image is not None and "线段组" in info
@@ -0,0 +1,20 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+from coord_export import from_binary, to_binary
+
+PROJECT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "project")
+
+def test_binary_round_trip_is_chunk_ordered():
+    xyz = np.array([[17, 64, 3], [0, 64, 0], [15, 65, 15], [16, 64, 0]])
+    restored = from_binary(to_binary(xyz))
+    assert restored.tolist() == [[0, 64, 0], [15, 65, 15], [16, 64, 0], [17, 64, 3]]
+
+def test_import_does_not_load_plotting_modules():
+    code = ("import sys, coord_export; "
+            "print(','.join(m for m in ('matplotlib', 'zhplot', 'angle_straight') if m in sys.modules))")
+    out = subprocess.run([sys.executable, "-c", code], cwd=PROJECT, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == ""
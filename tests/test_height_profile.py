@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+
+import height_profile
+from height_profile import nearest_indices, quantize_heights
+
+def test_stair_mask_follows_clamped_heights():
+    # 先升 3 格再降 3 格：限制为每格 1 格后终点高度不变
+    y, mask = quantize_heights([0, 3, 3, 0], "stair")
+    assert y.tolist() == [0, 1, 1, 0]
+    assert mask.tolist() == [False, True, False, True]
+
+def test_stair_mask_marks_every_change():
+    y, mask = quantize_heights(np.linspace(0, 5, 40), "stair")
+    assert mask[1:].tolist() == (np.diff(y) != 0).tolist()
+    assert not mask[0]
+
+def test_clamp_that_misses_end_height_raises():
+    with pytest.raises(ValueError):
+        quantize_heights([0, 3, 3], "stair")
+    with pytest.raises(ValueError):
+        quantize_heights([0, 0, 4], None)
+
+def test_unknown_step_raises():
+    with pytest.raises(ValueError):
+        quantize_heights([0, 1], "ramp")
+
+def test_nearest_indices_matches_dense_search_in_batches(monkeypatch):
+    rng = np.random.default_rng(1)
+    centerline = rng.integers(-50, 50, (300, 2))
+    points = rng.uniform(-60, 60, (97, 2))
+    d2 = ((centerline[None, :, :] - points[:, None, :]) ** 2).sum(axis=2)
+    monkeypatch.setattr(height_profile, "NEAREST_CHUNK", 1000)  # 每批 3 个点
+    assert nearest_indices(centerline, points).tolist() == d2.argmin(axis=1).tolist()
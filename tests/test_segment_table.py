@@ -0,0 +1,89 @@
+import multiprocessing
+
+import pytest
+
+from circle_vision_simple import MAX_RADIUS, generate_circle_segments
+from segment_table import HEADER, SegmentTable
+
+def _fill(path, radii):
+    table = SegmentTable(path)
+    for r in radii:
+        table.get(r)
+
+def test_get_matches_generate_and_persists(tmp_path):
+    path = tmp_path / "segments.bin"
+    table = SegmentTable(str(path))
+    for r in (1, 7, 50, 333):
+        assert table.get(r) == generate_circle_segments(r)
+    assert set(SegmentTable(str(path)).runs) == {1, 7, 50, 333}
+
+def test_rejects_radius_above_limit_without_writing(tmp_path):
+    path = tmp_path / "segments.bin"
+    table = SegmentTable(str(path))
+    with pytest.raises(ValueError):
+        table.get(MAX_RADIUS + 1)
+    assert not path.exists()
+
+def test_concurrent_writers_leave_a_valid_file(tmp_path):
+    path = str(tmp_path / "segments.bin")
+    ctx = multiprocessing.get_context("spawn")
+    procs = [ctx.Process(target=_fill, args=(path, range(i, 200, 4))) for i in range(1, 5)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+    table = SegmentTable(path)
+    assert table.runs  # 文件可以完整读出
+    for r, runs in table.runs.items():
+        full = runs.tolist()
+        assert full + full[::-1] == generate_circle_segments(r)
+
+def test_construction_does_not_touch_disk(tmp_path):
+    path = tmp_path / "missing" / "segments.bin"
+    SegmentTable(str(path))
+    assert not (tmp_path / "missing").exists()
+
+def test_miss_appends_one_record_without_rewriting(tmp_path):
+    path = tmp_path / "segments.bin"
+    table = SegmentTable(str(path))
+    table.precompute(50)
+    before = path.read_bytes()
+    table.get(60)
+    after = path.read_bytes()
+    assert after.startswith(before)
+    assert len(after) - len(before) == 8 + 2 * len(table.octant(60))
+
+def test_tables_pick_up_each_others_records(tmp_path):
+    path = str(tmp_path / "segments.bin")
+    a, b = SegmentTable(path), SegmentTable(path)
+    a.get(5)
+    b.get(6)
+    assert set(b.runs) == {5, 6}
+    assert set(SegmentTable(path).runs) == {5, 6}
+    assert len(open(path, "rb").read()) == len(HEADER) + sum(
+        8 + 2 * len(b.octant(r)) for r in (5, 6))  # 每个半径只写一次
+
+def test_incomplete_tail_is_dropped_before_appending(tmp_path):
+    path = tmp_path / "segments.bin"
+    SegmentTable(str(path)).get(10)
+    with open(path, "ab") as f:
+        f.write(b"\x01\x02\x03")  # 写入中途崩溃留下的半条记录
+    SegmentTable(str(path)).get(11)
+    assert set(SegmentTable(str(path)).runs) == {10, 11}
+
+def test_invalid_file_is_rebuilt(tmp_path):
+    path = tmp_path / "segments.bin"
+    path.write_bytes(b"not a segment table")
+    table = SegmentTable(str(path))
+    assert table.get(9) == generate_circle_segments(9)
+    assert path.read_bytes().startswith(HEADER)
+    assert set(SegmentTable(str(path)).runs) == {9}
+
+def test_precompute_and_csv_reject_radius_above_limit(tmp_path):
+    path = tmp_path / "segments.bin"
+    table = SegmentTable(str(path))
+    with pytest.raises(ValueError):
+        table.precompute(MAX_RADIUS + 1)
+    with pytest.raises(ValueError):
+        table.csv_text(MAX_RADIUS + 1)
+    assert not path.exists()
@@ -0,0 +1,21 @@
+import numpy as np
+import pytest
+
+from solid_shapes import disk_spans, sphere_spans
+
+@pytest.mark.parametrize("r", [1, 2, 3, 5, 17, 64, 200])
+def test_sphere_equator_matches_disk(r):
+    spans = np.asarray(sphere_spans(r))
+    equator = spans[spans[:, 0] == 0]
+    assert np.array_equal(equator, np.asarray(disk_spans(r)))
+
+@pytest.mark.parametrize("r", [1, 2, 5, 12])
+def test_sphere_is_symmetric_in_all_axes(r):
+    points = {tuple(p) for p in sphere_spans(r).to_points().tolist()}
+    for x, y, z in points:
+        assert (y, x, z) in points and (z, y, x) in points and (x, z, y) in points
+    assert max(max(map(abs, p)) for p in points) == r
+
+def test_dome_keeps_top_block():
+    spans = np.asarray(sphere_spans(5, center=(0, 10, 0), dome=True))
+    assert spans[:, 0].min() == 10 and spans[:, 0].max() == 15
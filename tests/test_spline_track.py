@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from spline_track import compute_spline_track, generate_spline, spline_control_points
+
+WAYPOINTS = [(0, 0), (40, 25), (70, 5), (120, 30), (125, 90)]
+
+def _steps(pixels):
+    return np.abs(np.diff(np.asarray(pixels), axis=0)).sum(axis=1)
+
+@pytest.mark.parametrize("waypoints", [WAYPOINTS, [(-x, -z) for x, z in WAYPOINTS], [(0, 0), (3, 1), (4, 8)]])
+def test_output_is_4_connected_without_repeats(waypoints):
+    pixels, _, _ = generate_spline(waypoints)
+    assert set(_steps(pixels).tolist()) == {1}
+
+def test_endpoints_and_waypoints_are_on_the_path():
+    pixels, curve, _ = generate_spline(WAYPOINTS)
+    assert pixels[0] == WAYPOINTS[0] and pixels[-1] == WAYPOINTS[-1]
+    assert np.allclose(curve[0], WAYPOINTS[0]) and np.allclose(curve[-1], WAYPOINTS[-1])
+    assert set(WAYPOINTS) <= set(pixels)
+
+def test_segments_join_with_a_shared_tangent():
+    ctrl = spline_control_points(WAYPOINTS)
+    assert len(ctrl) == len(WAYPOINTS) - 1
+    for left, right in zip(ctrl[:-1], ctrl[1:]):
+        assert np.array_equal(left[3], right[0])
+        incoming = left[3] - left[2]
+        outgoing = right[1] - right[0]
+        cross = incoming[0] * outgoing[1] - incoming[1] * outgoing[0]
+        assert abs(cross) < 1e-9 and np.dot(incoming, outgoing) > 0
+
+def test_join_blocks_are_not_repeated():
+    pixels, _, _ = generate_spline(WAYPOINTS)
+    for p in WAYPOINTS[1:-1]:
+        assert pixels.count(p) == 1
+
+def test_given_slopes_set_the_tangent_direction():
+    ctrl = spline_control_points([(0, 0), (50, 50), (100, 0)], slopes=[0.0, None, float("inf")])
+    start = ctrl[0, 1] - ctrl[0, 0]
+    end = ctrl[-1, 3] - ctrl[-1, 2]
+    assert start[1] == 0 and start[0] > 0
+    assert abs(end[0]) < 1e-9
+
+def test_repeated_waypoints_are_dropped_and_too_few_raise():
+    pixels, _, ctrl = generate_spline([(0, 0), (0, 0), (30, 10), (30, 10), (60, 0)])
+    assert len(ctrl) == 2 and set(_steps(pixels).tolist()) == {1}
+    with pytest.raises(ValueError):
+        generate_spline([(5, 5)])
+    with pytest.raises(ValueError):
+        generate_spline([(5, 5), (5, 5)])
+
+def test_compute_spline_track_widens_the_centerline():
+    centerline, blocks = compute_spline_track(WAYPOINTS, track_width=3)
+    assert set(centerline) <= set(map(tuple, blocks.tolist()))
+    assert len(blocks) > 2 * len(centerline)
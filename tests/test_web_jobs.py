@@ -0,0 +1,50 @@
+import time
+
+import pytest
+
+from combined_web_demo import JobCancelled, JobRejected, JobScheduler, RenderPool
+
+@pytest.fixture
+def pool():
+    pool = RenderPool(workers=1)
+    yield pool
+    pool.shutdown()
+
+def _wait(predicate, seconds=30):
+    deadline = time.monotonic() + seconds
+    while not predicate():
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+
+def test_render_pool_does_not_start_processes_until_used(pool):
+    assert pool.context is None and not pool.idle
+    assert pool.run(max, 1, 2) == 2
+
+def test_cancel_returns_capacity_and_frees_the_render_process(pool):
+    scheduler = JobScheduler(workers=1, max_queued_cost=10)
+    job = scheduler.submit(pool.run, time.sleep, 60, cost=10)
+    _wait(lambda: job.started_at is not None)
+    with pytest.raises(JobRejected):
+        scheduler.submit(pool.run, max, 1, 2, cost=10)
+
+    scheduler.cancel(job)
+    assert scheduler.queued_cost == 0
+    with pytest.raises(JobCancelled):
+        job.future.result(timeout=10)
+    # 唯一的计算线程与渲染进程都已空出，新任务可以立即运行
+    follow_up = scheduler.submit(pool.run, max, 1, 2, cost=10)
+    assert follow_up.future.result(timeout=30) == 2
+    _wait(lambda: scheduler.queued_cost == 0)
+
+def test_timeout_is_enforced_without_a_waiting_caller(pool):
+    scheduler = JobScheduler(workers=1, max_queued_cost=10, timeout=1)
+    job = scheduler.submit(pool.run, time.sleep, 60, cost=10)
+    with pytest.raises(JobCancelled):
+        job.future.result(timeout=30)
+    _wait(lambda: scheduler.queued_cost == 0)
+    assert pool.run(max, 3, 4) == 4
+
+def test_render_errors_propagate_and_keep_the_process(pool):
+    with pytest.raises(ValueError):
+        pool.run(int, "not a number")
+    assert pool.run(max, 5, 6) == 6